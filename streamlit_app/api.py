@@ -0,0 +1,177 @@
+# api.py
+"""Headless prediction service over the same models and loaders as the dashboard.
+
+Run from ``streamlit_app/``:
+
+    python api.py --port 8000 --workers 4
+
+Endpoints accept a single JSON record, a JSON array of records, or NDJSON
+(``Content-Type: application/x-ndjson``, one record per line). Responses use
+the same shape as the request. ``GET /metrics`` serves the worker's step
+timings (``utils.telemetry``) in the Prometheus text format.
+"""
+
+import argparse
+import json
+import socket
+from contextlib import asynccontextmanager
+
+from streamlit.logger import set_log_level
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from utils.inference import RecordError, get_inference_service
+from utils.telemetry import telemetry
+
+NDJSON = "application/x-ndjson"
+MAX_BATCH = 10_000
+
+# Streamlit's caches warn about the missing runtime on every call outside `streamlit run`
+set_log_level("error")
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def parse_records(body: bytes, content_type: str):
+    """Return (records, shape) where shape is "object", "array" or "ndjson"."""
+    try:
+        if content_type.startswith(NDJSON):
+            records = [json.loads(line) for line in body.splitlines() if line.strip()]
+            shape = "ndjson"
+        else:
+            payload = json.loads(body)
+            shape = "array" if isinstance(payload, list) else "object"
+            records = payload if shape == "array" else [payload]
+    except json.JSONDecodeError as e:
+        raise BadRequest(f"Invalid JSON: {e}")
+    if not records:
+        raise BadRequest("No records in request body")
+    if len(records) > MAX_BATCH:
+        raise BadRequest(f"Batch of {len(records):,} records exceeds the limit of {MAX_BATCH:,}")
+    if not all(isinstance(r, dict) for r in records):
+        raise BadRequest("Every record must be a JSON object")
+    return records, shape
+
+
+def render(results: list, shape: str) -> Response:
+    if shape == "ndjson":
+        return Response("".join(json.dumps(r) + "\n" for r in results), media_type=NDJSON)
+    return JSONResponse(results[0] if shape == "object" else results)
+
+
+def endpoint(predict):
+    """Wrap ``predict(service, records, request)`` into a JSON/NDJSON endpoint."""
+    async def handler(request):
+        try:
+            records, shape = parse_records(await request.body(), request.headers.get("content-type", ""))
+            results = await run_in_threadpool(_run, predict, records, request)
+        except BadRequest as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        except RecordError as e:
+            return JSONResponse({"error": str(e), "details": e.errors}, status_code=422)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        return render(results, shape)
+    return handler
+
+
+def _run(predict, records, request):
+    # Validation and inference are CPU-bound; keep both off the event loop
+    with telemetry.timer(f"api{request.url.path}"):
+        service = get_inference_service()
+        return predict(service, service.validate(records), request)
+
+
+def _predict_performance(service, records, request):
+    return service.predict_performance(records)
+
+
+def _predict_at_risk(service, records, request):
+    return service.predict_at_risk(records, threshold=float(request.query_params.get("threshold", 0.5)))
+
+
+def _explain(service, records, request):
+    top_n = request.query_params.get("top_n")
+    return service.explain(records, model=request.query_params.get("model", "at-risk"),
+                           top_n=int(top_n) if top_n else None)
+
+
+async def health(request):
+    service = get_inference_service()
+    return JSONResponse({"status": "ok", "performance_classes": service.classes,
+                         "features": service.perf_encoder.feature_names})
+
+
+async def metrics(request):
+    # Per worker process; scrape each worker or run a single worker behind the scraper
+    return PlainTextResponse(telemetry.prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Load models once per worker before accepting traffic
+    await run_in_threadpool(get_inference_service)
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+        Route("/predict/performance", endpoint(_predict_performance), methods=["POST"]),
+        Route("/predict/at-risk", endpoint(_predict_at_risk), methods=["POST"]),
+        Route("/explain", endpoint(_explain), methods=["POST"]),
+    ],
+    lifespan=lifespan,
+)
+
+
+def _worker(config, sock):
+    import uvicorn
+
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(host: str, port: int, workers: int):
+    """Run ``workers`` processes, each loading the models once, on one shared listener."""
+    import multiprocessing
+    import signal
+
+    import uvicorn
+
+    config = uvicorn.Config("api:app", host=host, port=port, log_level="warning")
+    if workers <= 1:
+        uvicorn.Server(config).run()
+        return
+    # uvicorn's own multi-worker listener is created with proto=0, which stops asyncio from
+    # setting TCP_NODELAY on accepted connections (~40 ms per keep-alive response from
+    # Nagle + delayed ACK). Bind the shared listener as an explicit TCP socket instead.
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(config.backlog)
+
+    procs = [multiprocessing.Process(target=_worker, args=(config, sock), daemon=True) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    signal.signal(signal.SIGTERM, lambda *_: [proc.terminate() for proc in procs])
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.join()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Student performance prediction service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
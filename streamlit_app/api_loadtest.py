@@ -0,0 +1,112 @@
+# api_loadtest.py
+"""Closed-loop load test for ``api.py``.
+
+    python api_loadtest.py --endpoint /predict/at-risk --concurrency 16 --duration 20 --batch 1
+
+Each client thread keeps one HTTP/1.1 connection open and sends requests
+back to back. Reports latency percentiles, requests/sec and records/sec over successful
+(HTTP 200) requests; failures are only counted.
+"""
+
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from utils.loader import DATA_PATH, read_csv_typed, CATEGORICAL_COLS, SCORE_COLS
+
+
+def build_bodies(batch: int, ndjson: bool, n_bodies: int = 256, seed: int = 0):
+    df = read_csv_typed(DATA_PATH)[CATEGORICAL_COLS + SCORE_COLS]
+    records = json.loads(df.to_json(orient="records"))
+    rng = np.random.default_rng(seed)
+    bodies = []
+    for _ in range(n_bodies):
+        picked = [records[i] for i in rng.integers(0, len(records), size=batch)]
+        if ndjson:
+            bodies.append("".join(json.dumps(r) + "\n" for r in picked).encode())
+        else:
+            bodies.append(json.dumps(picked[0] if batch == 1 else picked).encode())
+    return bodies
+
+
+def client(url, path, bodies, content_type, deadline, latencies, errors, offset):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    i = offset
+    while time.perf_counter() < deadline:
+        body = bodies[i % len(bodies)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request("POST", path, body=body, headers={"Content-Type": content_type})
+            resp = conn.getresponse()
+            resp.read()
+            ok = resp.status == 200
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(1)
+            time.sleep(0.01)  # don't spin on a refused connection
+    conn.close()
+
+
+def run(url, path, concurrency, duration, batch, ndjson, warmup=2.0):
+    bodies = build_bodies(batch, ndjson)
+    content_type = "application/x-ndjson" if ndjson else "application/json"
+
+    def wave(seconds):
+        latencies, errors = [], []
+        deadline = time.perf_counter() + seconds
+        threads = [threading.Thread(target=client, args=(url, path, bodies, content_type, deadline,
+                                                         latencies, errors, k * 7))
+                   for k in range(concurrency)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return np.asarray(latencies), len(errors), time.perf_counter() - start
+
+    if warmup:
+        wave(warmup)
+    lat, n_errors, elapsed = wave(duration)
+    ms = lat * 1e3
+    return {
+        "endpoint": path, "concurrency": concurrency, "batch": batch, "ndjson": ndjson,
+        "requests": int(len(lat)), "errors": n_errors, "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(lat) / elapsed, 1),
+        "records_per_sec": round(len(lat) * batch / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2) if len(ms) else None,
+        "p90_ms": round(float(np.percentile(ms, 90)), 2) if len(ms) else None,
+        "p99_ms": round(float(np.percentile(ms, 99)), 2) if len(ms) else None,
+        "max_ms": round(float(ms.max()), 2) if len(ms) else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the prediction service")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", default="/predict/at-risk")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to measure (after warmup)")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--batch", type=int, default=1, help="records per request")
+    parser.add_argument("--ndjson", action="store_true", help="send batches as NDJSON")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.url, args.endpoint, args.concurrency, args.duration, args.batch, args.ndjson, args.warmup)
+    if args.json:
+        print(json.dumps(report))
+    else:
+        for key, value in report.items():
+            print(f"{key:>18}: {value}")
@@ -0,0 +1,380 @@
+# benchmark.py
+"""Headless benchmarks of every page's compute path on synthetic rosters.
+
+    python benchmark.py                                    # every case at 10k, 100k, 1M and 10M rows
+    python benchmark.py --sizes 10k 100k --cases eda predict
+    python benchmark.py --json bench.json                  # also save the report
+    python benchmark.py --baseline bench.json              # compare against a saved report
+
+Rosters are sampled from ``students_cleaned.csv`` by ``utils.synthetic`` and
+cached under ``data/synthetic/``, so every run (and every commit) sees the
+same rows. Each case × size runs in a fresh interpreter with the roster
+already loaded. For every step it records wall time and peak RSS; the peak
+is reset between steps through ``/proc/self/clear_refs`` where Linux allows
+it, otherwise it is the process peak so far. Cases whose page would not run
+at a size (model comparison retrains three models on every row) are skipped
+above ``max_rows`` unless ``--no-limits`` is given.
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+SEED = 42
+RESULT_MARKER = "--benchmark-result--"
+
+
+class StepRecorder:
+    """``with recorder("step"):`` records wall time and peak RSS (MB) of the block."""
+
+    def __init__(self):
+        self.steps = []
+        self.resettable = _reset_peak()
+
+    def __call__(self, name: str):
+        return self._step(name)
+
+    @contextmanager
+    def _step(self, name: str):
+        self.resettable = _reset_peak()
+        rss = _rss_mb()
+        start = time.perf_counter()
+        yield
+        seconds = time.perf_counter() - start
+        peak = _peak_mb()
+        self.steps.append({"step": name, "seconds": round(seconds, 4), "peak_mb": round(peak, 1),
+                           "extra_mb": round(max(peak - rss, 0.0), 1)})
+
+
+def _proc_status_mb(field: str):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _rss_mb() -> float:
+    rss = _proc_status_mb("VmRSS:")
+    return rss if rss is not None else _peak_mb()
+
+
+def _peak_mb() -> float:
+    peak = _proc_status_mb("VmHWM:")
+    if peak is not None:
+        return peak
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 1024
+
+
+def _reset_peak() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+# --- Cases: the non-UI work each page does on a rerun, in page order ---
+
+def bench_eda(df, step):
+    """2_EDA_Explorer: aggregate cube, every sidebar combination, row filter and chart data."""
+    from utils.eda_cube import ALL, FILTER_COLS, AggregateCube
+    from utils.plot_data import MAX_PARALLEL_LINES, MAX_SCATTER_POINTS, box_data, histogram_data, stratified_sample
+
+    with step("cube_build"):
+        cube = AggregateCube.from_frame(df)
+    with step("cube_queries"):
+        for key in itertools.product(*([ALL] + cube.vocab[col] for col in FILTER_COLS)):
+            cell = cube.query(*key)
+            cell.describe()
+            cell.corr()
+    with step("filter"):
+        mask = (df["gender"] == cube.vocab["gender"][0]).to_numpy() & (df["lunch"] == cube.vocab["lunch"][0]).to_numpy()
+        filtered = df[mask]
+    with step("chart_data"):
+        histogram_data(filtered, "math_score", color="gender", nbins=20)
+        box_data(filtered, "parent_edu", "average_score", color="gender")
+        stratified_sample(filtered, "performance", MAX_PARALLEL_LINES)
+        stratified_sample(filtered, "performance", MAX_SCATTER_POINTS)
+    with step("csv_export"):
+        filtered.to_csv(index=False)
+
+
+def bench_predict(df, step):
+    """3_Predict_Performance / 4_At-Risk / 8_Upload: single-record predictions and roster scoring."""
+    from utils.batch_scoring import score_roster
+    from utils.encoder import get_encoder
+    from utils.loader import load_model, load_risk_model
+    from utils.tree_kernel import load_compiled_model
+
+    perf_model, le = load_model()
+    risk_model = load_risk_model()
+    compiled = load_compiled_model()
+    perf_encoder = get_encoder(tuple(perf_model.feature_names_in_))
+    risk_encoder = get_encoder(tuple(risk_model.feature_names_in_))
+    records = df.head(1000).to_dict("records")
+
+    with step("records_1k"):
+        for record in records:
+            compiled.predict_proba(perf_encoder.transform_record(record)[None, :])
+            risk_model.predict_proba(risk_encoder.encode_record(record))
+    with step("score_roster"):
+        score_roster(df, compiled, le, risk_model, perf_encoder, risk_encoder)
+
+
+def bench_similarity(df, step):
+    """3_Predict_Performance / 4_AtRisk_Analyzer: similar-students index build and lookups."""
+    from utils.similarity import SimilarityIndex
+
+    queries = df.sample(min(len(df), 1000), random_state=SEED)
+    with step("build"):
+        index = SimilarityIndex.build(df)
+    with step("query_1k"):
+        for record in queries.to_dict("records"):
+            index.query(record)
+    with step("query_batch_1k"):
+        index.query_batch(queries)
+
+
+def bench_shap(df, step):
+    """5_Model_Insights: encode the roster, hash rows for the store, explain every row, mean |SHAP|."""
+    import numpy as np
+
+    from utils.encoder import get_encoder
+    from utils.loader import load_risk_model
+    from utils.lazy import shap
+    from utils.shap_helper import build_explainer, summarize_background
+    from utils.shap_store import row_hashes
+
+    model = load_risk_model()
+    shap.Explanation  # import outside the timed steps
+    with step("encode"):
+        X = get_encoder(tuple(model.feature_names_in_)).encode_frame(df)
+    with step("row_hashes"):
+        row_hashes(X)
+    with step("background"):
+        explainer = build_explainer(model, summarize_background(X))
+    with step("explain"):
+        values = np.asarray(explainer(X).values)
+    with step("mean_abs"):
+        np.abs(values).mean(axis=0)
+
+
+def bench_clustering(df, step):
+    """6_Student_Clustering: fit, assign personas, 3-D sample and density grid."""
+    from utils.clustering import fit_clusterer
+    from utils.plot_data import MAX_3D_POINTS, binned_2d, stratified_sample
+
+    with step("fit"):
+        clusterer = fit_clusterer(df)
+    with step("assign"):
+        df = df.assign(persona=clusterer.persona(clusterer.assign(df)))
+    with step("plot_data"):
+        stratified_sample(df, "persona", MAX_3D_POINTS)
+        binned_2d(df, "math_score", "reading_score")
+        df["persona"].value_counts()
+
+
+def bench_comparison(df, step):
+    """7_Model_Comparison: one-hot encoding and the three-model comparison (holdout + 5-fold CV)."""
+    import pandas as pd
+
+    from utils.model_bench import run_comparison
+
+    df = df.assign(at_risk=(df["average_score"] < 60).astype(int))
+    with step("get_dummies"):
+        X = pd.get_dummies(df.drop(columns=["performance", "average_score", "at_risk"]), drop_first=True)
+    with step("train_compare"):
+        run_comparison(X, df["at_risk"], cv=5)
+
+
+def bench_group_risk(df, step):
+    """9_Teacher_Insights: at-risk scoring of the roster, group cube and a breakdown."""
+    from utils.group_risk import GroupRiskCube, predict_at_risk
+    from utils.loader import load_risk_model
+
+    model = load_risk_model()
+    with step("predict_at_risk"):
+        at_risk = predict_at_risk(df, model) >= 0.5
+    with step("cube"):
+        cube = GroupRiskCube.from_frame(df, at_risk)
+    with step("breakdown"):
+        cube.breakdown(["gender", "lunch"])
+
+
+def bench_forecast(df, step):
+    """10_Performance_Forecast: simulated term store, trend fit, forecasts and long-format export."""
+    from utils.term_store import TermStore, TrendForecast
+
+    with step("simulate"):
+        store = TermStore.simulate(df)
+    with step("trend_fit"):
+        forecast = TrendForecast(store, group_col="gender")
+    with step("forecast"):
+        forecast.forecast()
+        forecast.group_forecast()
+        forecast.student(store.ids[0])
+    with step("reshape"):
+        mask = store.mask(gender=store.attributes["gender"].iloc[0])
+        store.term_means(mask)
+        store.to_long(mask)
+
+
+# name -> (function, largest roster it runs on by default)
+CASES = {
+    "eda": (bench_eda, None),
+    "predict": (bench_predict, None),
+    "similarity": (bench_similarity, None),
+    "shap": (bench_shap, None),
+    "clustering": (bench_clustering, None),
+    "comparison": (bench_comparison, 100_000),
+    "group_risk": (bench_group_risk, None),
+    "forecast": (bench_forecast, None),
+}
+
+
+def run_case(case: str, rows: int, seed: int = SEED) -> dict:
+    """Run one case in this process (used by the ``--worker`` subprocess)."""
+    from utils.synthetic import load_synthetic
+
+    rss = _rss_mb()
+    df = load_synthetic(rows, seed)
+    data_mb = _rss_mb() - rss
+
+    recorder = StepRecorder()
+    start = time.perf_counter()
+    CASES[case][0](df, recorder)
+    seconds = sum(s["seconds"] for s in recorder.steps)
+    # Model loading and imports inside the case are reported apart from the timed steps
+    setup = time.perf_counter() - start - seconds
+    return {"case": case, "rows": rows, "seconds": round(seconds, 4), "setup_s": round(setup, 4),
+            "peak_mb": max(s["peak_mb"] for s in recorder.steps), "data_mb": round(data_mb, 1),
+            "peak_reset": recorder.resettable, "steps": recorder.steps}
+
+
+def run_worker(case: str, rows: int, seed: int, timeout: float) -> dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", case, str(rows), "--seed", str(seed)]
+    try:
+        proc = subprocess.run(cmd, cwd=APP_DIR, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"case": case, "rows": rows, "error": f"timed out after {timeout:.0f} s"}
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    if proc.returncode < 0:
+        # SIGKILL is almost always the kernel's OOM killer
+        error = f"killed by signal {-proc.returncode}" + (" (out of memory?)" if proc.returncode == -9 else "")
+    else:
+        error = (proc.stderr.strip().splitlines() or [f"exit code {proc.returncode}"])[-1]
+    return {"case": case, "rows": rows, "error": error}
+
+
+def parse_size(text: str) -> int:
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([kKmM]?)", text)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"invalid size {text!r} (e.g. 10k, 1M, 250000)")
+    return int(float(match.group(1)) * {"": 1, "k": 10**3, "m": 10**6}[match.group(2).lower()])
+
+
+def _git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=APP_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(cases, sizes, seed: int = SEED, limits: bool = True, timeout: float = 3600, progress=None) -> dict:
+    from utils.synthetic import load_synthetic
+
+    results = []
+    for rows in sizes:
+        load_synthetic(rows, seed)  # generate once per size, before any timed worker
+        for case in cases:
+            max_rows = CASES[case][1]
+            if limits and max_rows is not None and rows > max_rows:
+                result = {"case": case, "rows": rows, "skipped": f"above max_rows={max_rows:,} (--no-limits to run)"}
+            else:
+                result = run_worker(case, rows, seed, timeout)
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "seed": seed,
+        "results": results,
+    }
+
+
+def format_result(result: dict, baseline: dict = None) -> str:
+    label = f"{result['case']:<12} {result['rows']:>11,}"
+    if "error" in result:
+        return f"{label}  ERROR  {result['error']}"
+    if "skipped" in result:
+        return f"{label}  skipped ({result['skipped']})"
+    line = f"{label} {result['seconds']:>9.3f} s"
+    old = (baseline or {}).get((result["case"], result["rows"]))
+    if old and "seconds" in old:
+        line += f" ({(result['seconds'] / old['seconds'] - 1) * 100:+.0f}%)" if old["seconds"] else ""
+    line += f" {result['peak_mb']:>8.0f} MB peak"
+    if old and "peak_mb" in old:
+        line += f" ({result['peak_mb'] - old['peak_mb']:+.0f})"
+    top = sorted(result["steps"], key=lambda s: s["seconds"], reverse=True)[:3]
+    return line + "  [" + ", ".join(f"{s['step']} {s['seconds']:.2f}s" for s in top) + "]"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark each page's compute path at scaled roster sizes")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=DEFAULT_SIZES, metavar="N",
+                        help="roster sizes, e.g. 10k 1M (default: 10k 100k 1M 10M)")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--no-limits", action="store_true", help="also run cases above their max_rows")
+    parser.add_argument("--timeout", type=float, default=3600, help="seconds per case and size")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--worker", nargs=2, metavar=("CASE", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    from streamlit.logger import set_log_level
+
+    # Streamlit's caches warn about the missing runtime on every call outside `streamlit run`
+    set_log_level("error")
+    if args.worker:
+        case, rows = args.worker
+        print(RESULT_MARKER + json.dumps(run_case(case, int(rows), args.seed)))
+        sys.exit(0)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {(r["case"], r["rows"]): r for r in json.load(f)["results"]}
+    report = run(args.cases, args.sizes, args.seed, not args.no_limits, args.timeout,
+                 progress=lambda result: print(format_result(result, baseline), flush=True))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
@@ -2,48 +2,78 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from utils.loader import load_data
+from utils.term_store import TermStore, get_term_store, get_trend_forecast, TERM_STORE_PATH, ID_COL, TERM_COL
+from utils.telemetry import start_page, end_page, plotly_chart
 
 st.set_page_config(page_title="Performance Forecast", page_icon="📈", layout="wide")
+start_page(__file__)
 st.title("📈 Student Score Forecasting")
 
-# Load synthetic or historical data
+# Load the longitudinal term store (students × terms × subjects)
 df = load_data()
+store = get_term_store(df)
 
-# --- Patch: simulate semester/year score trend ---
-if 'term' not in df.columns:
-    import numpy as np
-    st.info("ℹ️ Historical data not found. Generating sample scores across 4 terms.")
-    terms = ['Term 1', 'Term 2', 'Term 3', 'Term 4']
-    df_long = pd.concat([
-        df.assign(term=t,
-                  math_score=lambda x: x['math_score'] + np.random.randint(-5, 5, size=len(x)),
-                  reading_score=lambda x: x['reading_score'] + np.random.randint(-5, 5, size=len(x)),
-                  writing_score=lambda x: x['writing_score'] + np.random.randint(-5, 5, size=len(x)))
-        for t in terms
-    ])
-else:
-    df_long = df.copy()
+# Import real term history (one row per student per term)
+with st.sidebar.expander("📂 Import Term History"):
+    history_file = st.file_uploader(f"CSV with {ID_COL}, {TERM_COL} and subject scores", type=["csv"])
+    term_order = st.text_input("Term order, oldest first (comma-separated)",
+                               help="Needed unless terms are numbers, dates or like 'Term 1', 'Term 2'")
+    if history_file is not None and st.button("Save as term store"):
+        try:
+            history = pd.read_csv(history_file, dtype={TERM_COL: str})
+            order = [t.strip() for t in term_order.split(",") if t.strip()] or None
+            TermStore.from_long(history, order).save(TERM_STORE_PATH)
+            st.success("Term history saved.")
+            st.rerun()
+        except (KeyError, ValueError) as e:
+            st.error(f"❌ Could not import history: {e}")
+
+if store.simulated:
+    st.info("ℹ️ Historical data not found. Showing simulated scores across 4 terms.")
 
 # Filter by gender or group
 st.sidebar.header("🔍 Filter")
-selected_gender = st.sidebar.selectbox("Gender", ["All"] + sorted(df_long["gender"].unique()))
+selected_gender = "All"
+if "gender" in store.attributes:
+    selected_gender = st.sidebar.selectbox("Gender", ["All"] + sorted(store.attributes["gender"].cat.categories))
+mask = store.mask(gender=selected_gender) if selected_gender != "All" else None
+
+# Per-term subject means, with the next term forecast from the pooled trend
+forecast = get_trend_forecast(store, group_col="gender" if "gender" in store.attributes else None)
+means = store.term_means(mask)
 if selected_gender != "All":
-    df_long = df_long[df_long["gender"] == selected_gender]
+    next_term = forecast.group_forecast().loc[selected_gender]
+else:
+    next_term = pd.Series(forecast.forecast().mean(axis=0), index=store.subjects)
 
-# Melt scores
-melted = pd.melt(df_long, id_vars=["term"], value_vars=["math_score", "reading_score", "writing_score"],
-                 var_name="Subject", value_name="Score")
+trend = means.reset_index().melt(id_vars=TERM_COL, var_name="Subject", value_name="Score").assign(kind="Observed")
+projected = pd.concat([
+    means.iloc[[-1]].reset_index(),
+    next_term.to_frame().T.assign(**{TERM_COL: "Next Term"}),
+]).melt(id_vars=TERM_COL, var_name="Subject", value_name="Score").assign(kind="Forecast")
 
 # Plot
 st.subheader("📊 Average Score Trends Over Time")
-fig = px.line(melted.groupby(["term", "Subject"]).Score.mean().reset_index(),
-              x="term", y="Score", color="Subject", markers=True,
-              title="Forecasted Subject Trends Across Terms")
-st.plotly_chart(fig, use_container_width=True)
+fig = px.line(pd.concat([trend, projected]), x=TERM_COL, y="Score", color="Subject", line_dash="kind",
+              markers=True, title="Subject Trends Across Terms with Next-Term Forecast")
+plotly_chart(fig, use_container_width=True)
+
+# Per-student history lookup
+st.subheader("🧑‍🎓 Student History")
+student_id = st.text_input("Student ID", value=str(store.ids[0]))
+try:
+    col1, col2 = st.columns(2)
+    col1.dataframe(store.history(student_id))
+    col2.dataframe(forecast.student(student_id).round(2))
+except (KeyError, ValueError):
+    st.warning(f"No history for student {student_id}.")
 
 # Download option
-st.subheader("📥 Download Synthetic Time-Series Data")
-st.download_button("Download CSV", melted.to_csv(index=False), "term_score_trends.csv", "text/csv")
+st.subheader("📥 Download Time-Series Data")
+if st.button("Prepare CSV"):
+    st.download_button("Download CSV", store.to_long(mask).to_csv(index=False), "term_score_trends.csv", "text/csv")
 
 st.markdown("---")
-st.caption("⏳ Simulated Trend Forecast · Group 7 · UTA MSDS")
+st.caption("⏳ Term Trend Forecast · Group 7 · UTA MSDS")
+
+end_page()
@@ -0,0 +1,79 @@
+import streamlit as st
+import pandas as pd
+import time
+import plotly.express as px
+from utils.lazy import LOAD_TIMES
+from utils.telemetry import BUCKETS_MS, start_page, end_page, plotly_chart, set_enabled, telemetry
+
+st.set_page_config(page_title="Telemetry", page_icon="⏱️", layout="wide")
+start_page(__file__)
+st.markdown("""
+<h1 style='text-align: center;'>⏱️ Performance Telemetry</h1><hr>
+""", unsafe_allow_html=True)
+
+# Controls (process-wide: every session of this server shares the histograms)
+st.sidebar.header("⚙️ Telemetry")
+enabled = st.sidebar.toggle("Collect timings", value=telemetry.enabled)
+if enabled != telemetry.enabled:
+    set_enabled(enabled)
+if st.sidebar.button("🧹 Reset histograms"):
+    telemetry.reset()
+
+summary = pd.DataFrame(telemetry.summary())
+col1, col2, col3 = st.columns(3)
+col1.metric("Collecting", "On" if telemetry.enabled else "Off")
+col2.metric("Since reset", f"{(time.time() - telemetry.started) / 60:,.0f} min")
+col3.metric("Timed calls", f"{int(summary['count'].sum()) if len(summary) else 0:,}")
+
+if summary.empty:
+    st.info("No timings recorded yet. Open a few pages and come back.")
+else:
+    pages = sorted(summary["page"].unique())
+    selected = st.multiselect("Pages", pages, default=pages)
+    view = summary[summary["page"].isin(selected)]
+    if view.empty:
+        st.info("Select at least one page to see its timings.")
+    else:
+        # Latency percentiles per step and page
+        st.markdown("### 📋 Step Latency")
+        st.dataframe(view.style.format({"mean_ms": "{:.2f}", "p50_ms": "{:.2f}", "p95_ms": "{:.2f}",
+                                        "p99_ms": "{:.2f}", "max_ms": "{:.2f}", "total_s": "{:.2f}"}),
+                     use_container_width=True)
+
+        # Where the time goes: total time per step, split by page
+        st.markdown("### 🧭 Time Spent by Step")
+        fig = px.bar(view[view["step"] != "page.run"], x="total_s", y="step", color="page", orientation="h",
+                     labels={"total_s": "Total time (s)", "step": ""}, title="Cumulative time per step")
+        fig.update_layout(yaxis=dict(categoryorder="total ascending"))
+        plotly_chart(fig, use_container_width=True)
+
+        # One histogram in detail
+        st.markdown("### 📊 Latency Distribution")
+        keys = list(view[["step", "page"]].itertuples(index=False, name=None))
+        key = st.selectbox("Step", keys, format_func=lambda k: f"{k[0]} · {k[1]}")
+        hist = telemetry.histograms().get(key) if key is not None else None
+        filled = [i for i, n in enumerate(hist.counts) if n] if hist is not None else []
+        if not filled:
+            # Nothing selected, or the histogram was reset since the summary was taken
+            st.info("No calls recorded for this step yet.")
+        else:
+            buckets = pd.DataFrame({"Upper bound (ms)": [f"≤ {b:g}" for b in BUCKETS_MS] + ["> 10000"],
+                                    "Calls": hist.counts})
+            fig = px.bar(buckets.iloc[filled[0]:filled[-1] + 1], x="Upper bound (ms)", y="Calls",
+                         title=f"{key[0]} on {key[1]}: p50 {hist.quantile(0.5):.2f} ms · p95 {hist.quantile(0.95):.2f} ms")
+            plotly_chart(fig, use_container_width=True)
+
+if LOAD_TIMES:
+    with st.expander("📦 Deferred imports (first use)"):
+        st.dataframe(pd.DataFrame({"Module": list(LOAD_TIMES), "Import (s)": list(LOAD_TIMES.values())}))
+
+# Prometheus text exposition, for scraping or ad-hoc diffing
+with st.expander("📤 Prometheus export"):
+    text = telemetry.prometheus()
+    st.download_button("⬇️ Download metrics.prom", text, "metrics.prom", "text/plain")
+    st.code(text[:20_000], language="text")
+
+st.markdown("---")
+st.caption("Timings are kept in memory per server process · set TELEMETRY=0 to disable")
+
+end_page()
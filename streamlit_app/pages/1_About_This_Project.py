@@ -1,7 +1,9 @@
 import streamlit as st
+from utils.telemetry import start_page, end_page
 
 # Page config
 st.set_page_config(page_title="About This Project", page_icon="📘", layout="wide")
+start_page(__file__)
 
 # Responsive style block
 st.markdown("""
@@ -49,7 +51,7 @@ Analyze and predict student performance using demographic and academic features
 
 ### 🧰 Tools & Libraries
 - **Python**, **Pandas**, **Scikit-learn**, **Joblib**
-- **Plotly**, **Streamlit**, **SHAP**, **pdfkit**
+- **Plotly**, **Streamlit**, **SHAP**, **fpdf2**
 
 ### 🏆 Results & Deliverables
 - Achieved **93.5% accuracy** using a Decision Tree Classifier
@@ -64,4 +66,6 @@ Analyze and predict student performance using demographic and academic features
 👥 **Group 7 Members:** Nishant · Ayush · Shilp · Harsh  
 📍 **Year:** 2025
 ---
-""")
\ No newline at end of file
+""")
+
+end_page()
@@ -1,12 +1,16 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.figure_factory as ff
+import plotly.graph_objects as go
 import numpy as np
-from utils.loader import load_data
+from utils.loader import load_data, data_version
+from utils.eda_cube import get_cube
+from utils.plot_data import stratified_sample, histogram_data, box_data, MAX_SCATTER_POINTS, MAX_PARALLEL_LINES
+from utils.telemetry import start_page, end_page, plotly_chart
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Student Performance Dashboard", page_icon="📊", layout="wide")
+start_page(__file__)
 
 st.markdown("""
     <style>
@@ -28,6 +32,7 @@ st.markdown("""
 
 # --- Load Data ---
 df = load_data()
+cube = get_cube(df, data_version())
 
 # --- Sidebar Filters ---
 st.sidebar.header("🔍 Filter Dataset")
@@ -37,83 +42,106 @@ prep = st.sidebar.selectbox("Test Preparation", ["All"] + sorted(df["prep_course
 race = st.sidebar.selectbox("Race/Ethnicity", ["All"] + sorted(df["race/ethnicity"].unique()))
 lunch = st.sidebar.selectbox("Lunch Type", ["All"] + sorted(df["lunch"].unique()))
 
-# --- Filter Data ---
-filtered_df = df.copy()
-if gender != "All":
-    filtered_df = filtered_df[filtered_df["gender"] == gender]
-if prep != "All":
-    filtered_df = filtered_df[filtered_df["prep_course"] == prep]
-if race != "All":
-    filtered_df = filtered_df[filtered_df["race/ethnicity"] == race]
-if lunch != "All":
-    filtered_df = filtered_df[filtered_df["lunch"] == lunch]
+# --- Aggregates for the selection (precomputed cube lookup) ---
+cell = cube.query(gender, prep, race, lunch)
+perf_counts = cell.perf_counts[cell.perf_counts > 0]
+
+# --- Filter Data (row-level charts only) ---
+mask = np.ones(len(df), dtype=bool)
+for col, value in [("gender", gender), ("prep_course", prep), ("race/ethnicity", race), ("lunch", lunch)]:
+    if value != "All":
+        mask &= (df[col] == value).to_numpy()
+filtered_df = df[mask]
 
 # --- Key Metrics ---
 st.subheader("📊 Key Statistics")
 st.markdown("---")
 col1, col2, col3 = st.columns(3)
-col1.metric("👥 Total Students", len(filtered_df))
-col2.metric("📈 Avg. Score", f"{filtered_df['average_score'].mean():.2f}")
-col3.metric("🏅 Most Common Category", filtered_df['performance'].value_counts().idxmax())
+col1.metric("👥 Total Students", cell.count)
+col2.metric("📈 Avg. Score", f"{cell.mean()['average_score']:.2f}")
+col3.metric("🏅 Most Common Category", cell.most_common_performance())
 
 # --- Summary Table ---
 st.subheader("📋 Dataset Overview")
-st.dataframe(filtered_df.describe(include='all').astype(str), use_container_width=True)
+st.dataframe(cell.describe().round(2).astype(str), use_container_width=True)
 
 # --- Performance Distribution ---
 st.subheader("🎯 Performance Category Distribution")
-fig = px.histogram(filtered_df, x="performance", color="performance", template="plotly_white",
-                   title="Distribution of Performance Categories")
+fig = px.bar(x=perf_counts.index, y=perf_counts.values, color=perf_counts.index, template="plotly_white",
+             labels={"x": "performance", "y": "count", "color": "performance"},
+             title="Distribution of Performance Categories")
 fig.update_layout(title_x=0.3, margin=dict(l=40, r=40, t=40, b=20))
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 # --- Subject Score Distributions ---
 st.subheader("📚 Subject-wise Score Distribution")
 score_option = st.selectbox("Select Subject", ["math_score", "reading_score", "writing_score"])
-fig = px.histogram(filtered_df, x=score_option, color="gender", marginal="violin", nbins=20,
-                   title=f"{score_option.replace('_', ' ').title()} Distribution by Gender",
-                   template="plotly_white")
+hist_data = histogram_data(filtered_df, score_option, color="gender", nbins=20)
+if hist_data.kind == "raw":
+    fig = px.histogram(hist_data.frame, x=score_option, color="gender", marginal="violin", nbins=20,
+                       title=f"{score_option.replace('_', ' ').title()} Distribution by Gender",
+                       template="plotly_white")
+else:
+    # Large selections: ship pre-binned counts instead of every row (no violin marginal)
+    fig = px.bar(hist_data.frame, x=score_option, y="count", color="gender",
+                 title=f"{score_option.replace('_', ' ').title()} Distribution by Gender",
+                 template="plotly_white")
+    fig.update_traces(width=hist_data.frame.attrs["bin_width"])
+    st.caption(hist_data.caption())
 fig.update_layout(title_x=0.3)
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 # --- Parental Education Boxplot ---
 st.subheader("🎓 Score by Parental Education")
-fig = px.box(filtered_df, x="parent_edu", y="average_score", color="gender",
-             title="Average Score by Parental Education",
-             template="plotly_white")
+box = box_data(filtered_df, "parent_edu", "average_score", color="gender")
+if box.kind == "raw":
+    fig = px.box(box.frame, x="parent_edu", y="average_score", color="gender",
+                 title="Average Score by Parental Education",
+                 template="plotly_white")
+else:
+    # Large selections: quartiles computed here, one box per group sent to the browser
+    fig = go.Figure()
+    for gender_value, stats in box.frame.groupby("gender", observed=True):
+        fig.add_trace(go.Box(name=str(gender_value), x=stats["parent_edu"], q1=stats["q1"], median=stats["median"],
+                             q3=stats["q3"], lowerfence=stats["lowerfence"], upperfence=stats["upperfence"],
+                             mean=stats["mean"]))
+    fig.update_layout(boxmode="group", title="Average Score by Parental Education", template="plotly_white",
+                      xaxis_title="parent_edu", yaxis_title="average_score", legend_title_text="gender")
+    st.caption(box.caption())
 fig.update_layout(title_x=0.3)
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 # --- Correlation Heatmap ---
 st.subheader("🧠 Correlation Heatmap")
-corr_matrix = filtered_df.select_dtypes(include=np.number).corr()
+corr_matrix = cell.corr()
 z = np.round(corr_matrix.values, 2)
 x = list(corr_matrix.columns)
 y = list(corr_matrix.index)
-heatmap = ff.create_annotated_heatmap(z, x=x, y=y, annotation_text=z,
-                                      colorscale='RdBu', showscale=True, zmin=-1, zmax=1)
+# go.Heatmap with text labels instead of figure_factory, which costs ~1.4 s to import
+heatmap = go.Figure(go.Heatmap(z=z, x=x, y=y, text=z, texttemplate="%{text}",
+                               colorscale='RdBu', showscale=True, zmin=-1, zmax=1))
 heatmap.update_layout(title="Correlation Between Score Features", template="plotly_white")
-st.plotly_chart(heatmap, use_container_width=True)
+plotly_chart(heatmap, use_container_width=True)
 
 # --- Donut Chart ---
 st.subheader("🍩 Performance Donut Chart")
-perf_counts = filtered_df['performance'].value_counts().sort_index()
 fig = px.pie(values=perf_counts.values, names=perf_counts.index, hole=0.5,
              title="Performance Category Share", template="plotly_white",
              color_discrete_sequence=px.colors.qualitative.Set3)
 fig.update_layout(title_x=0.3)
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 # --- Sunburst Chart ---
 st.subheader("🌞 Sunburst: Gender > Parent Edu > Performance")
 fig = px.sunburst(filtered_df, path=["gender", "parent_edu", "performance"], color="performance",
                   template="plotly_white", title="Performance by Gender and Parental Education")
 fig.update_layout(title_x=0.3)
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 # --- Parallel Coordinates ---
 st.subheader("🔗 Parallel Coordinates")
-parallel_df = filtered_df.copy()
+parallel_data = stratified_sample(filtered_df, "performance", MAX_PARALLEL_LINES)
+parallel_df = parallel_data.frame.copy()
 performance_map = {'Poor': 0, 'Average': 1, 'Good': 2, 'Very Good': 3, 'Excellent': 4}
 parallel_df['performance_code'] = parallel_df['performance'].map(performance_map)
 fig = px.parallel_coordinates(parallel_df, color="performance_code",
@@ -122,17 +150,22 @@ fig = px.parallel_coordinates(parallel_df, color="performance_code",
                               labels={"performance_code": "Performance Level"},
                               title="Score Profiles by Performance", template="plotly_white")
 fig.update_layout(title_x=0.3)
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
+if parallel_data.aggregated:
+    st.caption(parallel_data.caption())
 
 # --- Scatter Matrix ---
 st.subheader("📈 Score Interactions (Scatter Matrix)")
-fig = px.scatter_matrix(filtered_df,
+scatter_data = stratified_sample(filtered_df, "performance", MAX_SCATTER_POINTS)
+fig = px.scatter_matrix(scatter_data.frame,
                         dimensions=["math_score", "reading_score", "writing_score", "average_score"],
                         color="performance",
                         title="Pairwise Score Relationships",
                         template="plotly_white")
 fig.update_layout(title_x=0.3)
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
+if scatter_data.aggregated:
+    st.caption(scatter_data.caption())
 
 # --- Download Filtered Dataset ---
 st.subheader("📥 Download Filtered Data")
@@ -146,3 +179,5 @@ st.download_button(
 
 st.markdown("---")
 st.caption("🚀 Built for UTA Master's Data Science Project · © 2025")
+
+end_page()
@@ -1,9 +1,16 @@
 import streamlit as st
 import pandas as pd
-from utils.loader import load_model, load_data
+from utils.loader import load_model, load_data, data_version
+from utils.encoder import get_encoder
+from utils.tree_kernel import _compiled
+from utils.model_registry import load_artifact
+from utils.microbatch import get_proba_batcher
+from utils.similarity import get_similarity_index
+from utils.telemetry import start_page, end_page
 
 # Page config
 st.set_page_config(page_title="Performance Predictor", page_icon="🧠", layout="wide")
+start_page(__file__)
 st.markdown("""
     <h1 style='text-align: center; color: #4A4A4A;'>🧠 Predict Student Performance</h1>
     <hr style='margin-top: 0px;'>
@@ -12,6 +19,12 @@ st.markdown("""
 # Load model and data
 model, le = load_model()
 df = load_data()
+encoder = get_encoder(tuple(model.feature_names_in_))
+# One registry lookup, so the compiled tree and the batcher key share a model version
+artifact = load_artifact("decision_tree_model.pkl")
+compiled = _compiled(artifact.sha256, artifact.model)
+# Concurrent sessions' predictions are coalesced into one vectorized call
+predictor = get_proba_batcher(f"decision_tree_model.pkl:{artifact.sha256}", compiled)
 
 # Sidebar styling
 st.sidebar.header("📥 Input Student Details")
@@ -36,25 +49,32 @@ with st.form("predict_form"):
 
 # Handle prediction
 if submit:
-    input_df = pd.DataFrame({
-        "gender": [gender],
-        "race/ethnicity": [race],
-        "parent_edu": [parent],
-        "lunch": [lunch],
-        "prep_course": [prep],
-        "math_score": [math],
-        "reading_score": [reading],
-        "writing_score": [writing],
-    })
+    record = {
+        "gender": gender,
+        "race/ethnicity": race,
+        "parent_edu": parent,
+        "lunch": lunch,
+        "prep_course": prep,
+        "math_score": math,
+        "reading_score": reading,
+        "writing_score": writing,
+    }
 
     # Preprocessing
-    input_encoded = pd.get_dummies(input_df)
-    input_encoded = input_encoded.reindex(columns=model.feature_names_in_, fill_value=0)
+    input_encoded = encoder.transform_record(record)
 
     # Prediction
-    pred = model.predict(input_encoded)[0]
+    pred = compiled.classes_[predictor(input_encoded).argmax()]
     label = le.inverse_transform([pred])[0]
 
     st.success(f"🎯 Predicted Performance Category: **{label}**")
+
+    # Most similar past students: same background, closest scores
+    st.markdown("#### 👥 Similar Past Students")
+    similar = get_similarity_index(df, data_version()).neighbors(df, record, k=5)
+    st.dataframe(similar[["distance", "math_score", "reading_score", "writing_score",
+                          "average_score", "performance"]], use_container_width=True)
     st.markdown("---")
     st.caption("🔍 Prediction powered by Decision Tree Classifier")
+
+end_page()
@@ -1,15 +1,21 @@
 import streamlit as st
 import pandas as pd
-import joblib
 import os
-from utils.loader import load_data
-from utils.shap_helper import load_shap_explainer, get_shap_values
-from utils.pdf_generator import generate_risk_report
-import shap
+from utils.loader import load_data, data_version
+from utils.model_registry import load_artifact
+from utils.encoder import get_encoder
+from utils.risk_surface import get_risk_surface
+from utils.shap_helper import get_explainer_registry
+from utils.microbatch import get_explain_batcher
+from utils.pdf_generator import render_risk_report
+from utils.similarity import get_similarity_index
 import plotly.express as px
+import plotly.graph_objects as go
+from utils.telemetry import start_page, end_page, plotly_chart
 
 # Page layout
 st.set_page_config(page_title="At-Risk Analyzer", page_icon="⚠️", layout="wide")
+start_page(__file__)
 st.markdown("""
     <h1 style='text-align: center;'>⚠️ At-Risk Student Predictor</h1><hr>
 """, unsafe_allow_html=True)
@@ -17,8 +23,11 @@ st.markdown("""
 # Load model and dataset
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 model_path = os.path.join(BASE_DIR, "models", "at_risk_model.pkl")
-model = joblib.load(model_path)
+artifact = load_artifact(model_path)
+model = artifact.model
 df = load_data()
+encoder = get_encoder(tuple(model.feature_names_in_))
+risk_surface = get_risk_surface(model_path, artifact.sha256, model)
 
 # Sidebar Inputs
 st.sidebar.header("🔍 Enter Student Information")
@@ -36,7 +45,7 @@ reading = col2.slider("Reading Score", 0, 100, 50)
 writing = col3.slider("Writing Score", 0, 100, 50)
 
 # Prepare input
-input_df = pd.DataFrame([{
+record = {
     "gender": gender,
     "race/ethnicity": race,
     "parent_edu": parent,
@@ -45,23 +54,52 @@ input_df = pd.DataFrame([{
     "math_score": math,
     "reading_score": reading,
     "writing_score": writing
-}])
-input_encoded = pd.get_dummies(input_df)
-input_encoded = input_encoded.reindex(columns=model.feature_names_in_, fill_value=0)
-
-# Predict + Confidence
-proba = model.predict_proba(input_encoded)[0]
-pred = proba.argmax()
-confidence = proba[pred] * 100
+}
+input_df = pd.DataFrame([record])
+input_encoded = encoder.encode_record(record)
+
+# Predict + Confidence (lookup into the cached score-grid risk surface)
+risk_proba = risk_surface.proba(record)
+pred = int(risk_proba > 0.5)
+confidence = (risk_proba if pred == 1 else 1 - risk_proba) * 100
 risk_label = "🚨 At Risk" if pred == 1 else "✅ Not At Risk"
 st.success(f"**Predicted Status:** {risk_label} | 🧠 Confidence: {confidence:.2f}%")
 
+# Minimum improvement needed to leave the at-risk zone
+if pred == 1:
+    exit_plan = risk_surface.min_change_to_exit(record)
+    if exit_plan is None:
+        st.warning("No combination of higher scores brings this student out of the at-risk zone.")
+    else:
+        gains = ", ".join(f"+{v} {k.split('_')[0]}" for k, v in exit_plan["increase"].items() if v)
+        st.info(f"🎯 Smallest score gain to exit at-risk: **{exit_plan['total']} points** ({gains})")
+
+# Live risk contour over math × reading at the current writing score
+with st.expander("🗺️ Risk Surface (Math × Reading)"):
+    plane = risk_surface.slice_2d(record, fixed="writing_score")
+    contour = go.Figure(go.Contour(z=plane.values, x=plane.columns, y=plane.index,
+                                   colorscale="RdYlGn_r", zmin=0, zmax=1,
+                                   colorbar=dict(title="P(at risk)")))
+    contour.add_trace(go.Scatter(x=[reading], y=[math], mode="markers",
+                                 marker=dict(size=12, color="black", symbol="x"), name="Student"))
+    contour.update_layout(xaxis_title="Reading Score", yaxis_title="Math Score",
+                          title=f"At-Risk Probability at Writing = {writing}")
+    plotly_chart(contour, use_container_width=True)
+
+# How the most similar past students turned out
+with st.expander("👥 Similar Past Students"):
+    similar = get_similarity_index(df, data_version()).neighbors(df, record, k=10)
+    similar["At Risk"] = similar["average_score"] < 60
+    st.caption(f"{similar['At Risk'].mean():.0%} of the {len(similar)} most similar students were at risk")
+    st.dataframe(similar[["distance", "math_score", "reading_score", "writing_score",
+                          "average_score", "At Risk"]], use_container_width=True)
 
 
 # SHAP
 st.markdown("### 📌 Feature Impact (SHAP Explanation)")
-explainer = load_shap_explainer(model_path, input_encoded)
-shap_values = get_shap_values(explainer, input_encoded)
+shap_values, info = get_explain_batcher(model_path).call_with_info(input_encoded)
+st.caption(f"SHAP path: {get_explainer_registry().explainer(model_path).path} · "
+           f"batch of {info['batch_size']} · {info['run_ms']:.1f} ms")
 shap_df = pd.DataFrame({
     "Feature": input_encoded.columns,
     "SHAP Impact": shap_values.values[0]
@@ -79,7 +117,7 @@ fig = px.bar(shap_df.head(10), x="SHAP Impact", y="Feature", orientation='h',
              color="SHAP Impact", color_continuous_scale="RdBu",
              title="Top 10 Feature Contributions")
 fig.update_layout(yaxis=dict(autorange="reversed"))
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
 
 with st.expander("🔍 Show SHAP Table"):
     st.dataframe(shap_df)
@@ -105,7 +143,8 @@ else:
 
 # PDF Download
 if st.button("📄 Download Risk Report as PDF"):
-    report_path = generate_risk_report(input_df, risk_label, shap_df.head(10))
-    with open(report_path, "rb") as f:
-        st.download_button(label="⬇️ Click to Download PDF", data=f,
-                           file_name="student_risk_report.pdf", mime="application/pdf")
+    report = render_risk_report(input_df, risk_label, shap_df.head(10))
+    st.download_button(label="⬇️ Click to Download PDF", data=report,
+                       file_name="student_risk_report.pdf", mime="application/pdf")
+
+end_page()
@@ -1,22 +1,28 @@
 import streamlit as st
 import pandas as pd
-import joblib
 import os
 from utils.loader import load_data
-from utils.shap_helper import load_shap_explainer, get_shap_values
-import shap
+from utils.model_registry import load_artifact
+from utils.encoder import get_encoder
+from utils.shap_helper import get_explainer_registry
+from utils.microbatch import get_proba_batcher, get_explain_batcher
+from utils.lazy import shap, plt
+from utils.telemetry import start_page, end_page, timer
 
 # Page layout
 st.set_page_config(page_title="At-Risk Analyzer", page_icon="⚠️", layout="wide")
+start_page(__file__)
 st.markdown("<h1 style='text-align: center;'>⚠️ At-Risk Student Predictor</h1><hr>", unsafe_allow_html=True)
 
 # Dynamically resolve absolute model path
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 model_path = os.path.join(BASE_DIR, "models", "at_risk_model.pkl")
-model = joblib.load(model_path)
+artifact = load_artifact(model_path)
+model = artifact.model
 
 # Load dataset
 df = load_data()
+encoder = get_encoder(tuple(model.feature_names_in_))
 
 # Sidebar Inputs
 st.sidebar.header("🔍 Enter Student Information")
@@ -34,8 +40,8 @@ math = col1.slider("Math Score", 0, 100, 50)
 reading = col2.slider("Reading Score", 0, 100, 50)
 writing = col3.slider("Writing Score", 0, 100, 50)
 
-# Create input DataFrame
-input_df = pd.DataFrame([{
+# Student record
+record = {
     "gender": gender,
     "race/ethnicity": race,
     "parent_edu": parent,
@@ -44,30 +50,28 @@ input_df = pd.DataFrame([{
     "math_score": math,
     "reading_score": reading,
     "writing_score": writing
-}])
+}
 
 # Encode input
-input_encoded = pd.get_dummies(input_df)
-input_encoded = input_encoded.reindex(columns=model.feature_names_in_, fill_value=0)
+input_encoded = encoder.encode_record(record)
 
 # Prediction
-pred = model.predict(input_encoded)[0]
+predictor = get_proba_batcher(f"{model_path}:{artifact.sha256}", model, tuple(model.feature_names_in_))
+pred = model.classes_[predictor(input_encoded).argmax()]
 risk_label = "🚨 At Risk" if pred == 1 else "✅ Not At Risk"
 st.success(f"**Predicted Status:** {risk_label}**")
 
-# SHAP Explanation
-# SHAP Explanation
-import matplotlib.pyplot as plt
-
 # SHAP Explanation
 st.markdown("### 📌 Feature Impact (SHAP Explanation)")
 
-explainer = load_shap_explainer(model_path, input_encoded)
-shap_values = get_shap_values(explainer, input_encoded)
+shap_values, info = get_explain_batcher(model_path).call_with_info(input_encoded)
+st.caption(f"SHAP path: {get_explainer_registry().explainer(model_path).path} · "
+           f"batch of {info['batch_size']} · {info['run_ms']:.1f} ms")
 
 # Plot SHAP bar chart for top features
-fig, ax = plt.subplots(figsize=(10, 4))
-shap.plots.bar(shap_values[0], max_display=10, show=False)
-st.pyplot(fig)
-
+with timer("chart.render"):
+    fig, ax = plt.subplots(figsize=(10, 4))
+    shap.plots.bar(shap_values[0], max_display=10, show=False)
+    st.pyplot(fig)
 
+end_page()
@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
+import plotly.graph_objects as go
 from utils.loader import load_data
+from utils.plot_data import stratified_sample, binned_2d, MAX_3D_POINTS
+from utils.clustering import get_clusterer, fit_clusterer, CLUSTER_PATH
+from utils.telemetry import start_page, end_page, plotly_chart
 
 st.set_page_config(page_title="Student Clustering", page_icon="🧩", layout="wide")
+start_page(__file__)
 st.markdown("""
 <h1 style='text-align: center;'>🧩 Student Persona Clustering</h1><hr>
 """, unsafe_allow_html=True)
@@ -13,37 +16,51 @@ st.markdown("""
 # Load data
 df = load_data()
 
-# Prepare numeric features for clustering
-X = df[["math_score", "reading_score", "writing_score"]]
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+# Persisted clustering model (fit once, reused across reruns and sessions)
+st.sidebar.header("⚙️ Clustering Model")
+fit_mode = st.sidebar.selectbox("Fitting mode", ["auto", "full", "minibatch"],
+                                help="Mini-batch fits incrementally in chunks for large rosters.")
+if st.sidebar.button("🔁 Refit Clusters"):
+    fit_clusterer(df, mode=fit_mode).save(CLUSTER_PATH)
+    get_clusterer.clear()
+clusterer = get_clusterer()
 
-# KMeans clustering
-kmeans = KMeans(n_clusters=4, random_state=42, n_init=10)
-df['cluster'] = kmeans.fit_predict(X_scaled)
+# Assign students to the nearest persisted centroid
+df['cluster'] = clusterer.assign(df)
 
-# Label personas manually (optional refinement)
-persona_map = {
-    0: "📘 Struggling",
-    1: "📗 Consistent Performer",
-    2: "📕 High Achiever",
-    3: "📙 Improving"
-}
-df['persona'] = df['cluster'].map(persona_map)
+# Personas follow centroid score order, so labels are stable across fits
+df['persona'] = clusterer.persona(df['cluster'])
 
 # Visualization
 st.markdown("### 🎯 Student Clusters by Subject Scores")
+plot_data = stratified_sample(df, "persona", MAX_3D_POINTS)
 fig = px.scatter_3d(
-    df, x="math_score", y="reading_score", z="writing_score",
+    plot_data.frame, x="math_score", y="reading_score", z="writing_score",
     color="persona", symbol="gender",
     title="3D Cluster of Student Personas",
     template="plotly_white"
 )
-st.plotly_chart(fig, use_container_width=True)
+plotly_chart(fig, use_container_width=True)
+
+if plot_data.aggregated:
+    st.caption(plot_data.caption())
+    # Full-population density so the sampled-out students are still visible
+    density = binned_2d(df, "math_score", "reading_score")
+    fig = go.Figure(go.Heatmap(z=density.values, x=density.columns, y=density.index, colorscale="Blues"))
+    fig.update_layout(title="Math vs Reading Density (all students)", xaxis_title="Math Score",
+                      yaxis_title="Reading Score", template="plotly_white")
+    plotly_chart(fig, use_container_width=True)
 
 # Show cluster distribution
 st.markdown("### 📊 Persona Distribution")
 st.dataframe(df['persona'].value_counts().reset_index().rename(columns={"index": "Persona", "persona": "Count"}))
 
+# Centroids
+st.markdown("### 📍 Persona Centroids")
+st.dataframe(clusterer.centroid_table())
+st.caption(f"Fitted on {clusterer.n_samples_:,} students")
+
 st.markdown("---")
 st.caption("UTA MSDS 2025 · KMeans Student Clustering Insight")
+
+end_page()
@@ -1,37 +1,122 @@
 import streamlit as st
 import pandas as pd
 import os
+import tempfile
+from utils.loader import PROJECT_ROOT, load_model, load_risk_model
+from utils.encoder import get_encoder
+from utils.batch_scoring import score_chunks, risk_report_jobs
+from utils.pdf_generator import bulk_risk_reports
+from utils.shap_helper import explain
+from utils.tree_kernel import load_compiled_model
+from utils.ingest import SchemaError, ingest_upload, iter_validated, new_upload_dir, read_validated
+from utils.telemetry import start_page, end_page
 
 st.set_page_config(page_title="Upload Student Data", page_icon="📥", layout="wide")
+start_page(__file__)
 st.markdown("""
 <h1 style='text-align: center;'>📥 Upload Student Data (Excel / Google Forms)</h1><hr>
 """, unsafe_allow_html=True)
 
+RISK_MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "at_risk_model.pkl")
+
 # Upload file
 uploaded_file = st.file_uploader("Upload .xlsx or .csv file exported from Excel/Google Form", type=["xlsx", "csv"])
 
 if uploaded_file:
+    result = None
     try:
-        if uploaded_file.name.endswith(".csv"):
-            df = pd.read_csv(uploaded_file)
-        else:
-            df = pd.read_excel(uploaded_file)
+        # Validated once per uploaded file, into this session's own directory; reruns reuse it
+        if st.session_state.get("ingested_upload", (None,))[0] != uploaded_file.file_id:
+            if "upload_dir" not in st.session_state:
+                st.session_state["upload_dir"] = new_upload_dir()
+            progress_text = st.empty()
+            st.session_state.pop("scored_upload", None)
+            st.session_state["ingested_upload"] = (uploaded_file.file_id, ingest_upload(
+                uploaded_file, uploaded_file.name, st.session_state["upload_dir"],
+                progress=lambda rows: progress_text.text(f"Validated {rows:,} rows...")))
+            progress_text.empty()
+        result = st.session_state["ingested_upload"][1]
 
         st.success(f"File '{uploaded_file.name}' uploaded successfully!")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Rows Read", f"{result['rows']:,}")
+        col2.metric("Valid Rows", f"{result['valid']:,}")
+        col3.metric("Rejected Rows", f"{result['rejected']:,}")
+
         st.markdown("### 🧾 Preview of Uploaded Data")
-        st.dataframe(df.head())
+        st.dataframe(result["preview"])
+        st.info(f"✅ Saved to: {result['valid_path']}")
 
-        # Optional save
-        os.makedirs("data/uploads", exist_ok=True)
-        save_path = os.path.join("data/uploads", uploaded_file.name)
-        df.to_csv(save_path, index=False)
-        st.info(f"✅ Saved to: {save_path}")
+        if result["rejected_path"]:
+            st.warning(f"⚠️ {result['rejected']:,} rows failed validation and were set aside.")
+            with open(result["rejected_path"], "rb") as f:
+                st.download_button("⬇️ Download Rejected Rows", f, os.path.basename(result["rejected_path"]), "text/csv")
 
+    except SchemaError as e:
+        st.error(f"❌ File does not match the student schema: {e}")
     except Exception as e:
         st.error(f"❌ Failed to process file: {e}")
 
+    # --- Batch Scoring (streamed from the validated file, one chunk in memory at a time) ---
+    if result is not None and result["valid"]:
+        st.markdown("### ⚡ Batch Scoring")
+        chunk_size = st.number_input("Rows per chunk", min_value=1_000, max_value=200_000, value=10_000, step=1_000)
+
+        if st.button("🚀 Score All Students"):
+            perf_model, le = load_model()
+            risk_model = load_risk_model()
+            perf_encoder = get_encoder(tuple(perf_model.feature_names_in_))
+            risk_encoder = get_encoder(tuple(risk_model.feature_names_in_))
+
+            stem = os.path.splitext(result["valid_path"])[0]
+            progress_bar = st.progress(0.0, text="Scoring...")
+            stats = score_chunks(
+                iter_validated(result["valid_path"], int(chunk_size)), result["valid"],
+                load_compiled_model(), le, risk_model, perf_encoder, risk_encoder,
+                f"{stem}_scored.csv", f"{stem}_at_risk.csv",
+                progress=lambda done, total: progress_bar.progress(done / total, text=f"Scored {done:,} / {total:,} rows"),
+            )
+            progress_bar.empty()
+            st.session_state["scored_upload"] = (uploaded_file.file_id, stats)
+
+        if st.session_state.get("scored_upload", (None,))[0] == uploaded_file.file_id:
+            _, stats = st.session_state["scored_upload"]
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Rows Scored", f"{stats['rows']:,}")
+            col2.metric("Throughput", f"{stats['rows_per_sec']:,.0f} rows/s")
+            col3.metric("At-Risk Students", f"{stats['at_risk']:,}")
+
+            st.dataframe(stats["preview"])
+            with open(stats["scored_path"], "rb") as f:
+                st.download_button("⬇️ Download Scored CSV", f,
+                                   f"scored_{os.path.splitext(uploaded_file.name)[0]}.csv", "text/csv")
+
+            # --- Bulk PDF reports for every at-risk student ---
+            if stats["at_risk"] and st.button(f"📄 Generate PDF Reports for {stats['at_risk']:,} At-Risk Students"):
+                at_risk = read_validated(stats["at_risk_path"]).set_index("row")
+                risk_encoder = get_encoder(tuple(load_risk_model().feature_names_in_))
+                X_risk = risk_encoder.encode_frame(at_risk)
+                shap_values = explain(RISK_MODEL_PATH, X_risk).values
+
+                progress_bar = st.progress(0.0, text="Rendering reports...")
+                # The ZIP goes to disk, not memory; the previous run's file is removed
+                with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as zip_file:
+                    written = bulk_risk_reports(
+                        risk_report_jobs(at_risk, shap_values, X_risk.columns), zip_file,
+                        progress=lambda done: progress_bar.progress(done / len(at_risk), text=f"Rendered {done:,} / {len(at_risk):,} reports"),
+                    )
+                if os.path.exists(st.session_state.get("report_zip", "")):
+                    os.remove(st.session_state["report_zip"])
+                st.session_state["report_zip"] = zip_file.name
+                progress_bar.empty()
+                with open(zip_file.name, "rb") as f:
+                    st.download_button(f"⬇️ Download {written:,} Reports (ZIP)", f,
+                                       f"risk_reports_{os.path.splitext(uploaded_file.name)[0]}.zip", "application/zip")
+
 else:
     st.info("Upload a spreadsheet to get started.")
 
 st.markdown("---")
 st.caption("UTA MSDS 2025 · Google Form/Excel Data Integration")
+
+end_page()
@@ -1,49 +1,74 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils.loader import load_data
+from utils.loader import load_data, data_version
+from utils.group_risk import GROUP_COLS, at_risk_predictions, get_group_risk_cube
+from utils.telemetry import start_page, end_page, plotly_chart
 
 # Page setup
 st.set_page_config(page_title="Teacher Insights", page_icon="📚", layout="wide")
+start_page(__file__)
 st.title("📚 Teacher & Admin Insights")
 
 # Load data
 df = load_data()
+version = data_version()
 
-# Patch: if 'at_risk' missing, simulate it
-if 'at_risk' not in df.columns:
-    import numpy as np
-    st.warning("⚠️ 'at_risk' column not found — using random placeholder values for demo.")
-    df['at_risk'] = np.random.choice([0, 1], size=len(df), p=[0.7, 0.3])
+# At-risk flags come from the at-risk model, cached per dataset version and model hash
+if 'at_risk' in df.columns:
+    at_risk = df['at_risk'].to_numpy()
+else:
+    at_risk = at_risk_predictions(df, version=version)
+    st.caption(f"At-risk flags predicted by the at-risk model · dataset version `{version}`")
+
+cube = get_group_risk_cube(df, at_risk, version=version)
 
 # Key metrics
 st.subheader("📈 Overview")
+n_risk = int(at_risk.sum())
 col1, col2, col3 = st.columns(3)
 col1.metric("Total Students", len(df))
 col2.metric("Avg Score", f"{df['average_score'].mean():.2f}")
-col3.metric("At-Risk Students", int(df['at_risk'].sum()))
+col3.metric("At-Risk Students", n_risk)
 
 # Risk group distribution
 st.subheader("🚨 Risk Distribution")
-fig = px.pie(df, names="at_risk", title="At-Risk vs Not At-Risk",
-             color_discrete_sequence=px.colors.qualitative.Set1,
-             labels={0: "Not At Risk", 1: "At Risk"})
-st.plotly_chart(fig, use_container_width=True)
+fig = px.pie(names=["Not At Risk", "At Risk"], values=[len(df) - n_risk, n_risk],
+             title="At-Risk vs Not At-Risk",
+             color_discrete_sequence=px.colors.qualitative.Set1)
+plotly_chart(fig, use_container_width=True)
 
 # Grouped stats
 st.subheader("📊 Grouped Breakdown")
-selected_feature = st.selectbox("Group by:", ["gender", "prep_course", "race/ethnicity", "parent_edu", "lunch"])
-grouped = df.groupby(selected_feature)["at_risk"].agg(["count", "sum", "mean"]).reset_index()
-grouped.columns = [selected_feature, "Total", "At Risk Count", "At Risk Rate"]
+selected_features = st.multiselect("Group by:", GROUP_COLS, default=["gender"])
+
+# Drilldown: pin any of the other columns to a single value
+filters = {}
+with st.expander("🔎 Drill down"):
+    drill_cols = [c for c in GROUP_COLS if c not in selected_features]
+    for col, box in zip(drill_cols, st.columns(max(len(drill_cols), 1))):
+        value = box.selectbox(col, ["All"] + cube.categories[col], key=f"drill_{col}")
+        if value != "All":
+            filters[col] = value
+min_count = st.slider("Hide groups smaller than", 1, 50, 1)
 
-st.dataframe(grouped)
+grouped = cube.breakdown(selected_features, filters=filters, min_count=min_count)
+st.dataframe(grouped.style.format({"At Risk Rate": "{:.1%}", "CI Low": "{:.1%}", "CI High": "{:.1%}"}))
+st.caption("CI Low / CI High: 95% Wilson score interval for the at-risk rate.")
 
 # Visualize risk by group
-fig = px.bar(grouped, x=selected_feature, y="At Risk Rate", color="At Risk Rate",
-             title=f"At-Risk Rate by {selected_feature.title()}",
-             color_continuous_scale="oranges")
-fig.update_layout(yaxis_tickformat=".0%")
-st.plotly_chart(fig, use_container_width=True)
+if selected_features and len(grouped):
+    label = grouped[selected_features].astype(str).agg(" · ".join, axis=1)
+    plot_df = grouped.assign(Group=label,
+                             err_plus=grouped["CI High"] - grouped["At Risk Rate"],
+                             err_minus=grouped["At Risk Rate"] - grouped["CI Low"])
+    fig = px.bar(plot_df, x="Group", y="At Risk Rate", color="At Risk Rate",
+                 error_y="err_plus", error_y_minus="err_minus",
+                 hover_data=["Total", "At Risk Count"],
+                 title=f"At-Risk Rate by {' × '.join(c.title() for c in selected_features)}",
+                 color_continuous_scale="oranges")
+    fig.update_layout(yaxis_tickformat=".0%", xaxis_title=None)
+    plotly_chart(fig, use_container_width=True)
 
 # Download report
 st.subheader("📥 Download Summary Table")
@@ -52,3 +77,5 @@ st.download_button("Download CSV Report", csv, "risk_summary_by_group.csv", "tex
 
 st.markdown("---")
 st.caption("📘 Group 7 · UTA Master's Project · 2025")
+
+end_page()
@@ -0,0 +1,157 @@
+# startup_profile.py
+"""Import-time profile of every dashboard page, for tracking cold start across releases.
+
+    python startup_profile.py                          # table of import cost per page
+    python startup_profile.py --json startup.json      # also save the report
+    python startup_profile.py --baseline startup.json  # compare against a saved report
+    python startup_profile.py --render                 # also time each page's first full run
+
+Each page is measured in a fresh interpreter with streamlit already imported,
+as it is in the running server. Only the page's top-level imports are
+executed, under ``python -X importtime``. The report lists the wall time of
+those imports and the libraries that account for it (self time summed per
+top-level package). Anything behind ``utils.lazy`` or a function-local import
+is not counted until a code path actually needs it; ``--render`` shows that
+cost as part of the first run.
+"""
+
+import argparse
+import ast
+import datetime
+import glob
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+PAGES = sorted(glob.glob(os.path.join(APP_DIR, "pages", "*.py")),
+               key=lambda p: (int(re.match(r"\d+", os.path.basename(p)).group()), p))
+MARKER = "--page-imports--"
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+_IMPORT_SCRIPT = """
+import sys, time
+sys.path.insert(0, {app_dir!r})
+import streamlit, streamlit.runtime.scriptrunner
+sys.stderr.write({marker!r} + "\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+exec(compile({source!r}, {page!r}, "exec"), {{"__name__": "__page__"}})
+print(time.perf_counter() - start)
+"""
+
+_RENDER_SCRIPT = """
+import sys, time
+sys.path.insert(0, {app_dir!r})
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file({page!r}, default_timeout=600).run()
+print(time.perf_counter() - start, len(at.exception))
+"""
+
+
+def page_imports(path: str) -> str:
+    """Source of the import statements a page runs at top level, in order."""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source)
+    nodes = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.get_source_segment(source, node) for node in nodes)
+
+
+def parse_importtime(stderr: str, top_n: int = 8) -> dict:
+    """Self time per top-level package (ms) for modules imported after ``MARKER``."""
+    lines = stderr.split(MARKER, 1)[-1].splitlines()
+    by_package = {}
+    modules = 0
+    for line in lines:
+        match = IMPORTTIME.match(line)
+        if match is None:
+            continue
+        self_us, _, _, name = match.groups()
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + int(self_us) / 1e3
+        modules += 1
+    top = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
+    return {"modules": modules, "packages": {name: round(ms, 1) for name, ms in top}}
+
+
+def profile_page(path: str, repeats: int = 3) -> dict:
+    page = os.path.relpath(path, APP_DIR)
+    script = _IMPORT_SCRIPT.format(app_dir=APP_DIR, marker=MARKER, source=page_imports(path), page=page)
+    best = None
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", script], cwd=APP_DIR,
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            return {"page": page, "error": proc.stderr.strip().splitlines()[-1]}
+        seconds = float(proc.stdout.strip().splitlines()[-1])
+        if best is None or seconds < best[0]:
+            best = (seconds, proc.stderr)
+    # -X importtime adds its own overhead, so the wall time is from the fastest run
+    return {"page": page, "import_ms": round(best[0] * 1e3, 1), **parse_importtime(best[1])}
+
+
+def render_page(path: str) -> dict:
+    page = os.path.relpath(path, APP_DIR)
+    proc = subprocess.run([sys.executable, "-c", _RENDER_SCRIPT.format(app_dir=APP_DIR, page=page)],
+                          cwd=APP_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"render_error": proc.stderr.strip().splitlines()[-1]}
+    seconds, exceptions = proc.stdout.strip().splitlines()[-1].split()
+    return {"first_run_ms": round(float(seconds) * 1e3, 1), "exceptions": int(exceptions)}
+
+
+def run(pages=None, repeats: int = 3, render: bool = False) -> dict:
+    results = []
+    for path in pages or PAGES:
+        result = profile_page(path, repeats)
+        if render:
+            result.update(render_page(path))
+        results.append(result)
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pages": results,
+    }
+
+
+def print_report(report: dict, baseline: dict = None):
+    before = {p["page"]: p for p in (baseline or {}).get("pages", [])}
+    for result in report["pages"]:
+        if "error" in result:
+            print(f"{result['page']:<36} ERROR  {result['error']}")
+            continue
+        line = f"{result['page']:<36} {result['import_ms']:>8.0f} ms"
+        old = before.get(result["page"], {}).get("import_ms")
+        if old is not None:
+            line += f" ({result['import_ms'] - old:+.0f})"
+        if "first_run_ms" in result:
+            line += f"  first run {result['first_run_ms']:>6.0f} ms"
+        top = ", ".join(f"{name} {ms:.0f}" for name, ms in list(result["packages"].items())[:4])
+        print(f"{line}  [{top}]")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile page import times")
+    parser.add_argument("pages", nargs="*", help="page files (default: all pages)")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per page; the fastest is kept")
+    parser.add_argument("--render", action="store_true", help="also time each page's first full run")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="earlier report to compare import times against")
+    args = parser.parse_args()
+
+    report = run([os.path.abspath(p) for p in args.pages] or None, args.repeats, args.render)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.term_store import TermStore
+
+
+def history(ids):
+    return pd.DataFrame({
+        "student_id": np.repeat(ids, 2),
+        "term": ["Term 1", "Term 2"] * len(ids),
+        "math_score": np.arange(2 * len(ids)) + 50,
+        "reading_score": 60,
+        "writing_score": 70,
+        "gender": np.repeat(["female", "male"] * (len(ids) // 2) + ["female"] * (len(ids) % 2), 2),
+    })
+
+
+@pytest.mark.parametrize("ids", [["S2", "S10", "S1"], [3, 1, 2]])
+def test_save_load_round_trip(tmp_path, ids):
+    path = str(tmp_path / "terms.npz")
+    store = TermStore.from_long(history(ids))
+    store.save(path)
+    loaded = TermStore.load(path)
+
+    np.testing.assert_array_equal(loaded.ids, store.ids)
+    np.testing.assert_array_equal(loaded.scores, store.scores)
+    assert loaded.terms == ["Term 1", "Term 2"]
+    assert list(loaded.attributes["gender"]) == list(store.attributes["gender"])
+    # Page text input is always a string
+    for sid in map(str, ids):
+        pd.testing.assert_frame_equal(loaded.history(sid), store.history(sid))
+
+
+def test_text_ids_are_not_truncated():
+    store = TermStore.from_long(history(["S1", "S2"]))
+    np.testing.assert_array_equal(store.locate(["S1", "S12", "S2"]), [0, -1, 1])
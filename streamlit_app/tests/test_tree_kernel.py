@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+from utils.encoder import FeatureEncoder
+from utils.loader import load_student_frame
+from utils.model_registry import load_artifact
+from utils.synthetic import synthesize_students
+from utils.tree_kernel import CompiledTree
+
+
+@pytest.fixture(scope="module")
+def roster():
+    # Real rows plus unseen synthetic ones, so every branch sees both sides
+    df = load_student_frame()
+    return pd.concat([df, synthesize_students(df, 20_000, seed=7)], ignore_index=True)
+
+
+def fitted_tree(roster, max_depth):
+    shipped = load_artifact("decision_tree_model.pkl").model
+    encoder = FeatureEncoder.fit(roster, shipped.feature_names_in_)
+    X = encoder.encode_frame(roster)
+    model = DecisionTreeClassifier(max_depth=max_depth, random_state=0).fit(X, roster["performance"].astype(str))
+    return model, encoder, X
+
+
+def test_shipped_model_parity(roster):
+    model = load_artifact("decision_tree_model.pkl").model
+    encoder = FeatureEncoder.fit(roster, model.feature_names_in_)
+    X = encoder.encode_frame(roster)
+    compiled = CompiledTree(model, encoder)
+
+    expected = model.predict_proba(X)
+    np.testing.assert_allclose(compiled.predict_proba(X), expected)
+    np.testing.assert_allclose(compiled.predict_proba_raw(roster), expected)
+    np.testing.assert_array_equal(compiled.predict_raw(roster), model.predict(X))
+
+
+@pytest.mark.parametrize("max_depth", [1, 4, None])
+def test_fitted_tree_parity(roster, max_depth):
+    model, encoder, X = fitted_tree(roster, max_depth)
+    compiled = CompiledTree(model, encoder)
+
+    for rows in (slice(0, 1), slice(0, 100), slice(None)):
+        expected = model.predict_proba(X.iloc[rows])
+        np.testing.assert_allclose(compiled.predict_proba(X.iloc[rows].to_numpy()), expected)
+        np.testing.assert_allclose(compiled.predict_proba_raw(roster.iloc[rows]), expected)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
@@ -0,0 +1,113 @@
+# utils/batch_scoring.py
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from .encoder import FeatureEncoder
+from .telemetry import timed
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+def _buffers(perf_encoder: FeatureEncoder, risk_encoder: FeatureEncoder, rows: int):
+    # Both shipped models share a feature layout; encode once per chunk when they do
+    perf_buf = np.empty((rows, perf_encoder.n_features))
+    shared = perf_encoder.feature_names == risk_encoder.feature_names
+    return perf_buf, perf_buf if shared else np.empty((rows, risk_encoder.n_features))
+
+
+def _predict_chunk(chunk, perf_model, risk_model, perf_encoder, risk_encoder, buffers):
+    perf_buf, risk_buf = buffers
+    X_perf = perf_encoder.to_frame(perf_encoder.transform(chunk, out=perf_buf))
+    X_risk = X_perf if risk_buf is perf_buf else risk_encoder.to_frame(risk_encoder.transform(chunk, out=risk_buf))
+    return perf_model.predict(X_perf), risk_model.predict_proba(X_risk)[:, 1]
+
+
+def _label(scored: pd.DataFrame, perf_pred, risk_proba, label_encoder) -> pd.DataFrame:
+    scored["predicted_performance"] = label_encoder.inverse_transform(perf_pred)
+    scored["at_risk_probability"] = risk_proba.round(4)
+    scored["at_risk"] = (risk_proba >= 0.5).astype(np.int8)
+    return scored
+
+
+@timed("predict.roster")
+def score_roster(df: pd.DataFrame, perf_model, label_encoder, risk_model,
+                 perf_encoder: FeatureEncoder, risk_encoder: FeatureEncoder,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, progress=None):
+    """Score a whole roster with the performance and at-risk models in chunks.
+
+    ``progress`` is an optional ``callback(rows_done, rows_total)``. Returns the
+    scored frame and a stats dict with ``rows``, ``seconds`` and ``rows_per_sec``.
+    """
+    n = len(df)
+    perf_pred = np.empty(n, dtype=np.intp)
+    risk_proba = np.empty(n, dtype=np.float64)
+    buffers = _buffers(perf_encoder, risk_encoder, min(chunk_size, n))
+
+    start = time.perf_counter()
+    for lo in range(0, n, chunk_size):
+        hi = min(lo + chunk_size, n)
+        perf_pred[lo:hi], risk_proba[lo:hi] = _predict_chunk(df.iloc[lo:hi], perf_model, risk_model,
+                                                             perf_encoder, risk_encoder, buffers)
+        if progress is not None:
+            progress(hi, n)
+    elapsed = time.perf_counter() - start
+
+    scored = _label(df.copy(), perf_pred, risk_proba, label_encoder)
+    stats = {
+        "rows": n,
+        "seconds": elapsed,
+        "rows_per_sec": n / elapsed if elapsed > 0 else float("inf"),
+    }
+    return scored, stats
+
+
+@timed("predict.roster_file")
+def score_chunks(chunks, n_rows: int, perf_model, label_encoder, risk_model,
+                 perf_encoder: FeatureEncoder, risk_encoder: FeatureEncoder,
+                 scored_path: str, at_risk_path: str, progress=None) -> dict:
+    """Score an iterator of roster chunks without holding the roster in memory.
+
+    Scored rows are appended to ``scored_path`` and at-risk rows (with their
+    row number as ``row``) to ``at_risk_path``, one chunk at a time. Returns
+    the ``score_roster`` stats plus ``at_risk`` (count) and ``preview`` (the
+    first scored rows).
+    """
+    stats = {"rows": 0, "at_risk": 0, "preview": None,
+             "scored_path": scored_path, "at_risk_path": at_risk_path}
+    buffers = None
+    start = time.perf_counter()
+    for chunk in chunks:
+        if buffers is None or len(buffers[0]) < len(chunk):
+            buffers = _buffers(perf_encoder, risk_encoder, len(chunk))
+        perf_pred, risk_proba = _predict_chunk(chunk, perf_model, risk_model, perf_encoder, risk_encoder, buffers)
+        scored = _label(chunk.copy(), perf_pred, risk_proba, label_encoder)
+
+        first = stats["rows"] == 0
+        scored.to_csv(scored_path, mode="w" if first else "a", header=first, index=False)
+        at_risk = scored[scored["at_risk"] == 1]
+        at_risk.to_csv(at_risk_path, mode="w" if first else "a", header=first, index_label="row")
+        if first:
+            stats["preview"] = scored.head()
+
+        stats["rows"] += len(chunk)
+        stats["at_risk"] += len(at_risk)
+        if progress is not None:
+            progress(stats["rows"], n_rows)
+    stats["seconds"] = time.perf_counter() - start
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] > 0 else float("inf")
+    return stats
+
+
+def risk_report_jobs(at_risk: pd.DataFrame, shap_values: np.ndarray, feature_names, top_n: int = 10):
+    """Yield ``(filename, student_info, label, shap_table)`` report jobs, one per row
+    of ``at_risk``. ``shap_values`` holds one row of contributions per student, in order.
+    """
+    info_cols = [c for c in at_risk.columns if c not in ("predicted_performance", "at_risk")]
+    feature_names = np.asarray(feature_names)
+    for i, (idx, row) in enumerate(at_risk[info_cols].iterrows()):
+        order = np.argsort(-np.abs(shap_values[i]), kind="stable")[:top_n]
+        shap_table = pd.DataFrame({"Feature": feature_names[order], "SHAP Impact": shap_values[i][order]})
+        yield f"student_{idx}_risk_report.pdf", row.to_frame().T, "At Risk", shap_table
@@ -0,0 +1,272 @@
+# utils/cleaning.py
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from .loader import (CATEGORICAL_COLS, PARTITION_DIR, PARTITION_MANIFEST, PROJECT_ROOT, SCORE_COLS,
+                     pa, read_partitions)
+from .model_registry import file_hash
+
+RAW_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Bump when the cleaning rules change so every partition is rebuilt
+CLEANING_VERSION = 1
+
+COLUMN_RENAMES = {
+    "parental_level_of_education": "parent_edu",
+    "test_preparation_course": "prep_course",
+}
+PERFORMANCE_BINS = [0, 60, 70, 80, 90, 100]
+PERFORMANCE_LABELS = ["Poor", "Average", "Good", "Very Good", "Excellent"]
+
+
+class CleaningError(ValueError):
+    pass
+
+
+def normalize_column(name: str) -> str:
+    name = str(name).lower().replace(" ", "_").strip()
+    return COLUMN_RENAMES.get(name, name)
+
+
+def clean_frame(raw: pd.DataFrame):
+    """Cleaned rows of one raw chunk, plus the number of rows dropped.
+
+    Same rules as the original cleaning notebook: snake_case column names,
+    ``average_score`` as the mean of the three scores, and ``performance``
+    binned with ``pd.cut``. Rows with a missing field or a non-numeric score
+    are dropped.
+    """
+    df = raw.rename(columns=normalize_column)
+    missing = [col for col in CATEGORICAL_COLS + SCORE_COLS if col not in df.columns]
+    if missing:
+        raise CleaningError(f"Missing required columns: {', '.join(missing)}")
+
+    out = pd.DataFrame({col: df[col].astype(str).where(df[col].notna()).str.strip() for col in CATEGORICAL_COLS})
+    scores = df[SCORE_COLS].apply(pd.to_numeric, errors="coerce")
+    keep = (scores.notna().all(axis=1) & out.notna().all(axis=1) & (out != "").all(axis=1)).to_numpy()
+
+    out = out.loc[keep].reset_index(drop=True)
+    for col in SCORE_COLS:
+        out[col] = scores.loc[keep, col].to_numpy().astype(np.int16)
+    out["average_score"] = out[SCORE_COLS].mean(axis=1)
+    out["performance"] = pd.cut(out["average_score"], bins=PERFORMANCE_BINS,
+                                labels=PERFORMANCE_LABELS).astype(object)
+    return out, int((~keep).sum())
+
+
+def iter_raw_blocks(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+    """Yield ``(header, block)`` byte strings of at most ``chunk_rows`` CSV records.
+
+    The file is split on raw bytes without parsing, so an unchanged block can be
+    recognised by its hash and skipped. Lines with an odd number of quote
+    characters are joined with the next line, which keeps quoted newlines within a record.
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        block, pending = [], b""
+        for line in f:
+            line = pending + line
+            if line.count(b'"') % 2:
+                pending = line
+                continue
+            pending = b""
+            if not line.strip():
+                continue
+            block.append(line if line.endswith(b"\n") else line + b"\n")
+            if len(block) == chunk_rows:
+                yield header, b"".join(block)
+                block = []
+        if pending:
+            block.append(pending)
+        if block:
+            yield header, b"".join(block)
+
+
+def _block_hash(header: bytes, block: bytes) -> str:
+    h = hashlib.sha256(f"v{CLEANING_VERSION}\n".encode())
+    h.update(header)
+    h.update(block)
+    return h.hexdigest()
+
+
+def _write_partition(df: pd.DataFrame, path: str):
+    # Uncompressed Arrow IPC, like the loader's columnar store, so reads can memory-map
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def _read_manifest(out_dir: str) -> dict:
+    path = os.path.join(out_dir, PARTITION_MANIFEST)
+    if not os.path.exists(path):
+        return {"cleaning_version": CLEANING_VERSION, "sources": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(out_dir: str, manifest: dict):
+    path = os.path.join(out_dir, PARTITION_MANIFEST)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+class CleaningPipeline:
+    """Incremental raw CSV -> partitioned, cleaned Arrow files.
+
+    Every ``*.csv`` under ``raw_dir`` becomes a run of partitions in
+    ``out_dir/<file stem>/``, one per block of ``chunk_rows`` raw records, each
+    named by the hash of its raw bytes. ``_manifest.json`` keeps, per raw file,
+    its size, mtime, SHA-256 and ordered blocks. A run skips files whose
+    size/mtime or hash are unchanged. For a changed file, it rewrites only the
+    blocks whose bytes changed; an append touches only the tail. Partitions
+    of removed files are deleted. The manifest is replaced last, so readers
+    (``utils.loader``) see either the previous dataset or the new one, never a mix.
+    """
+
+    def __init__(self, raw_dir: str = RAW_DIR, out_dir: str = PARTITION_DIR,
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        if pa is None:
+            raise ImportError("pyarrow is required to write cleaned partitions")
+        self.raw_dir = raw_dir
+        self.out_dir = out_dir
+        self.chunk_rows = chunk_rows
+
+    def raw_files(self) -> list:
+        if not os.path.isdir(self.raw_dir):
+            return []
+        return sorted(f for f in os.listdir(self.raw_dir) if f.lower().endswith(".csv"))
+
+    def _process_file(self, name: str, previous: dict, stats: dict) -> dict:
+        path = os.path.join(self.raw_dir, name)
+        source_dir = os.path.join(self.out_dir, os.path.splitext(name)[0])
+        os.makedirs(source_dir, exist_ok=True)
+        known = {block["sha256"]: block for block in (previous or {}).get("blocks", [])}
+
+        blocks = []
+        for header, raw in iter_raw_blocks(path, self.chunk_rows):
+            digest = _block_hash(header, raw)
+            block = known.get(digest)
+            if block is not None and (block["partition"] is None or
+                                      os.path.exists(os.path.join(self.out_dir, block["partition"]))):
+                stats["blocks_reused"] += 1
+            else:
+                cleaned, dropped = clean_frame(pd.read_csv(io.BytesIO(header + raw), dtype=str,
+                                                           keep_default_na=False, na_values=[""]))
+                partition = None
+                if len(cleaned):
+                    partition = f"{os.path.splitext(name)[0]}/{digest[:16]}.arrow"
+                    _write_partition(cleaned, os.path.join(self.out_dir, partition))
+                block = {"sha256": digest, "partition": partition, "rows": len(cleaned), "dropped": dropped}
+                stats["blocks_written"] += 1
+            blocks.append(block)
+            stats["rows"] += block["rows"]
+            stats["dropped"] += block["dropped"]
+
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_hash(path), "blocks": blocks}
+
+    def run(self, full: bool = False, progress=None) -> dict:
+        """Bring ``out_dir`` up to date with ``raw_dir``; returns a summary of the work done.
+
+        ``full=True`` ignores the manifest and rebuilds every partition.
+        ``progress`` is an optional ``callback(file_name, status)``.
+        """
+        start = time.perf_counter()
+        os.makedirs(self.out_dir, exist_ok=True)
+        manifest = _read_manifest(self.out_dir)
+        if full or manifest.get("cleaning_version") != CLEANING_VERSION:
+            manifest = {"cleaning_version": CLEANING_VERSION, "sources": {}}
+
+        names = self.raw_files()
+        if not names:
+            raise CleaningError(f"No raw CSV files in {self.raw_dir}")
+
+        stats = {"files_changed": 0, "files_unchanged": 0, "files_removed": 0,
+                 "blocks_written": 0, "blocks_reused": 0, "rows": 0, "dropped": 0}
+        sources = {}
+        for name in names:
+            path = os.path.join(self.raw_dir, name)
+            previous = manifest["sources"].get(name)
+            stat = os.stat(path)
+            unchanged = previous is not None and self._partitions_exist(previous) and (
+                (previous["size"], previous["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns)
+                or previous["sha256"] == file_hash(path))
+            if unchanged:
+                entry = {**previous, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                stats["files_unchanged"] += 1
+                stats["blocks_reused"] += len(entry["blocks"])
+                stats["rows"] += sum(block["rows"] for block in entry["blocks"])
+                stats["dropped"] += sum(block["dropped"] for block in entry["blocks"])
+            else:
+                entry = self._process_file(name, previous, stats)
+                stats["files_changed"] += 1
+            sources[name] = entry
+            if progress is not None:
+                progress(name, "unchanged" if unchanged else "cleaned")
+
+        stats["files_removed"] = len(set(manifest["sources"]) - set(sources))
+        _write_manifest(self.out_dir, {"cleaning_version": CLEANING_VERSION, "sources": sources})
+        self._remove_orphans(sources)
+        stats["seconds"] = round(time.perf_counter() - start, 3)
+        return stats
+
+    def _partitions_exist(self, entry: dict) -> bool:
+        return all(os.path.exists(os.path.join(self.out_dir, block["partition"]))
+                   for block in entry["blocks"] if block["partition"])
+
+    def _remove_orphans(self, sources: dict):
+        live = {block["partition"] for entry in sources.values() for block in entry["blocks"] if block["partition"]}
+        for entry in os.scandir(self.out_dir):
+            if not entry.is_dir():
+                continue
+            for f in os.scandir(entry.path):
+                if f"{entry.name}/{f.name}" not in live:
+                    os.remove(f.path)
+            if not any(os.scandir(entry.path)):
+                shutil.rmtree(entry.path)
+
+
+def export_csv(csv_path: str, out_dir: str = PARTITION_DIR):
+    """Write the partitions as one ``students_cleaned.csv`` for notebooks and other tools."""
+    df = read_partitions(out_dir)
+    tmp_path = f"{csv_path}.{os.getpid()}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, csv_path)
+    return len(df)
+
+
+if __name__ == "__main__":
+    # python -m utils.cleaning [--full] [--export-csv]  (from streamlit_app/)
+    import argparse
+
+    from .loader import DATA_PATH
+
+    parser = argparse.ArgumentParser(description="Clean raw student CSVs into partitioned Arrow files")
+    parser.add_argument("--raw-dir", default=RAW_DIR)
+    parser.add_argument("--out-dir", default=PARTITION_DIR)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--full", action="store_true", help="rebuild every partition")
+    parser.add_argument("--export-csv", nargs="?", const=DATA_PATH, metavar="PATH",
+                        help=f"also write the cleaned data as one CSV (default {os.path.relpath(DATA_PATH)})")
+    args = parser.parse_args()
+
+    pipeline = CleaningPipeline(args.raw_dir, args.out_dir, args.chunk_rows)
+    summary = pipeline.run(full=args.full, progress=lambda name, status: print(f"{status:>10}  {name}"))
+    for key, value in summary.items():
+        print(f"{key:>16}: {value}")
+    if args.export_csv:
+        print(f"exported {export_csv(args.export_csv, args.out_dir):,} rows to {args.export_csv}")
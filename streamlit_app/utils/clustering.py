@@ -0,0 +1,138 @@
+# utils/clustering.py
+
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+from .loader import PROJECT_ROOT, SCORE_COLS, load_data
+
+CLUSTER_PATH = os.path.join(PROJECT_ROOT, "models", "student_clusters.pkl")
+N_CLUSTERS = 4
+MINIBATCH_ROWS = 100_000  # above this, "auto" mode switches to incremental MiniBatchKMeans
+
+# Ordered from the lowest to the highest mean centroid score
+PERSONAS = ["📘 Struggling", "📙 Improving", "📗 Consistent Performer", "📕 High Achiever"]
+
+
+class StudentClusterer:
+    """Score-based KMeans personas with persisted scaler + centroids.
+
+    Clusters are renumbered by ascending mean centroid score after fitting,
+    so cluster 0 is always the weakest group and persona labels never swap
+    between fits. New students are assigned by a vectorized nearest-centroid
+    lookup; no refit is needed.
+    """
+
+    def __init__(self, n_clusters: int = N_CLUSTERS, features=None):
+        self.n_clusters = n_clusters
+        self.features = list(features or SCORE_COLS)
+        self.mean_ = None
+        self.scale_ = None
+        self.centroids_ = None  # standardized space, sorted by ascending score
+        self.n_samples_ = 0
+
+    @property
+    def personas(self):
+        if self.n_clusters == len(PERSONAS):
+            return list(PERSONAS)
+        return [f"Tier {i + 1}" for i in range(self.n_clusters)]
+
+    def _finish(self, scaler: StandardScaler, centroids: np.ndarray, n_samples: int):
+        self.mean_, self.scale_ = scaler.mean_.copy(), scaler.scale_.copy()
+        raw = centroids * self.scale_ + self.mean_
+        self.centroids_ = centroids[np.argsort(raw.mean(axis=1), kind="stable")]
+        self.n_samples_ = n_samples
+        return self
+
+    def fit(self, X, random_state: int = 42):
+        X = self._matrix(X)
+        scaler = StandardScaler().fit(X)
+        km = KMeans(n_clusters=self.n_clusters, random_state=random_state, n_init=10).fit(scaler.transform(X))
+        return self._finish(scaler, km.cluster_centers_, len(X))
+
+    def fit_incremental(self, chunk_source, batch_size: int = 4096, random_state: int = 42):
+        """Fit from chunks without holding the full roster.
+
+        ``chunk_source`` is a zero-argument callable returning an iterable of
+        frames/arrays. It is called twice: once to fit the scaler and once for
+        the MiniBatchKMeans passes.
+        """
+        scaler = StandardScaler()
+        n = 0
+        for chunk in chunk_source():
+            X = self._matrix(chunk)
+            scaler.partial_fit(X)
+            n += len(X)
+        km = MiniBatchKMeans(n_clusters=self.n_clusters, random_state=random_state,
+                             batch_size=batch_size, n_init=3)
+        for chunk in chunk_source():
+            X = scaler.transform(self._matrix(chunk))
+            for lo in range(0, len(X), batch_size):
+                batch = X[lo:lo + batch_size]
+                if len(batch) >= self.n_clusters:
+                    km.partial_fit(batch)
+        return self._finish(scaler, km.cluster_centers_, n)
+
+    def _matrix(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features].to_numpy()
+        return np.asarray(X, dtype=np.float64)
+
+    def assign(self, X, chunk_size: int = 200_000) -> np.ndarray:
+        X = self._matrix(X)
+        C = self.centroids_
+        c_sq = (C ** 2).sum(axis=1)
+        labels = np.empty(len(X), dtype=np.int8)
+        for lo in range(0, len(X), chunk_size):
+            Z = (X[lo:lo + chunk_size] - self.mean_) / self.scale_
+            # argmin ||z - c||^2 == argmin (||c||^2 - 2 z.c)
+            labels[lo:lo + chunk_size] = np.argmin(c_sq - 2.0 * Z @ C.T, axis=1)
+        return labels
+
+    def persona(self, labels) -> np.ndarray:
+        return np.asarray(self.personas, dtype=object)[np.asarray(labels)]
+
+    def centroid_table(self) -> pd.DataFrame:
+        raw = self.centroids_ * self.scale_ + self.mean_
+        table = pd.DataFrame(raw.round(1), columns=self.features)
+        table.insert(0, "Persona", self.personas)
+        return table
+
+    def save(self, path: str = CLUSTER_PATH):
+        # Plain arrays, so the artifact does not depend on this module's import path
+        state = {"n_clusters": self.n_clusters, "features": self.features, "mean": self.mean_,
+                 "scale": self.scale_, "centroids": self.centroids_, "n_samples": self.n_samples_}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(state, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = CLUSTER_PATH) -> "StudentClusterer":
+        state = joblib.load(path)
+        clusterer = cls(state["n_clusters"], state["features"])
+        clusterer.mean_, clusterer.scale_ = state["mean"], state["scale"]
+        clusterer.centroids_, clusterer.n_samples_ = state["centroids"], state["n_samples"]
+        return clusterer
+
+
+def fit_clusterer(df: pd.DataFrame, mode: str = "auto", chunk_size: int = 50_000) -> StudentClusterer:
+    if mode == "auto":
+        mode = "minibatch" if len(df) > MINIBATCH_ROWS else "full"
+    clusterer = StudentClusterer()
+    if mode == "minibatch":
+        return clusterer.fit_incremental(lambda: (df.iloc[lo:lo + chunk_size] for lo in range(0, len(df), chunk_size)))
+    return clusterer.fit(df)
+
+
+@st.cache_resource
+def get_clusterer(path: str = CLUSTER_PATH) -> StudentClusterer:
+    if os.path.exists(path):
+        return StudentClusterer.load(path)
+    clusterer = fit_clusterer(load_data())
+    clusterer.save(path)
+    return clusterer
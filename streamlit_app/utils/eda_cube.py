@@ -0,0 +1,207 @@
+# utils/eda_cube.py
+
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .loader import SCORE_COLS, dataset_version
+
+FILTER_COLS = ["gender", "prep_course", "race/ethnicity", "lunch"]
+NUMERIC_COLS = SCORE_COLS + ["average_score"]
+ALL = "All"
+N_BINS = 101  # one bin per integer score 0-100
+
+
+class CubeCell:
+    """Aggregates for one filter tuple; everything here is O(1) to read."""
+
+    def __init__(self, count, sums, cross, mins, maxs, hist, perf_counts, perf_labels):
+        self.count = int(count)
+        self.sums = sums
+        self.cross = cross
+        self.mins = mins
+        self.maxs = maxs
+        self.hist = hist
+        self.perf_counts = pd.Series(perf_counts.astype(np.int64), index=perf_labels)
+
+    def mean(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.Series(self.sums / self.count, index=NUMERIC_COLS)
+
+    def cov(self):
+        n = self.count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.sums / n
+            return (self.cross - n * np.outer(mean, mean)) / (n - 1)
+
+    def corr(self) -> pd.DataFrame:
+        cov = self.cov()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(np.diag(cov))
+            corr = cov / np.outer(std, std)
+        return pd.DataFrame(corr, index=NUMERIC_COLS, columns=NUMERIC_COLS)
+
+    def describe(self) -> pd.DataFrame:
+        with np.errstate(invalid="ignore"):
+            std = np.sqrt(np.diag(self.cov()))
+        empty = self.count == 0
+        return pd.DataFrame(
+            [np.full(len(NUMERIC_COLS), self.count), self.mean().to_numpy(), std,
+             np.where(empty, np.nan, self.mins), np.where(empty, np.nan, self.maxs)],
+            index=["count", "mean", "std", "min", "max"], columns=NUMERIC_COLS,
+        )
+
+    def histogram(self, score_col: str) -> pd.Series:
+        return pd.Series(self.hist[SCORE_COLS.index(score_col)], index=np.arange(N_BINS))
+
+    def most_common_performance(self):
+        return self.perf_counts.idxmax() if self.count else None
+
+
+class AggregateCube:
+    """Additive aggregates over every gender × prep × race × lunch combination.
+
+    Leaf cells hold counts, sums, sums of squares/cross-products, min/max,
+    per-score histograms and performance counts. An extra "All" slot on each
+    axis holds the marginal, so any sidebar selection is a single index lookup.
+    New rows are folded in with ``add`` without rescanning old ones.
+    """
+
+    def __init__(self, vocab, perf_labels):
+        self.vocab = {col: list(vocab[col]) for col in FILTER_COLS}
+        self.perf_labels = list(perf_labels)
+        self.n_rows = 0
+        # Set by get_cube: the data version and a digest of the n_rows rows folded in so far
+        self.version = None
+        self.digest = None
+        self._index = {col: {v: i for i, v in enumerate(cats)} for col, cats in self.vocab.items()}
+
+        shape = tuple(len(self.vocab[col]) for col in FILTER_COLS)
+        k = len(NUMERIC_COLS)
+        self._leaf = {
+            "count": np.zeros(shape),
+            "sums": np.zeros(shape + (k,)),
+            "cross": np.zeros(shape + (k, k)),
+            "mins": np.full(shape + (k,), np.inf),
+            "maxs": np.full(shape + (k,), -np.inf),
+            "hist": np.zeros(shape + (len(SCORE_COLS), N_BINS)),
+            "perf": np.zeros(shape + (len(self.perf_labels),)),
+        }
+        self._full = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame):
+        vocab = {col: sorted(df[col].dropna().unique()) for col in FILTER_COLS}
+        cube = cls(vocab, sorted(df["performance"].dropna().unique()))
+        cube.add(df)
+        return cube
+
+    def covers(self, df: pd.DataFrame) -> bool:
+        cols = [(col, self.vocab[col]) for col in FILTER_COLS] + [("performance", self.perf_labels)]
+        return all(pd.Series(df[col]).isin(cats).all() for col, cats in cols)
+
+    def add(self, df: pd.DataFrame):
+        if not len(df):
+            return
+        if not self.covers(df):
+            raise ValueError("New rows contain categories the cube was not built with")
+
+        shape = self._leaf["count"].shape
+        n_cells = int(np.prod(shape))
+        codes = [pd.Categorical(df[col], categories=self.vocab[col]).codes for col in FILTER_COLS]
+        cell = np.ravel_multi_index(codes, shape)
+        X = df[NUMERIC_COLS].to_numpy(dtype=np.float64)
+        k = X.shape[1]
+
+        leaf = self._leaf
+        leaf["count"] += np.bincount(cell, minlength=n_cells).reshape(shape)
+        for i in range(k):
+            leaf["sums"][..., i] += np.bincount(cell, weights=X[:, i], minlength=n_cells).reshape(shape)
+            for j in range(i, k):
+                cp = np.bincount(cell, weights=X[:, i] * X[:, j], minlength=n_cells).reshape(shape)
+                leaf["cross"][..., i, j] += cp
+                if i != j:
+                    leaf["cross"][..., j, i] += cp
+
+        flat_cell = cell.reshape(-1)
+        mins = leaf["mins"].reshape(n_cells, k)
+        maxs = leaf["maxs"].reshape(n_cells, k)
+        np.minimum.at(mins, flat_cell, X)
+        np.maximum.at(maxs, flat_cell, X)
+
+        for s, col in enumerate(SCORE_COLS):
+            bins = np.clip(df[col].to_numpy(dtype=np.int64), 0, N_BINS - 1)
+            leaf["hist"][..., s, :] += np.bincount(cell * N_BINS + bins, minlength=n_cells * N_BINS).reshape(shape + (N_BINS,))
+
+        perf = pd.Categorical(df["performance"], categories=self.perf_labels).codes
+        n_perf = len(self.perf_labels)
+        leaf["perf"] += np.bincount(cell * n_perf + perf, minlength=n_cells * n_perf).reshape(shape + (n_perf,))
+
+        self.n_rows += len(df)
+        self._full = None
+
+    def _with_totals(self):
+        # Append an "All" slot to each filter axis holding the reduction over that axis
+        reducers = {"mins": np.minimum, "maxs": np.maximum}
+        full = {}
+        for name, arr in self._leaf.items():
+            reduce = reducers.get(name, np.add)
+            for axis in range(len(FILTER_COLS)):
+                arr = np.concatenate([arr, reduce.reduce(arr, axis=axis, keepdims=True)], axis=axis)
+            full[name] = arr
+        return full
+
+    def query(self, gender=ALL, prep=ALL, race=ALL, lunch=ALL) -> CubeCell:
+        if self._full is None:
+            self._full = self._with_totals()
+        key = []
+        for col, value in zip(FILTER_COLS, (gender, prep, race, lunch)):
+            key.append(len(self.vocab[col]) if value == ALL else self._index[col][value])
+        key = tuple(key)
+        full = self._full
+        return CubeCell(full["count"][key], full["sums"][key], full["cross"][key],
+                        full["mins"][key], full["maxs"][key], full["hist"][key],
+                        full["perf"][key], self.perf_labels)
+
+
+_cube_lock = threading.Lock()
+
+
+@st.cache_resource
+def _cube_holder():
+    return {"cube": None}
+
+
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(df[FILTER_COLS + NUMERIC_COLS + ["performance"]], index=False).to_numpy()
+
+
+def _digest(row_hashes: np.ndarray) -> str:
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+
+def get_cube(df: pd.DataFrame, version: str = None) -> AggregateCube:
+    """Return the shared cube for ``df`` (``version`` defaults to ``dataset_version(df)``).
+
+    When the version changes, rows are folded in incrementally only if the
+    rows already aggregated are unchanged and still first; an edited row or
+    a partition inserted mid-frame triggers a full rebuild.
+    """
+    version = version or dataset_version(df)
+    holder = _cube_holder()
+    with _cube_lock:
+        cube = holder["cube"]
+        if cube is not None and cube.version == version:
+            return cube
+        hashes = _row_hashes(df)
+        tail = df.iloc[cube.n_rows:] if cube is not None and len(df) >= cube.n_rows else None
+        if tail is not None and _digest(hashes[:cube.n_rows]) == cube.digest and cube.covers(tail):
+            cube.add(tail)
+        else:
+            cube = AggregateCube.from_frame(df)
+        cube.version, cube.digest = version, _digest(hashes)
+        holder["cube"] = cube
+        return cube
@@ -0,0 +1,82 @@
+# utils/encoder.py
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .loader import CATEGORICAL_COLS, SCORE_COLS, load_data
+from .telemetry import timed
+
+
+class FeatureEncoder:
+    """One-hot encoder compiled against a model's ``feature_names_in_``.
+
+    Categories map straight to column indices, so encoding a record is a few
+    array writes instead of ``pd.get_dummies`` + ``reindex``. Levels without a
+    column (the ``drop_first`` baseline, or unseen values) encode as all zeros.
+    """
+
+    def __init__(self, feature_names, vocab):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        index = {name: i for i, name in enumerate(self.feature_names)}
+
+        self.numeric_idx = {col: index[col] for col in SCORE_COLS if col in index}
+        self.vocab = {col: list(cats) for col, cats in vocab.items()}
+        self.lookup = {
+            col: {cat: index.get(f"{col}_{cat}", -1) for cat in cats}
+            for col, cats in self.vocab.items()
+        }
+        # Code -> column index per categorical, with a trailing -1 slot for code -1 (unknown)
+        self._code_to_col = {
+            col: np.array([self.lookup[col][cat] for cat in cats] + [-1], dtype=np.intp)
+            for col, cats in self.vocab.items()
+        }
+
+    @classmethod
+    def fit(cls, df: pd.DataFrame, feature_names):
+        vocab = {col: sorted(df[col].dropna().unique()) for col in CATEGORICAL_COLS if col in df.columns}
+        return cls(feature_names, vocab)
+
+    @timed("encode.record")
+    def transform_record(self, record: dict, out: np.ndarray = None) -> np.ndarray:
+        row = np.zeros(self.n_features, dtype=np.float64) if out is None else out
+        if out is not None:
+            row.fill(0.0)
+        for col, idx in self.numeric_idx.items():
+            row[idx] = record[col]
+        for col, lookup in self.lookup.items():
+            idx = lookup.get(record.get(col), -1)
+            if idx >= 0:
+                row[idx] = 1.0
+        return row
+
+    @timed("encode.frame")
+    def transform(self, df: pd.DataFrame, out: np.ndarray = None) -> np.ndarray:
+        n = len(df)
+        X = np.zeros((n, self.n_features), dtype=np.float64) if out is None else out[:n]
+        if out is not None:
+            X.fill(0.0)
+        for col, idx in self.numeric_idx.items():
+            X[:, idx] = df[col].to_numpy()
+        rows = np.arange(n)
+        for col, code_to_col in self._code_to_col.items():
+            codes = pd.Categorical(df[col], categories=self.vocab[col]).codes
+            cols = code_to_col[codes]
+            hit = cols >= 0
+            X[rows[hit], cols[hit]] = 1.0
+        return X
+
+    def to_frame(self, X: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(np.atleast_2d(X), columns=self.feature_names, copy=False)
+
+    def encode_record(self, record: dict) -> pd.DataFrame:
+        return self.to_frame(self.transform_record(record))
+
+    def encode_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.to_frame(self.transform(df))
+
+
+@st.cache_resource
+def get_encoder(feature_names: tuple) -> FeatureEncoder:
+    return FeatureEncoder.fit(load_data(), feature_names)
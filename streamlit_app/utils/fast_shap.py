@@ -0,0 +1,94 @@
+# utils/fast_shap.py
+
+import numpy as np
+import pandas as pd
+
+
+def _as_array(X) -> np.ndarray:
+    return X.to_numpy(dtype=np.float64) if isinstance(X, pd.DataFrame) else np.asarray(X, dtype=np.float64)
+
+
+def _background_arrays(background):
+    # A summarize_background result carries per-centroid weights; plain frames weigh rows equally
+    if hasattr(background, "weights"):
+        return _as_array(background.data), np.asarray(background.weights, dtype=np.float64)
+    return _as_array(background), None
+
+
+def _explanation(values, base_values, X, feature_names):
+    import shap
+
+    data = _as_array(X)
+    return shap.Explanation(values=values, base_values=base_values, data=data,
+                            feature_names=list(feature_names))
+
+
+class LinearShap:
+    """Exact SHAP for linear models: ``coef * (x - mean(background))`` in margin space.
+
+    Matches ``shap.Explainer`` on a linear model with an independent masker.
+    For a weighted background (``summarize_background``) the mean is weighted too.
+    """
+
+    path = "linear-exact"
+
+    def __init__(self, model, background):
+        data, weights = _background_arrays(background)
+        self.feature_names = list(getattr(model, "feature_names_in_", range(data.shape[1])))
+        self.coef = np.atleast_2d(np.asarray(model.coef_, dtype=np.float64))  # (outputs, features)
+        self.intercept = np.atleast_1d(np.asarray(model.intercept_, dtype=np.float64))
+        self.mean = np.average(data, axis=0, weights=weights)
+        self.expected_value = self.intercept + self.coef @ self.mean
+
+    def shap_values(self, X) -> np.ndarray:
+        centered = _as_array(X) - self.mean
+        values = centered[:, :, None] * self.coef.T[None, :, :]  # (rows, features, outputs)
+        return values[:, :, 0] if values.shape[2] == 1 else values
+
+    def __call__(self, X):
+        values = self.shap_values(X)
+        n = values.shape[0]
+        base = self.expected_value
+        base_values = np.full(n, base[0]) if len(base) == 1 else np.tile(base, (n, 1))
+        return _explanation(values, base_values, X, self.feature_names)
+
+
+class TreeShap:
+    """Exact path-dependent TreeSHAP for fitted sklearn trees and forests.
+
+    Delegates to shap's compiled ``TreeExplainer``, which walks ``tree_`` in C;
+    this wrapper only adds the ``path`` label and the output layout shared
+    with ``LinearShap``.
+    """
+
+    path = "tree-path-dependent"
+
+    def __init__(self, model):
+        import shap
+
+        self.explainer = shap.TreeExplainer(model, feature_perturbation="tree_path_dependent")
+        self.feature_names = list(getattr(model, "feature_names_in_", range(model.n_features_in_)))
+        self.expected_value = np.atleast_1d(np.asarray(self.explainer.expected_value, dtype=np.float64))
+
+    def shap_values(self, X) -> np.ndarray:
+        # Path-dependent values are exact; skip shap's additivity re-prediction
+        return np.asarray(self.explainer.shap_values(_as_array(X), check_additivity=False))
+
+    def __call__(self, X):
+        values = self.shap_values(X)
+        n = values.shape[0]
+        base = self.expected_value
+        base_values = np.full(n, base[0]) if len(base) == 1 else np.tile(base, (n, 1))
+        return _explanation(values, base_values, X, self.feature_names)
+
+
+def fast_explainer(model, background=None):
+    """Return an exact explainer for ``model`` if one applies, else ``None``."""
+    if hasattr(model, "tree_") or (
+        hasattr(model, "estimators_") and all(hasattr(est, "tree_") for est in np.ravel(model.estimators_))
+        and not hasattr(model, "learning_rate")  # boosted trees sum, they don't average
+    ):
+        return TreeShap(model)
+    if hasattr(model, "coef_") and hasattr(model, "intercept_") and background is not None:
+        return LinearShap(model, background)
+    return None
@@ -0,0 +1,136 @@
+# utils/group_risk.py
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .encoder import get_encoder
+from .loader import PROJECT_ROOT, dataset_version
+from .model_registry import load_artifact
+from .telemetry import timed
+
+RISK_MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "at_risk_model.pkl")
+GROUP_COLS = ["gender", "race/ethnicity", "parent_edu", "lunch", "prep_course"]
+Z_95 = 1.959963984540054
+
+
+def predict_at_risk(df: pd.DataFrame, model, chunk_size: int = 50_000) -> np.ndarray:
+    """At-risk probability for every row, encoded and scored in chunks."""
+    encoder = get_encoder(tuple(model.feature_names_in_))
+    proba = np.empty(len(df), dtype=np.float64)
+    buf = np.empty((min(chunk_size, len(df)), encoder.n_features))
+    for lo in range(0, len(df), chunk_size):
+        chunk = df.iloc[lo:lo + chunk_size]
+        X = encoder.to_frame(encoder.transform(chunk, out=buf))
+        proba[lo:lo + len(chunk)] = model.predict_proba(X)[:, 1]
+    return proba
+
+
+@st.cache_data(show_spinner="Scoring at-risk model...", max_entries=8)
+def _cached_at_risk(version: str, model_version: str, _df: pd.DataFrame, _model) -> np.ndarray:
+    # Keyed on the dataset version + model hash; the frame itself is not hashed again
+    return predict_at_risk(_df, _model)
+
+
+@timed("predict.group_risk")
+def at_risk_predictions(df: pd.DataFrame, threshold: float = 0.5, version: str = None) -> np.ndarray:
+    """0/1 at-risk flags from ``at_risk_model.pkl``, cached per dataset version and registry sha256."""
+    artifact = load_artifact(RISK_MODEL_PATH)
+    proba = _cached_at_risk(version or dataset_version(df), artifact.sha256, df, artifact.model)
+    return (proba >= threshold).astype(np.int8)
+
+
+def wilson_interval(successes, totals, z: float = Z_95):
+    """Wilson score interval for binomial rates; stays inside [0, 1] for small groups."""
+    successes = np.asarray(successes, dtype=np.float64)
+    totals = np.asarray(totals, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = successes / totals
+        denom = 1 + z ** 2 / totals
+        center = (p + z ** 2 / (2 * totals)) / denom
+        half = z * np.sqrt(p * (1 - p) / totals + z ** 2 / (4 * totals ** 2)) / denom
+    return center - half, center + half
+
+
+class GroupRiskCube:
+    """Student and at-risk counts for every combination of ``cols``.
+
+    Built in one ``np.bincount`` pass over the combined category codes. Any
+    group-by over a subset of the columns, optionally filtered to fixed values
+    on other columns, is then a sum over axes of the small count array.
+    """
+
+    def __init__(self, cols, categories, totals: np.ndarray, at_risk: np.ndarray):
+        self.cols = list(cols)
+        self.categories = {col: list(categories[col]) for col in self.cols}
+        self.totals = totals
+        self.at_risk = at_risk
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, at_risk, cols=None) -> "GroupRiskCube":
+        cols = list(cols or GROUP_COLS)
+        cats = [pd.Categorical(df[col]) for col in cols]
+        codes = np.stack([c.codes.astype(np.int64) for c in cats])
+        shape = tuple(len(c.categories) for c in cats)
+
+        # Rows with a missing category have no cell to land in
+        valid = (codes >= 0).all(axis=0)
+        flat = np.ravel_multi_index(codes[:, valid], shape)
+        size = int(np.prod(shape))
+        totals = np.bincount(flat, minlength=size).reshape(shape)
+        risk = np.bincount(flat, weights=np.asarray(at_risk)[valid], minlength=size).reshape(shape).astype(np.int64)
+        return cls(cols, {col: c.categories.tolist() for col, c in zip(cols, cats)}, totals, risk)
+
+    def _select(self, filters: dict):
+        index = []
+        for col in self.cols:
+            value = (filters or {}).get(col)
+            if value is None:
+                index.append(slice(None))
+            else:
+                i = self.categories[col].index(value)
+                index.append(slice(i, i + 1))  # keep the axis so later sums line up
+        return self.totals[tuple(index)], self.at_risk[tuple(index)]
+
+    def breakdown(self, by, filters: dict = None, min_count: int = 1, z: float = Z_95) -> pd.DataFrame:
+        """At-risk counts, rates and confidence intervals per combination of ``by``."""
+        by = list(by)
+        totals, risk = self._select(filters)
+        drop = tuple(i for i, col in enumerate(self.cols) if col not in by)
+        totals = totals.sum(axis=drop)
+        risk = risk.sum(axis=drop)
+
+        # sum() keeps the cube's column order; reorder axes to match ``by``
+        order = [col for col in self.cols if col in by]
+        perm = [order.index(col) for col in by]
+        totals = np.transpose(totals, perm).ravel()
+        risk = np.transpose(risk, perm).ravel()
+
+        if by:
+            groups = pd.MultiIndex.from_product([self._labels(col, filters) for col in by], names=by).to_frame(index=False)
+        else:
+            groups = pd.DataFrame(index=[0])
+        low, high = wilson_interval(risk, totals, z)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rate = risk / totals
+        table = groups.assign(**{"Total": totals, "At Risk Count": risk, "At Risk Rate": rate,
+                                 "CI Low": low, "CI High": high})
+        return table[table["Total"] >= min_count].reset_index(drop=True)
+
+    def _labels(self, col, filters):
+        value = (filters or {}).get(col)
+        return self.categories[col] if value is None else [value]
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _cached_cube(version: str, cols: tuple, _df: pd.DataFrame, _at_risk: np.ndarray) -> GroupRiskCube:
+    return GroupRiskCube.from_frame(_df, _at_risk, cols)
+
+
+def get_group_risk_cube(df: pd.DataFrame, at_risk: np.ndarray, cols=None, version: str = None) -> GroupRiskCube:
+    cols = tuple(cols or GROUP_COLS)
+    version = (version or dataset_version(df)) + hashlib.sha256(np.ascontiguousarray(at_risk).tobytes()).hexdigest()[:8]
+    return _cached_cube(version, cols, df, at_risk)
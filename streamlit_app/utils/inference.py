@@ -0,0 +1,116 @@
+# utils/inference.py
+
+import os
+import warnings
+
+import numpy as np
+import streamlit as st
+
+from .encoder import get_encoder
+from .ingest import get_schema
+from .loader import PROJECT_ROOT, load_model, load_risk_model
+from .model_registry import ARTIFACTS, get_model_registry
+from .shap_helper import explain_with_info
+from .tree_kernel import load_compiled_model
+
+PERF_MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "decision_tree_model.pkl")
+RISK_MODEL_PATH = os.path.join(PROJECT_ROOT, "models", "at_risk_model.pkl")
+
+# Matrices are built in feature_names_in_ order, so sklearn's DataFrame checks are skipped
+# on purpose; they cost more than the prediction itself for single records
+warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+
+
+class RecordError(ValueError):
+    """Input records failed schema validation; ``errors`` lists row + reason."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} validation error(s)")
+        self.errors = errors
+
+
+class InferenceService:
+    """Validated batch inference over the shipped models, independent of any page.
+
+    Everything is loaded once in ``__init__``; a process (e.g. one API worker)
+    keeps a single instance via ``get_inference_service``, rebuilt when the
+    model registry swaps in a new version of any of its artifacts.
+    """
+
+    def __init__(self):
+        self.perf_model, self.label_encoder = load_model()
+        self.compiled = load_compiled_model()
+        self.risk_model = load_risk_model()
+        self.perf_encoder = get_encoder(tuple(self.perf_model.feature_names_in_))
+        self.risk_encoder = get_encoder(tuple(self.risk_model.feature_names_in_))
+        self.schema = get_schema()
+        self.classes = list(self.label_encoder.classes_)
+
+    def validate(self, records) -> list:
+        missing = sorted({col for col in self.schema.required for r in records if col not in r},
+                         key=self.schema.required.index)
+        if missing:
+            raise RecordError([{"row": None, "reason": f"missing field(s): {', '.join(missing)}"}])
+        clean, errors = self.schema.validate_records(records)
+        if errors:
+            raise RecordError(errors)
+        return clean
+
+    @staticmethod
+    def _matrix(records: list, encoder) -> np.ndarray:
+        # Record-at-a-time encoding beats building a DataFrame for API-sized batches
+        X = np.empty((len(records), encoder.n_features))
+        for i, record in enumerate(records):
+            encoder.transform_record(record, out=X[i])
+        return X
+
+    def predict_performance(self, records: list) -> list:
+        proba = self.compiled.predict_proba(self._matrix(records, self.perf_encoder))
+        labels = self.label_encoder.inverse_transform(self.compiled.classes_[proba.argmax(axis=1)])
+        return [{"predicted_performance": label,
+                 "probabilities": dict(zip(self.classes, np.round(p, 4).tolist()))}
+                for label, p in zip(labels, proba)]
+
+    def predict_at_risk(self, records: list, threshold: float = 0.5) -> list:
+        proba = self.risk_model.predict_proba(self._matrix(records, self.risk_encoder))[:, 1]
+        return [{"at_risk_probability": round(float(p), 4), "at_risk": bool(p >= threshold)} for p in proba]
+
+    def explain(self, records: list, model: str = "at-risk", top_n: int = None) -> list:
+        """SHAP contributions per record, largest magnitude first.
+
+        For the performance model, contributions are for each record's predicted class.
+        """
+        if model == "performance":
+            X = self.perf_encoder.to_frame(self._matrix(records, self.perf_encoder))
+            explanation, _ = explain_with_info(PERF_MODEL_PATH, X)
+            # Class axis follows classes_ order, so index by argmax position
+            pos = self.compiled.predict_proba(X).argmax(axis=1)
+            rows = np.arange(len(X))
+            values = explanation.values[rows, :, pos]
+            base = np.asarray(explanation.base_values)[rows, pos]
+            targets = self.label_encoder.inverse_transform(self.compiled.classes_[pos])
+        elif model == "at-risk":
+            X = self.risk_encoder.to_frame(self._matrix(records, self.risk_encoder))
+            explanation, _ = explain_with_info(RISK_MODEL_PATH, X)
+            values = explanation.values
+            base = np.broadcast_to(np.asarray(explanation.base_values), len(X))
+            targets = ["at_risk"] * len(X)
+        else:
+            raise ValueError(f"Unknown model '{model}'; expected 'performance' or 'at-risk'")
+
+        names = np.asarray(X.columns)
+        out = []
+        for target, b, v in zip(targets, base, values):
+            order = np.argsort(-np.abs(v), kind="stable")[:top_n]
+            out.append({"target": target, "base_value": round(float(b), 6),
+                        "contributions": dict(zip(names[order].tolist(), np.round(v[order], 6).tolist()))})
+        return out
+
+
+@st.cache_resource(max_entries=1)
+def _inference_service(versions: tuple) -> InferenceService:
+    return InferenceService()
+
+
+def get_inference_service() -> InferenceService:
+    return _inference_service(get_model_registry().versions(*ARTIFACTS))
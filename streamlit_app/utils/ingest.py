@@ -0,0 +1,205 @@
+# utils/ingest.py
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .encoder import CATEGORICAL_COLS, SCORE_COLS
+from .loader import PROJECT_ROOT, load_data
+
+UPLOAD_DIR = os.path.join(PROJECT_ROOT, "data", "uploads")
+DEFAULT_CHUNK_SIZE = 50_000
+SCORE_MIN, SCORE_MAX = 0, 100
+
+
+class SchemaError(ValueError):
+    pass
+
+
+class StudentSchema:
+    """Column vocabularies and score ranges of ``students_cleaned.csv``."""
+
+    def __init__(self, vocab):
+        self.vocab = {col: list(cats) for col, cats in vocab.items()}
+        self.required = CATEGORICAL_COLS + SCORE_COLS
+        self.dtypes = {col: pd.CategoricalDtype(cats) for col, cats in self.vocab.items()}
+        self.dtypes.update({col: np.int8 for col in SCORE_COLS})
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame):
+        return cls({col: sorted(df[col].dropna().unique()) for col in CATEGORICAL_COLS})
+
+    def check_columns(self, columns):
+        missing = [col for col in self.required if col not in columns]
+        if missing:
+            raise SchemaError(f"Missing required columns: {', '.join(missing)}")
+
+    def validate(self, chunk: pd.DataFrame, row_offset: int = 0):
+        """Split a raw chunk into (valid, rejected) frames.
+
+        Valid rows are coerced to categoricals and int8 scores. Rejected rows
+        keep their raw values plus ``row`` (1-based data row) and ``reject_reason``.
+        """
+        conds, reasons = [], []
+        coerced = {}
+        for col, cats in self.vocab.items():
+            values = chunk[col].astype("string").str.strip()
+            cat = pd.Categorical(values, categories=cats)
+            coerced[col] = cat
+            conds.append(cat.codes < 0)
+            reasons.append(f"{col}: missing or unknown value")
+        for col in SCORE_COLS:
+            values = pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            coerced[col] = values
+            conds.append(np.isnan(values))
+            reasons.append(f"{col}: not a number")
+            conds.append((values < SCORE_MIN) | (values > SCORE_MAX) | (values % 1 != 0))
+            reasons.append(f"{col}: not a whole number in {SCORE_MIN}-{SCORE_MAX}")
+
+        bad = np.logical_or.reduce(conds) if conds else np.zeros(len(chunk), dtype=bool)
+        good = ~bad
+
+        valid = chunk.loc[good].copy()
+        for col in self.vocab:
+            valid[col] = coerced[col][good]
+        for col in SCORE_COLS:
+            valid[col] = coerced[col][good].astype(np.int8)
+
+        rejected = chunk.loc[bad].copy()
+        rejected.insert(0, "row", row_offset + np.flatnonzero(bad) + 1)
+        rejected["reject_reason"] = np.select(conds, reasons, default="")[bad] if conds else ""
+        return valid, rejected
+
+    def validate_records(self, records):
+        """Same rules as ``validate`` for a list of dicts, without building a frame.
+
+        Returns ``(clean, errors)``; ``errors`` holds ``{"row", "reason"}`` with
+        0-based row positions. Cheaper than ``validate`` for small API batches.
+        """
+        vocab = {col: set(cats) for col, cats in self.vocab.items()}
+        clean, errors = [], []
+        for i, record in enumerate(records):
+            out = dict(record)
+            reason = None
+            for col, cats in vocab.items():
+                value = record.get(col)
+                # Categories are strings; anything else (incl. lists/dicts, which are unhashable) is rejected
+                if not isinstance(value, str) or value.strip() not in cats:
+                    reason = f"{col}: missing or unknown value"
+                    break
+                out[col] = value.strip()
+            if reason is None:
+                for col in SCORE_COLS:
+                    try:
+                        value = float(record.get(col))
+                    except (TypeError, ValueError):
+                        value = np.nan
+                    if np.isnan(value):
+                        reason = f"{col}: not a number"
+                        break
+                    if not SCORE_MIN <= value <= SCORE_MAX or value % 1 != 0:
+                        reason = f"{col}: not a whole number in {SCORE_MIN}-{SCORE_MAX}"
+                        break
+                    out[col] = int(value)
+            if reason is None:
+                clean.append(out)
+            else:
+                errors.append({"row": i, "reason": reason})
+        return clean, errors
+
+
+@st.cache_resource
+def get_schema() -> StudentSchema:
+    return StudentSchema.from_frame(load_data())
+
+
+def _iter_excel(file, chunk_size):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows, [])]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_size:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        wb.close()
+
+
+def iter_raw_chunks(file, filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    if filename.lower().endswith(".csv"):
+        for chunk in pd.read_csv(file, chunksize=chunk_size):
+            yield chunk.rename(columns=str.strip)
+    else:
+        yield from _iter_excel(file, chunk_size)
+
+
+def _append_csv(df: pd.DataFrame, path: str, first: bool):
+    df.to_csv(path, mode="w" if first else "a", header=first, index=False)
+
+
+def new_upload_dir(root: str = UPLOAD_DIR) -> str:
+    """A fresh private directory under ``root``, so one session never reads another's files."""
+    os.makedirs(root, exist_ok=True)
+    return tempfile.mkdtemp(prefix="session_", dir=root)
+
+
+def ingest_upload(file, filename: str, out_dir: str, schema: StudentSchema = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, progress=None):
+    """Stream an upload through schema validation into ``out_dir``.
+
+    Only one chunk is held in memory at a time. Valid rows go to
+    ``<name>.csv`` and rejected rows to ``<name>_rejected.csv``.
+    ``progress`` is an optional ``callback(rows_seen)``.
+    """
+    schema = schema or get_schema()
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    valid_path = os.path.join(out_dir, f"{stem}.csv")
+    rejected_path = os.path.join(out_dir, f"{stem}_rejected.csv")
+
+    result = {"valid_path": valid_path, "rejected_path": None,
+              "rows": 0, "valid": 0, "rejected": 0, "preview": None}
+    for chunk in iter_raw_chunks(file, filename, chunk_size):
+        if result["rows"] == 0:
+            schema.check_columns(chunk.columns)
+        valid, rejected = schema.validate(chunk, row_offset=result["rows"])
+
+        _append_csv(valid, valid_path, first=result["rows"] == 0)
+        if len(rejected):
+            _append_csv(rejected, rejected_path, first=result["rejected_path"] is None)
+            result["rejected_path"] = rejected_path
+        if result["preview"] is None:
+            result["preview"] = valid.head()
+
+        result["rows"] += len(chunk)
+        result["valid"] += len(valid)
+        result["rejected"] += len(rejected)
+        if progress is not None:
+            progress(result["rows"])
+
+    if result["rows"] == 0:
+        raise SchemaError("Uploaded file has no data rows")
+    if result["rejected_path"] is None and os.path.exists(rejected_path):
+        os.remove(rejected_path)
+    return result
+
+
+def read_validated(path: str, schema: StudentSchema = None) -> pd.DataFrame:
+    schema = schema or get_schema()
+    return pd.read_csv(path, dtype=schema.dtypes)
+
+
+def iter_validated(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, schema: StudentSchema = None):
+    """``read_validated`` one chunk at a time; the index keeps counting across chunks."""
+    schema = schema or get_schema()
+    yield from pd.read_csv(path, dtype=schema.dtypes, chunksize=chunk_size)
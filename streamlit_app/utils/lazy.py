@@ -0,0 +1,62 @@
+# utils/lazy.py
+
+import importlib
+import sys
+import threading
+import time
+
+# Seconds spent importing each lazily loaded module, in load order
+LOAD_TIMES = {}
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported on first attribute access.
+
+    ``shap = lazy_import("shap")`` at the top of a page costs nothing; the
+    first ``shap.plots...`` imports it, and later accesses go straight to the
+    real module.
+    """
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with _lock:
+                module = self.__dict__["_module"]
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    LOAD_TIMES.setdefault(self._name, time.perf_counter() - start)
+                    self.__dict__["_module"] = module
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__["_module"] is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name: str):
+    """The module itself if it is already imported, otherwise a ``LazyModule``."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+# Heavy libraries the pages only need on some code paths (cold import cost on top of streamlit)
+shap = lazy_import("shap")                  # ~3 s
+plt = lazy_import("matplotlib.pyplot")      # ~0.5 s
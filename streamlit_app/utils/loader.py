@@ -1,20 +1,139 @@
 import pandas as pd
-import joblib
 import streamlit as st
 import os
+import hashlib
+import json
+
+from .telemetry import timed
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DATA_PATH = os.path.join(PROJECT_ROOT, "data", "cleaned", "students_cleaned.csv")
+STORE_PATH = os.path.join(PROJECT_ROOT, "data", "cleaned", "students_cleaned.arrow")
+# Written by utils.cleaning; preferred over the single CSV when present
+PARTITION_DIR = os.path.join(PROJECT_ROOT, "data", "cleaned", "partitions")
+PARTITION_MANIFEST = "_manifest.json"
+
+CATEGORICAL_COLS = ["gender", "race/ethnicity", "parent_edu", "lunch", "prep_course"]
+SCORE_COLS = ["math_score", "reading_score", "writing_score"]
+
+# Scores fit in int8, but int16 leaves headroom for sums like math + reading
+STUDENT_DTYPES = {col: "category" for col in CATEGORICAL_COLS + ["performance"]}
+STUDENT_DTYPES.update({col: "int16" for col in SCORE_COLS})
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pyarrow ships with streamlit, but keep the CSV path working
+    pa = None
 
-@st.cache_resource
 def load_model():
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-    model_path = os.path.join(project_root, "models", "decision_tree_model.pkl")
-    encoder_path = os.path.join(project_root, "models", "performance_label_encoder.pkl")
-    
-    model = joblib.load(model_path)
-    encoder = joblib.load(encoder_path)
-    return model, encoder
+    # Shared, hash-checked and hot-reloaded through the model registry
+    from .model_registry import load_artifact
 
-@st.cache_data
+    return load_artifact("decision_tree_model.pkl").model, load_artifact("performance_label_encoder.pkl").model
+
+def load_risk_model():
+    from .model_registry import load_artifact
+
+    return load_artifact("at_risk_model.pkl").model
+
+def dataset_version(df: pd.DataFrame) -> str:
+    """Content hash of a roster; identical data gives the same version across reruns."""
+    h = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    h.update(",".join(map(str, df.columns)).encode())
+    return h.hexdigest()[:16]
+
+def read_csv_typed(csv_path: str) -> pd.DataFrame:
+    header = pd.read_csv(csv_path, nrows=0).columns
+    return pd.read_csv(csv_path, dtype={c: t for c, t in STUDENT_DTYPES.items() if c in header})
+
+def _source_signature(csv_path: str) -> bytes:
+    stat = os.stat(csv_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}".encode()
+
+def build_columnar_store(csv_path: str = DATA_PATH, store_path: str = STORE_PATH):
+    # Arrow IPC (uncompressed) so reads can memory-map; categoricals become dictionary arrays
+    table = pa.Table.from_pandas(read_csv_typed(csv_path), preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                           b"source_signature": _source_signature(csv_path)})
+    tmp_path = f"{store_path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, store_path)
+
+def _store_is_fresh(csv_path: str, store_path: str) -> bool:
+    if not os.path.exists(store_path):
+        return False
+    try:
+        with pa.memory_map(store_path, "r") as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except pa.ArrowInvalid:
+        return False
+    return metadata.get(b"source_signature") == _source_signature(csv_path)
+
+def _to_pandas(table) -> pd.DataFrame:
+    # One block per column, so integer columns and category codes stay read-only
+    # views of the memory map instead of being consolidated into fresh arrays
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+def read_columnar_store(store_path: str = STORE_PATH) -> pd.DataFrame:
+    with pa.memory_map(store_path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return _to_pandas(table)
+
+def partition_paths(partition_dir: str = PARTITION_DIR) -> list:
+    """Partition files in dataset order, or ``[]`` when the pipeline has not run."""
+    manifest_path = os.path.join(partition_dir, PARTITION_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return []
+    with open(manifest_path) as f:
+        sources = json.load(f)["sources"]
+    return [os.path.join(partition_dir, block["partition"])
+            for name in sorted(sources) for block in sources[name]["blocks"] if block["partition"]]
+
+def read_partitions(partition_dir: str = PARTITION_DIR) -> pd.DataFrame:
+    tables = []
+    for path in partition_paths(partition_dir):
+        with pa.memory_map(path, "r") as source:
+            tables.append(pa.ipc.open_file(source).read_all())
+    # Columns spanning several partitions are copied once to join their chunks
+    df = _to_pandas(pa.concat_tables(tables))
+    return df.astype({c: t for c, t in STUDENT_DTYPES.items() if c in df.columns})
+
+def load_student_frame(csv_path: str = DATA_PATH, store_path: str = STORE_PATH,
+                       partition_dir: str = PARTITION_DIR) -> pd.DataFrame:
+    if pa is None:
+        return read_csv_typed(csv_path)
+    if partition_paths(partition_dir):
+        return read_partitions(partition_dir)
+    try:
+        if not _store_is_fresh(csv_path, store_path):
+            build_columnar_store(csv_path, store_path)
+    except OSError:
+        # Read-only deployments still work, just without the columnar store
+        return read_csv_typed(csv_path)
+    return read_columnar_store(store_path)
+
+def _data_signature() -> bytes:
+    manifest_path = os.path.join(PARTITION_DIR, PARTITION_MANIFEST)
+    return _source_signature(manifest_path if os.path.exists(manifest_path) else DATA_PATH)
+
+# A resource, not cache_data: cache_data would unpickle a private heap copy on every call
+@st.cache_resource(max_entries=1)
+@timed("load_data.read")
+def _load_data(signature: bytes):
+    return load_student_frame()
+
+@timed("load_data")
 def load_data():
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-    data_path = os.path.join(project_root, "data", "cleaned", "students_cleaned.csv")
-    return pd.read_csv(data_path)
+    # Re-read when the cleaning pipeline publishes new partitions (or the CSV changes).
+    # Shallow copy: with copy-on-write, columns a page adds or edits never reach the shared frame
+    return _load_data(_data_signature()).copy(deep=False)
+
+@st.cache_data
+def _data_version(signature: bytes) -> str:
+    return dataset_version(_load_data(signature))
+
+def data_version() -> str:
+    """``dataset_version`` of what ``load_data`` returns, hashed once per published dataset."""
+    return _data_version(_data_signature())
@@ -0,0 +1,170 @@
+# utils/microbatch.py
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .shap_helper import explain_with_info
+from .telemetry import telemetry
+
+# Overridable per deployment without code changes
+MAX_BATCH_SIZE = int(os.environ.get("MICROBATCH_MAX_SIZE", 64))
+MAX_WAIT_MS = float(os.environ.get("MICROBATCH_MAX_WAIT_MS", 5))
+# An idle worker exits and is restarted by the next call, so evicted batchers don't keep a thread
+IDLE_EXIT_S = float(os.environ.get("MICROBATCH_IDLE_EXIT_S", 60))
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-item calls into one vectorized ``fn(items)`` call.
+
+    Callers (Streamlit session threads, or coroutines via ``acall``) enqueue an
+    item and block on a future. A worker thread takes the first waiting item,
+    collects more for up to ``max_wait_ms`` or until ``max_batch_size``, runs
+    ``fn`` once and hands each caller its own result. ``fn`` must return one
+    result per item, in order; if it raises, every caller in the batch gets the
+    exception. Only the worker thread calls ``fn``. With a ``step`` name, each
+    call's latency (queue wait included) is recorded in ``utils.telemetry``.
+
+    The wait window is only spent under load: when other calls are already
+    queued, or the previous batch held more than one call. A lone user (even
+    one calling back to back) never pays it. The window is measured from the
+    oldest call's arrival, so no caller waits longer than ``max_wait_ms``.
+    """
+
+    def __init__(self, fn, max_batch_size: int = None, max_wait_ms: float = None, name: str = "batch",
+                 step: str = None):
+        self.fn = fn
+        self.step = step
+        self.max_batch_size = max_batch_size or MAX_BATCH_SIZE
+        self.max_wait = (MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.name = name
+        self.stats = {"calls": 0, "batches": 0, "largest_batch": 0}
+        self._queue = queue.SimpleQueue()
+        self._last_batch_size = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=f"microbatch-{self.name}", daemon=True)
+                    self._thread.start()
+
+    def submit(self, item) -> Future:
+        future = Future()
+        # Enqueue before checking the worker: an exiting worker re-checks the queue under the lock
+        self._queue.put((item, future, time.perf_counter()))
+        self._ensure_worker()
+        return future
+
+    def __call__(self, item, timeout: float = None):
+        if self.step is None:
+            return self.submit(item).result(timeout)
+        with telemetry.timer(self.step):
+            return self.submit(item).result(timeout)
+
+    def call_with_info(self, item, timeout: float = None):
+        """Return ``(result, info)``; ``info`` has the batch size, queue wait and run time."""
+        if self.step is None:
+            future = self.submit(item)
+            return future.result(timeout), future.batch_info
+        with telemetry.timer(self.step):
+            future = self.submit(item)
+            return future.result(timeout), future.batch_info
+
+    async def acall(self, item):
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=IDLE_EXIT_S)]
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+            self._drain(batch, deadline=None)
+            if len(batch) > 1 or self._last_batch_size > 1:
+                self._drain(batch, deadline=batch[0][2] + self.max_wait)
+            self._last_batch_size = len(batch)
+            self._execute(batch)
+
+    def _drain(self, batch, deadline):
+        # deadline=None: take only what is already queued
+        while len(batch) < self.max_batch_size:
+            remaining = 0 if deadline is None else deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                return
+
+    def _execute(self, batch):
+        items = [item for item, _, _ in batch]
+        start = time.perf_counter()
+        try:
+            results = self.fn(items)
+            if len(results) != len(items):
+                raise ValueError(f"{self.name}: fn returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        run_ms = (time.perf_counter() - start) * 1e3
+
+        self.stats["calls"] += len(batch)
+        self.stats["batches"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        for (_, future, queued), result in zip(batch, results):
+            future.batch_info = {"batch_size": len(batch), "wait_ms": (start - queued) * 1e3, "run_ms": run_ms}
+            future.set_result(result)
+
+
+def _stack_rows(rows) -> np.ndarray:
+    return np.vstack([r.to_numpy(dtype=np.float64) if isinstance(r, pd.DataFrame)
+                      else np.asarray(r, dtype=np.float64).reshape(1, -1) for r in rows])
+
+
+@st.cache_resource(max_entries=4)
+def get_proba_batcher(key: str, _model, feature_names: tuple = None) -> MicroBatcher:
+    """``predict_proba`` over encoded rows (1-D arrays or one-row frames), one row of probabilities per call.
+
+    ``key`` identifies the model version (e.g. path and sha256) since the model itself is not hashed;
+    a few entries cover each model's current and previous version across a swap.
+    """
+    def predict(rows):
+        X = _stack_rows(rows)
+        if feature_names is not None:
+            X = pd.DataFrame(X, columns=list(feature_names), copy=False)
+        return list(_model.predict_proba(X))
+
+    return MicroBatcher(predict, name=f"proba:{os.path.basename(key)}", step="predict_proba")
+
+
+@st.cache_resource
+def get_explain_batcher(model_path: str) -> MicroBatcher:
+    """SHAP over one-row encoded frames; each caller gets its own one-row ``Explanation``."""
+    import shap
+
+    def explain(frames):
+        X = pd.DataFrame(_stack_rows(frames), columns=frames[0].columns, copy=False)
+        explanation, _ = explain_with_info(model_path, X)
+        values = explanation.values
+        base = np.asarray(explanation.base_values).reshape(len(X), -1)
+        data = X.to_numpy()
+        names = list(X.columns)
+        # Building each row directly is ~4x cheaper than slicing the batch Explanation
+        return [shap.Explanation(values=values[i:i + 1], base_values=base[i:i + 1].squeeze(-1) if base.shape[1] == 1
+                                 else base[i:i + 1], data=data[i:i + 1], feature_names=names)
+                for i in range(len(X))]
+
+    return MicroBatcher(explain, name=f"shap:{os.path.basename(model_path)}", step="shap.explain")
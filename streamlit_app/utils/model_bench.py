@@ -0,0 +1,165 @@
+# utils/model_bench.py
+
+import hashlib
+import multiprocessing
+import os
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.tree import DecisionTreeClassifier
+
+from .loader import PROJECT_ROOT
+
+CACHE_DIR = os.path.join(PROJECT_ROOT, "models", "comparison_cache")
+
+CANDIDATES = {
+    "Logistic Regression": (LogisticRegression, {"max_iter": 1000}),
+    "Decision Tree": (DecisionTreeClassifier, {"random_state": 42}),
+    "Random Forest": (RandomForestClassifier, {"random_state": 42}),
+}
+
+
+def _proc_status_mb(field: str):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak() -> bool:
+    # Linux: writing 5 to clear_refs resets VmHWM (peak RSS) to the current RSS
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _traced_peak_mb(cls, params, X_train, y_train, X_test):
+    # Fallback where the RSS peak can't be reset: tracemalloc slows fitting
+    # 1.5-2x, so it costs a second, untimed fit
+    tracemalloc.start()
+    try:
+        cls(**params).fit(X_train, y_train).predict(X_test)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def _fit_eval(name, cls, params, fold, X_train, y_train, X_test, y_test, keep_model):
+    # Runs inside a worker process; the holdout task also records how far RSS
+    # peaked above its starting point during the same (timed) fit + predict
+    track_peak = keep_model and _reset_peak()
+    rss = _proc_status_mb("VmRSS:") if track_peak else None
+    model = cls(**params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_s = time.perf_counter() - start
+    if track_peak:
+        peak_mb = max(_proc_status_mb("VmHWM:") - rss, 0.0)
+    else:
+        peak_mb = _traced_peak_mb(cls, params, X_train, y_train, X_test) if keep_model else np.nan
+    return {
+        "Model": name, "fold": fold,
+        "accuracy": accuracy_score(y_test, y_pred),
+        "fit_s": fit_s, "predict_s": predict_s,
+        "peak_mb": peak_mb,
+        "y_pred": y_pred if keep_model else None,
+        "model": model if keep_model else None,
+    }
+
+
+def cache_key(X: pd.DataFrame, y: pd.Series, candidates: dict, cv: int) -> str:
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    h.update(pd.util.hash_pandas_object(y, index=False).to_numpy().tobytes())
+    h.update(",".join(X.columns).encode())
+    for name, (cls, params) in sorted(candidates.items()):
+        h.update(f"{name}|{cls.__module__}.{cls.__name__}|{sorted(params.items())}".encode())
+    h.update(f"cv={cv}".encode())
+    return h.hexdigest()[:24]
+
+
+def run_comparison(X: pd.DataFrame, y: pd.Series, candidates: dict = None, cv: int = 0,
+                   n_jobs: int = None, test_size: float = 0.2, random_state: int = 42):
+    """Train every candidate on the stratified holdout split and, when ``cv`` > 1,
+    on each of ``cv`` stratified folds. Every (model, fold) fit is its own task in
+    a process pool. Holdout rows carry "Peak Memory (MB)": peak RSS growth over
+    the fit and predict, which is a lower bound when a worker reuses freed memory.
+    """
+    candidates = candidates or CANDIDATES
+    X_train, X_test, y_train, y_test = train_test_split(X, y, stratify=y, test_size=test_size,
+                                                        random_state=random_state)
+    tasks = [(name, cls, params, "holdout", X_train, y_train, X_test, y_test, True)
+             for name, (cls, params) in candidates.items()]
+    if cv and cv > 1:
+        folds = StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state).split(X, y)
+        for k, (tr, te) in enumerate(folds):
+            tasks += [(name, cls, params, k, X.iloc[tr], y.iloc[tr], X.iloc[te], y.iloc[te], False)
+                      for name, (cls, params) in candidates.items()]
+
+    n_jobs = n_jobs or min(len(tasks), os.cpu_count() or 1)
+    if n_jobs > 1:
+        # Spawned, not forked: the Streamlit server that calls this runs threads
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+            runs = list(pool.map(_fit_eval, *zip(*tasks)))
+    else:
+        runs = [_fit_eval(*task) for task in tasks]
+
+    holdout = {r["Model"]: r for r in runs if r["fold"] == "holdout"}
+    per_fold = pd.DataFrame([{k: v for k, v in r.items() if k not in ("y_pred", "model")} for r in runs])
+
+    summary = []
+    for name in candidates:
+        h = holdout[name]
+        row = {"Model": name, "Accuracy": round(h["accuracy"], 3),
+               "Fit Time (s)": round(h["fit_s"], 4), "Predict Time (ms)": round(h["predict_s"] * 1e3, 3),
+               "Peak Memory (MB)": round(h["peak_mb"], 2)}
+        cv_runs = per_fold[(per_fold["Model"] == name) & (per_fold["fold"] != "holdout")]
+        if len(cv_runs):
+            row["CV Accuracy"] = round(cv_runs["accuracy"].mean(), 3)
+            row["CV Std"] = round(cv_runs["accuracy"].std(ddof=0), 3)
+        summary.append(row)
+
+    return {
+        "summary": pd.DataFrame(summary).sort_values(by="Accuracy", ascending=False).reset_index(drop=True),
+        "per_fold": per_fold,
+        "models": {name: r["model"] for name, r in holdout.items()},
+        "y_test": np.asarray(y_test),
+        "y_pred": {name: r["y_pred"] for name, r in holdout.items()},
+    }
+
+
+def load_or_run_comparison(X: pd.DataFrame, y: pd.Series, candidates: dict = None, cv: int = 0,
+                           n_jobs: int = None, cache_dir: str = CACHE_DIR):
+    """Return cached comparison results for this data + hyperparameters, training only on a miss."""
+    candidates = candidates or CANDIDATES
+    path = os.path.join(cache_dir, f"{cache_key(X, y, candidates, cv)}.joblib")
+    if os.path.exists(path):
+        result = joblib.load(path)
+        result["cached"] = True
+        return result
+
+    result = run_comparison(X, y, candidates, cv=cv, n_jobs=n_jobs)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(result, tmp_path)
+    os.replace(tmp_path, path)
+    result["cached"] = False
+    return result
@@ -0,0 +1,202 @@
+# utils/model_registry.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+import warnings
+
+import joblib
+import streamlit as st
+
+from .loader import PROJECT_ROOT
+
+MODELS_DIR = os.path.join(PROJECT_ROOT, "models")
+MANIFEST_PATH = os.path.join(MODELS_DIR, "manifest.json")
+# Shipped artifacts; derived caches under models/ (clusters, SHAP stores) are not tracked
+ARTIFACTS = ("decision_tree_model.pkl", "performance_label_encoder.pkl", "at_risk_model.pkl")
+# Smaller files are read into memory; mapping them costs more than it saves
+MMAP_MIN_BYTES = 1 << 20
+# Seconds between stat() checks for a changed file; keeps the hot path off the filesystem
+CHECK_INTERVAL = float(os.environ.get("MODEL_CHECK_INTERVAL", 2.0))
+
+
+class IntegrityError(ValueError):
+    pass
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _signature(path: str):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ModelArtifact:
+    """One loaded version of a model file."""
+
+    def __init__(self, name, path, model, sha256, version, mmap):
+        self.name = name
+        self.path = path
+        self.model = model
+        self.sha256 = sha256
+        self.version = version
+        self.mmap = mmap
+        self.loaded_at = time.time()
+
+
+class ModelRegistry:
+    """Lazily loaded, hash-checked model artifacts that follow their files on disk.
+
+    Each file under ``models/`` is loaded on first use and shared by every
+    caller in the process. Files of ``MMAP_MIN_BYTES`` or more are opened with
+    ``joblib`` ``mmap_mode="r"``, so numpy arrays stored by ``joblib.dump``
+    are paged in from the OS cache and shared between worker processes
+    instead of copied into each one.
+
+    At most every ``check_interval`` seconds, a lookup stats the file (and
+    ``manifest.json``). When either has changed, the file is re-hashed, and a
+    new SHA-256 is loaded and swapped in. Callers that already hold the old
+    object keep using it. If ``manifest.json`` lists a different hash for the
+    file, or the new file does not load, the current version stays in service
+    and the reason is kept in ``rejected``.
+    """
+
+    def __init__(self, models_dir: str = MODELS_DIR, manifest_path: str = MANIFEST_PATH,
+                 check_interval: float = CHECK_INTERVAL, mmap_min_bytes: int = MMAP_MIN_BYTES):
+        self.models_dir = models_dir
+        self.manifest_path = manifest_path
+        self.check_interval = check_interval
+        self.mmap_min_bytes = mmap_min_bytes
+        self.rejected = {}
+        self._entries = {}
+        self._checked = {}
+        self._signatures = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, name: str) -> str:
+        return os.path.abspath(os.path.join(self.models_dir, name))
+
+    def _name(self, path: str) -> str:
+        # Manifest keys are paths relative to models/, however the caller spelled the path
+        return os.path.relpath(path, self.models_dir).replace(os.sep, "/")
+
+    def _manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def artifact(self, name: str) -> ModelArtifact:
+        """``name`` is relative to ``models/`` or an absolute path."""
+        path = self.resolve(name)
+        entry = self._entries.get(path)
+        now = time.monotonic()
+        if entry is not None and now - self._checked[path] < self.check_interval:
+            return entry
+        with self._lock:
+            lock = self._locks.setdefault(path, threading.Lock())
+        with lock:
+            entry = self._entries.get(path)
+            signature = (_signature(path), _signature(self.manifest_path))
+            if entry is None or self._signatures[path] != signature:
+                entry = self._refresh(self._name(path), path, entry)
+                self._signatures[path] = signature
+            self._checked[path] = now
+            return entry
+
+    def _refresh(self, name: str, path: str, current: ModelArtifact) -> ModelArtifact:
+        try:
+            sha256 = file_hash(path)
+            if current is not None and sha256 == current.sha256:
+                # Touched or manifest edited, same content
+                self.rejected.pop(name, None)
+                return current
+            expected = self._manifest().get(name)
+            if expected is not None and expected != sha256:
+                raise IntegrityError(f"{name}: sha256 {sha256[:12]} does not match manifest {expected[:12]}")
+            mmap = os.path.getsize(path) >= self.mmap_min_bytes
+            model = joblib.load(path, mmap_mode="r" if mmap else None)
+        except Exception as e:
+            if current is None:
+                raise
+            self.rejected[name] = str(e)
+            warnings.warn(f"Keeping {name} version {current.sha256[:12]}: {e}")
+            return current
+        self.rejected.pop(name, None)
+        entry = ModelArtifact(name, path, model, sha256, (current.version + 1) if current else 1, mmap)
+        self._entries[path] = entry
+        return entry
+
+    def model(self, name: str):
+        return self.artifact(name).model
+
+    def versions(self, *names) -> tuple:
+        return tuple(self.artifact(name).sha256 for name in names)
+
+    def status(self) -> list:
+        return [{"name": e.name, "sha256": e.sha256[:12], "version": e.version, "mmap": e.mmap,
+                 "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(e.loaded_at)),
+                 "rejected": self.rejected.get(e.name)}
+                for e in self._entries.values()]
+
+    def save(self, name: str, obj) -> str:
+        """Atomically write ``obj`` (uncompressed, so it can be memory-mapped) and record its hash."""
+        path = self.resolve(name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, path)
+        return self.write_manifest([name])[name]
+
+    def write_manifest(self, names=None) -> dict:
+        """Record the current hash of ``names`` (default: ``ARTIFACTS`` plus any listed) in ``manifest.json``."""
+        manifest = self._manifest()
+        if names is None:
+            names = sorted(set(ARTIFACTS) | set(manifest))
+        manifest.update({name: file_hash(self.resolve(name)) for name in names})
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp_path, self.manifest_path)
+        return manifest
+
+    def verify(self) -> dict:
+        """``{name: True/False}`` for every manifest entry against the file on disk."""
+        return {name: os.path.exists(self.resolve(name)) and file_hash(self.resolve(name)) == expected
+                for name, expected in self._manifest().items()}
+
+
+@st.cache_resource
+def get_model_registry() -> ModelRegistry:
+    return ModelRegistry()
+
+
+def load_artifact(name: str) -> ModelArtifact:
+    return get_model_registry().artifact(name)
+
+
+if __name__ == "__main__":
+    # python -m utils.model_registry [--write-manifest]  (from streamlit_app/)
+    import sys
+
+    registry = ModelRegistry()
+    if "--write-manifest" in sys.argv:
+        for name, sha256 in registry.write_manifest().items():
+            print(f"{sha256}  {name}")
+    else:
+        results = registry.verify()
+        for name, ok in results.items():
+            print(f"{'ok' if ok else 'MISMATCH':>8}  {name}")
+        sys.exit(0 if all(results.values()) else 1)
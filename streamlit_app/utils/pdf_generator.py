@@ -1,46 +1,106 @@
-import pdfkit
+import multiprocessing
 import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
-import tempfile
 
-# ✅ Configure path to wkhtmltopdf
-wkhtml_path = r"E:\UTA MSDS\wkhtmltopdf\bin\wkhtmltopdf.exe"
-config = pdfkit.configuration(wkhtmltopdf=wkhtml_path)
+from .lazy import lazy_import
 
-def generate_risk_report(student_info: pd.DataFrame, prediction_label: str, shap_table: pd.DataFrame, output_path: str = "student_risk_report.pdf"):
-    student_html = student_info.to_html(index=False, border=0)
-    shap_html = shap_table.to_html(index=False, border=0)
-
-    html_content = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; padding: 20px; }}
-            h2 {{ color: #2c3e50; }}
-            table {{ width: 100%; border-collapse: collapse; margin-top: 10px; }}
-            th, td {{ border: 1px solid #ccc; padding: 8px; text-align: left; }}
-            th {{ background-color: #f4f4f4; }}
-        </style>
-    </head>
-    <body>
-        <h2>📋 Student Risk Prediction Report</h2>
-        <p><strong>Prediction Status:</strong> {prediction_label}</p>
-
-        <h3>🧍 Student Input Information</h3>
-        {student_html}
-
-        <h3>📌 Feature Contributions (SHAP)</h3>
-        {shap_html}
-
-        <hr>
-        <p style="font-size: 12px;'>Generated by the Student Performance Dashboard © 2025</p>
-    </body>
-    </html>
-    """
+# Only imported when a report is actually rendered
+fpdf = lazy_import("fpdf")
+
+# Core PDF fonts are Latin-1 only, so emoji in labels are dropped when rendering
+def _latin1(value) -> str:
+    return str(value).encode("latin-1", "ignore").decode("latin-1").strip()
+
+def _fmt(value) -> str:
+    return _latin1(f"{value:.4f}" if isinstance(value, float) else value)
+
+def _table(pdf, headings, rows, col_widths=None):
+    pdf.set_font("Helvetica", size=9)
+    heading = fpdf.FontFace(emphasis="BOLD", fill_color=(242, 242, 242))
+    with pdf.table(line_height=6, headings_style=heading, text_align="LEFT", col_widths=col_widths) as table:
+        table.row([_latin1(h) for h in headings])
+        for values in rows:
+            table.row([_fmt(v) for v in values])
+
+def render_risk_report(student_info: pd.DataFrame, prediction_label: str, shap_table: pd.DataFrame) -> bytes:
+    pdf = fpdf.FPDF(format="A4")
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    pdf.set_font("Helvetica", style="B", size=16)
+    pdf.set_text_color(44, 62, 80)
+    pdf.cell(0, 10, "Student Risk Prediction Report", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_text_color(0, 0, 0)
 
-    tmp_html_path = os.path.join(tempfile.gettempdir(), "report.html")
-    with open(tmp_html_path, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    pdf.set_font("Helvetica", size=11)
+    pdf.cell(0, 8, f"Prediction Status: {_latin1(prediction_label)}", new_x="LMARGIN", new_y="NEXT")
 
-    pdfkit.from_file(tmp_html_path, output_path, configuration=config)
+    pdf.ln(2)
+    pdf.set_font("Helvetica", style="B", size=13)
+    pdf.cell(0, 8, "Student Input Information", new_x="LMARGIN", new_y="NEXT")
+    # A single student reads better as a field/value list than as one very wide row
+    if len(student_info) == 1:
+        _table(pdf, ["Field", "Value"], student_info.iloc[0].items(), col_widths=(1, 2))
+    else:
+        _table(pdf, student_info.columns, student_info.itertuples(index=False))
+
+    pdf.ln(4)
+    pdf.set_font("Helvetica", style="B", size=13)
+    pdf.cell(0, 8, "Feature Contributions (SHAP)", new_x="LMARGIN", new_y="NEXT")
+    _table(pdf, shap_table.columns, shap_table.itertuples(index=False), col_widths=(2, 1))
+
+    pdf.ln(6)
+    pdf.set_font("Helvetica", size=8)
+    pdf.cell(0, 6, "Generated by the Student Performance Dashboard (c) 2025")
+    return bytes(pdf.output())
+
+def generate_risk_report(student_info: pd.DataFrame, prediction_label: str, shap_table: pd.DataFrame, output_path: str = "student_risk_report.pdf"):
+    with open(output_path, "wb") as f:
+        f.write(render_risk_report(student_info, prediction_label, shap_table))
     return output_path
+
+def _render_job(job):
+    name, student_info, prediction_label, shap_table = job
+    return name, render_risk_report(student_info, prediction_label, shap_table)
+
+def bulk_risk_reports(jobs, fileobj, n_jobs: int = None, progress=None, window: int = None) -> int:
+    """Render ``(filename, student_info, label, shap_table)`` jobs in a worker pool,
+    writing each PDF into a ZIP on ``fileobj`` as soon as it is ready.
+
+    At most ``window`` jobs (default 4 per worker) are in flight, so ``jobs`` can be
+    a lazy generator over any number of students. ``progress`` is an optional
+    ``callback(done)``. Returns the number of reports written.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    window = window or 4 * n_jobs
+    done = 0
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        if n_jobs > 1:
+            jobs = iter(jobs)
+            pending = deque()
+            # Spawned, not forked: page 8 calls this from the multi-threaded Streamlit server
+            with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+                while True:
+                    for job in jobs:
+                        pending.append(pool.submit(_render_job, job))
+                        if len(pending) >= window:
+                            break
+                    if not pending:
+                        break
+                    name, pdf_bytes = pending.popleft().result()
+                    zf.writestr(name, pdf_bytes)
+                    done += 1
+                    if progress is not None:
+                        progress(done)
+        else:
+            for job in jobs:
+                name, pdf_bytes = _render_job(job)
+                zf.writestr(name, pdf_bytes)
+                done += 1
+                if progress is not None:
+                    progress(done)
+    return done
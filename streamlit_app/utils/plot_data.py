@@ -0,0 +1,116 @@
+# utils/plot_data.py
+
+import numpy as np
+import pandas as pd
+
+# Row budgets per chart type before we stop sending raw points to the browser
+MAX_SCATTER_POINTS = 5_000
+MAX_3D_POINTS = 10_000
+MAX_PARALLEL_LINES = 3_000
+MAX_HISTOGRAM_ROWS = 20_000
+MAX_BOX_ROWS = 20_000
+
+
+class PlotData:
+    """Rows (or bins) to hand to Plotly, plus how many source rows they stand for."""
+
+    def __init__(self, frame: pd.DataFrame, total: int, kind: str):
+        self.frame = frame
+        self.total = total
+        self.kind = kind  # "raw", "sample", "binned" or "summary"
+
+    @property
+    def shown(self) -> int:
+        return len(self.frame) if self.kind in ("raw", "sample") else self.total
+
+    @property
+    def aggregated(self) -> int:
+        return self.total - len(self.frame) if self.kind != "raw" else 0
+
+    def caption(self) -> str:
+        if self.kind == "raw":
+            return f"Showing all {self.total:,} students."
+        if self.kind == "sample":
+            return (f"Showing a stratified sample of {len(self.frame):,} of {self.total:,} students "
+                    f"({self.aggregated:,} points sampled out; class proportions preserved).")
+        if self.kind == "summary":
+            return (f"{self.total:,} students summarised as {len(self.frame):,} boxes "
+                    f"(quartiles, 1.5 × IQR whiskers and mean; outliers not drawn).")
+        return f"{self.total:,} students pre-binned into {len(self.frame):,} bars."
+
+
+def stratified_sample(df: pd.DataFrame, by: str, max_points: int, random_state: int = 42) -> PlotData:
+    """Proportional per-class sample of at most ~``max_points`` rows, or ``df`` itself if it fits."""
+    if len(df) <= max_points:
+        return PlotData(df, len(df), "raw")
+    frac = max_points / len(df)
+    sample = df.groupby(by, observed=True, group_keys=False).sample(frac=frac, random_state=random_state)
+    return PlotData(sample, len(df), "sample")
+
+
+def binned_histogram(df: pd.DataFrame, x: str, color: str = None, nbins: int = 20,
+                     value_range=(0, 100)) -> PlotData:
+    """Pre-binned counts (optionally per ``color`` group) for ``px.bar``."""
+    edges = np.linspace(value_range[0], value_range[1], nbins + 1)
+    centers = (edges[:-1] + edges[1:]) / 2
+    bins = np.clip(np.searchsorted(edges, df[x].to_numpy(), side="right") - 1, 0, nbins - 1)
+    if color is None:
+        counts = np.bincount(bins, minlength=nbins)
+        frame = pd.DataFrame({x: centers, "count": counts})
+    else:
+        groups = pd.Categorical(df[color])
+        counts = np.bincount(groups.codes * nbins + bins, minlength=len(groups.categories) * nbins)
+        frame = pd.DataFrame({
+            color: np.repeat(groups.categories.to_numpy(), nbins),
+            x: np.tile(centers, len(groups.categories)),
+            "count": counts,
+        })
+    frame = frame[frame["count"] > 0].reset_index(drop=True)
+    frame.attrs["bin_width"] = edges[1] - edges[0]
+    return PlotData(frame, len(df), "binned")
+
+
+def binned_2d(df: pd.DataFrame, x: str, y: str, bins: int = 50, value_range=(0, 100)) -> pd.DataFrame:
+    """2-D count grid (rows = ``y`` bins, columns = ``x`` bins) for ``go.Heatmap``."""
+    counts, x_edges, y_edges = np.histogram2d(df[x].to_numpy(), df[y].to_numpy(), bins=bins,
+                                              range=[value_range, value_range])
+    return pd.DataFrame(counts.T, index=(y_edges[:-1] + y_edges[1:]) / 2, columns=(x_edges[:-1] + x_edges[1:]) / 2)
+
+
+def histogram_data(df: pd.DataFrame, x: str, color: str = None, nbins: int = 20,
+                   max_rows: int = MAX_HISTOGRAM_ROWS) -> PlotData:
+    """Raw rows while they are cheap to ship, pre-binned counts beyond ``max_rows``."""
+    if len(df) <= max_rows:
+        return PlotData(df, len(df), "raw")
+    return binned_histogram(df, x, color=color, nbins=nbins)
+
+
+def box_summary(df: pd.DataFrame, x: str, y: str, color: str = None) -> PlotData:
+    """Per-group quartiles, Tukey fences, mean and count for ``go.Box(q1=..., ...)``.
+
+    Quartiles use linear interpolation like Plotly's default; fences are the
+    most extreme values within 1.5 × IQR of the box, as Plotly draws them.
+    """
+    keys = [x] if color is None else [x, color]
+    groups = df.groupby(keys, observed=True, sort=True)
+    frame = groups[y].quantile([0.25, 0.5, 0.75]).unstack()
+    frame.columns = ["q1", "median", "q3"]
+    frame["mean"] = groups[y].mean()
+    frame["count"] = groups[y].size()
+
+    gid = groups.ngroup().to_numpy()
+    values = df[y].to_numpy(dtype=np.float64)
+    iqr = (frame["q3"] - frame["q1"]).to_numpy()
+    low = (frame["q1"].to_numpy() - 1.5 * iqr)[gid]
+    high = (frame["q3"].to_numpy() + 1.5 * iqr)[gid]
+    inside = (values >= low) & (values <= high)
+    frame["lowerfence"] = pd.Series(np.where(inside, values, np.inf)).groupby(gid).min().to_numpy()
+    frame["upperfence"] = pd.Series(np.where(inside, values, -np.inf)).groupby(gid).max().to_numpy()
+    return PlotData(frame.reset_index(), len(df), "summary")
+
+
+def box_data(df: pd.DataFrame, x: str, y: str, color: str = None, max_rows: int = MAX_BOX_ROWS) -> PlotData:
+    """Raw rows (so outliers are drawn) while they are cheap to ship, ``box_summary`` beyond ``max_rows``."""
+    if len(df) <= max_rows:
+        return PlotData(df, len(df), "raw")
+    return box_summary(df, x, y, color=color)
@@ -0,0 +1,108 @@
+# utils/risk_surface.py
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .encoder import FeatureEncoder, get_encoder
+from .loader import CATEGORICAL_COLS, SCORE_COLS
+from .telemetry import timed
+
+GRID = np.arange(101)
+MAX_PROFILES = 32  # ~4 MB of float32 per cached profile
+
+
+class RiskSurface:
+    """Lazily computed P(at risk) over the full 0-100 math × reading × writing grid.
+
+    One surface is evaluated per categorical profile (gender, race, parent
+    education, lunch, prep) and kept in a small LRU cache. After that, every
+    slider move is an array lookup and no model call is needed.
+    """
+
+    def __init__(self, model, encoder: FeatureEncoder, max_profiles: int = MAX_PROFILES, positive_class=1):
+        self.model = model
+        self.encoder = encoder
+        self.max_profiles = max_profiles
+        self.positive_idx = int(np.flatnonzero(model.classes_ == positive_class)[0])
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def profile_key(record: dict) -> tuple:
+        return tuple(record[col] for col in CATEGORICAL_COLS)
+
+    def _compute(self, profile: tuple) -> np.ndarray:
+        record = dict(zip(CATEGORICAL_COLS, profile))
+        record.update({col: 0 for col in SCORE_COLS})
+        base = self.encoder.transform_record(record)
+        score_idx = [self.encoder.numeric_idx[col] for col in SCORE_COLS]
+
+        # One math slice (101 × 101 reading/writing rows) per predict_proba call
+        reading, writing = np.meshgrid(GRID, GRID, indexing="ij")
+        X = np.tile(base, (reading.size, 1))
+        X[:, score_idx[1]] = reading.ravel()
+        X[:, score_idx[2]] = writing.ravel()
+        frame = self.encoder.to_frame(X)
+        surface = np.empty((len(GRID), len(GRID), len(GRID)), dtype=np.float32)
+        for m in GRID:
+            frame.iloc[:, score_idx[0]] = m
+            surface[m] = self.model.predict_proba(frame)[:, self.positive_idx].reshape(len(GRID), len(GRID))
+        return surface
+
+    def surface(self, record: dict) -> np.ndarray:
+        key = self.profile_key(record)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        surface = self._compute(key)
+        with self._lock:
+            self._cache[key] = surface
+            while len(self._cache) > self.max_profiles:
+                self._cache.popitem(last=False)
+        return surface
+
+    @timed("risk_surface.lookup")
+    def proba(self, record: dict) -> float:
+        m, r, w = (int(record[col]) for col in SCORE_COLS)
+        return float(self.surface(record)[m, r, w])
+
+    def min_change_to_exit(self, record: dict, threshold: float = 0.5):
+        """Smallest total score increase (L1, no subject goes down) that drops risk below ``threshold``.
+
+        Returns ``None`` if no such point exists on the grid, otherwise a dict with
+        the target scores, per-subject increase and total increase.
+        """
+        surface = self.surface(record)
+        current = np.array([int(record[col]) for col in SCORE_COLS])
+        region = surface[current[0]:, current[1]:, current[2]:]
+        safe = region <= threshold
+        if not safe.any():
+            return None
+        dm, dr, dw = np.ogrid[:region.shape[0], :region.shape[1], :region.shape[2]]
+        cost = np.where(safe, dm + dr + dw, np.iinfo(np.int32).max)
+        step = np.array(np.unravel_index(np.argmin(cost), region.shape))
+        target = current + step
+        return {
+            "target": dict(zip(SCORE_COLS, target.tolist())),
+            "increase": dict(zip(SCORE_COLS, step.tolist())),
+            "total": int(step.sum()),
+            "proba": float(surface[tuple(target)]),
+        }
+
+    def slice_2d(self, record: dict, fixed: str = "writing_score") -> pd.DataFrame:
+        """P(at risk) over the two other subjects with ``fixed`` held at the record's value."""
+        surface = self.surface(record)
+        axis = SCORE_COLS.index(fixed)
+        plane = np.take(surface, int(record[fixed]), axis=axis)
+        rows, cols = [c for c in SCORE_COLS if c != fixed]
+        return pd.DataFrame(plane, index=pd.Index(GRID, name=rows), columns=pd.Index(GRID, name=cols))
+
+
+@st.cache_resource
+def get_risk_surface(model_path: str, model_version: str, _model) -> RiskSurface:
+    return RiskSurface(_model, get_encoder(tuple(_model.feature_names_in_)))
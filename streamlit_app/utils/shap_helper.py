@@ -1,14 +1,136 @@
 # utils/shap_helper.py
 
-import shap
+import os
+import threading
+import time
+
+import numpy as np
 import pandas as pd
-import joblib
+import streamlit as st
+
+from .encoder import get_encoder
+from .fast_shap import fast_explainer
+from .lazy import shap
+from .loader import load_data
+from .model_registry import get_model_registry
+from .telemetry import telemetry
+
+BACKGROUND_CLUSTERS = 20
 
 def load_shap_explainer(model_path, X_sample):
-    model = joblib.load(model_path)
+    model = get_model_registry().model(model_path)
     explainer = shap.Explainer(model, X_sample)
     return explainer
 
 def get_shap_values(explainer, X_input):
     shap_values = explainer(X_input)
     return shap_values
+
+class Background:
+    """Weighted background rows: k-means centroids and each cluster's share of the data.
+
+    Plain arrays, so a stored background can be rebuilt without shap internals.
+    """
+
+    def __init__(self, data: pd.DataFrame, weights):
+        self.data = data
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+def summarize_background(X: pd.DataFrame, k: int = BACKGROUND_CLUSTERS) -> Background:
+    # k-means centroids (snapped to observed values) stand in for the full dataset;
+    # the weights hold each cluster's share of the rows and must travel with the data
+    k = min(k, len(X.drop_duplicates()))
+    summary = shap.kmeans(X, k)
+    return Background(pd.DataFrame(summary.data, columns=X.columns), summary.weights)
+
+
+class WeightedKernelExplainer:
+    """KernelSHAP against a weighted ``Background``.
+
+    SHAP values are linear in the background distribution, so explaining
+    against each centroid alone and mixing by cluster weight gives the values
+    for the weighted background.
+    """
+
+    def __init__(self, predict, background: Background):
+        self.weights = background.weights / background.weights.sum()
+        self.explainers = [shap.KernelExplainer(predict, background.data.iloc[[i]])
+                           for i in range(len(background.data))]
+        self.expected_value = sum(w * np.asarray(e.expected_value) for w, e in zip(self.weights, self.explainers))
+
+    def __call__(self, X):
+        parts = [explainer(X, silent=True) for explainer in self.explainers]
+        return shap.Explanation(values=sum(w * p.values for w, p in zip(self.weights, parts)),
+                                base_values=sum(w * p.base_values for w, p in zip(self.weights, parts)),
+                                data=parts[0].data, feature_names=parts[0].feature_names)
+
+def build_explainer(model, background):
+    # Exact closed-form / TreeSHAP paths where the model allows, shap's dispatch otherwise
+    explainer = fast_explainer(model, background)
+    if explainer is None:
+        if isinstance(background, Background):
+            # shap.Explainer's maskers average background rows uniformly; weight the centroids ourselves
+            predict = model.predict_proba if hasattr(model, "predict_proba") else model.predict
+            explainer = WeightedKernelExplainer(predict, background)
+        else:
+            explainer = shap.Explainer(model, background)
+        explainer.path = "generic"
+    return explainer
+
+
+class ExplainerRegistry:
+    """One SHAP explainer per model file, rebuilt only when the registry loads a new version."""
+
+    def __init__(self, background_fn=None):
+        self._background_fn = background_fn or self._default_background
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _default_background(model):
+        encoder = get_encoder(tuple(model.feature_names_in_))
+        return summarize_background(encoder.encode_frame(load_data()))
+
+    def get(self, model_path: str):
+        model_path = os.path.abspath(model_path)
+        artifact = get_model_registry().artifact(model_path)
+        with self._lock:
+            entry = self._entries.get(model_path)
+            if entry is None or entry["sha256"] != artifact.sha256:
+                model = artifact.model
+                background = self._background_fn(model)
+                entry = {"sha256": artifact.sha256, "model": model, "background": background,
+                         "explainer": build_explainer(model, background)}
+                self._entries[model_path] = entry
+            return entry
+
+    def explainer(self, model_path: str):
+        return self.get(model_path)["explainer"]
+
+    def explain_with_info(self, model_path: str, rows: pd.DataFrame):
+        """Explain a batch of encoded rows in one SHAP call.
+
+        Returns ``(explanation, info)`` where ``info`` records the explainer
+        path used and the evaluation time.
+        """
+        explainer = self.explainer(model_path)
+        start = time.perf_counter()
+        explanation = explainer(rows)
+        seconds = time.perf_counter() - start
+        telemetry.observe("shap.compute", seconds * 1e3)
+        info = {"path": explainer.path, "rows": len(rows), "seconds": seconds}
+        return explanation, info
+
+    def explain(self, model_path: str, rows: pd.DataFrame):
+        return self.explain_with_info(model_path, rows)[0]
+
+
+@st.cache_resource
+def get_explainer_registry() -> ExplainerRegistry:
+    return ExplainerRegistry()
+
+def explain(model_path: str, rows: pd.DataFrame):
+    return get_explainer_registry().explain(model_path, rows)
+
+def explain_with_info(model_path: str, rows: pd.DataFrame):
+    return get_explainer_registry().explain_with_info(model_path, rows)
@@ -0,0 +1,136 @@
+# utils/shap_store.py
+
+import hashlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .loader import PROJECT_ROOT
+from .telemetry import timed
+
+STORE_DIR = os.path.join(PROJECT_ROOT, "models", "shap_cache")
+# Past this many stored rows, a save keeps only the rows of the frame being explained
+MAX_ROWS = int(os.environ.get("SHAP_STORE_MAX_ROWS", 100_000))
+
+
+def row_hashes(X: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(X, index=False).to_numpy()
+
+
+class ShapStore:
+    """Persisted SHAP values for one model file, keyed by per-row feature hashes.
+
+    The explainer background is frozen when the store is created, so a row's
+    attribution only depends on the model and the row itself. Calls only run
+    SHAP on rows whose hash is not stored yet. The store lives at
+    ``models/shap_cache/<model>-<sha>.npz`` and goes stale when the model file
+    changes. Once it passes ``MAX_ROWS`` rows, a save keeps only the rows of
+    the frame being explained.
+    """
+
+    def __init__(self, model, model_path: str, model_version: str, store_dir: str = STORE_DIR):
+        self.model = model
+        self.model_hash = model_version
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        self.path = os.path.join(store_dir, f"{name}-{self.model_hash[:16]}.npz")
+        self._lock = threading.Lock()
+        self._explainer = None
+        self.background = None
+        self.background_weights = None
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.values = None
+        self.summary_key = None
+        self.summary = None
+        self.last_computed = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with np.load(self.path, allow_pickle=False) as data:
+            if "background_weights" not in data:
+                return  # written with an unweighted background; recompute rather than mix baselines
+            self.background = data["background"]
+            self.background_weights = data["background_weights"]
+            self.keys = data["keys"]
+            self.values = data["values"]
+            if "summary" in data:
+                self.summary_key = data["summary_key"].item()
+                self.summary = data["summary"]
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        arrays = {"background": self.background, "background_weights": self.background_weights,
+                  "keys": self.keys, "values": self.values}
+        if self.summary is not None:
+            arrays["summary_key"] = np.array(self.summary_key)
+            arrays["summary"] = self.summary
+        tmp_path = f"{self.path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, self.path)
+
+    def _get_explainer(self, X: pd.DataFrame):
+        from .shap_helper import Background, build_explainer, summarize_background
+
+        if self.background is None:
+            summary = summarize_background(X)
+            self.background = summary.data.to_numpy(dtype=np.float64)
+            self.background_weights = summary.weights
+        if self._explainer is None:
+            background = Background(pd.DataFrame(self.background, columns=X.columns), self.background_weights)
+            self._explainer = build_explainer(self.model, background)
+        return self._explainer
+
+    def _lookup(self, hashes):
+        pos = np.searchsorted(self.keys, hashes)
+        pos = np.minimum(pos, max(len(self.keys) - 1, 0))
+        found = (self.keys[pos] == hashes) if len(self.keys) else np.zeros(len(hashes), dtype=bool)
+        return pos, found
+
+    def shap_values(self, X: pd.DataFrame) -> np.ndarray:
+        """SHAP values for every row of ``X``; only unseen rows are evaluated."""
+        hashes = row_hashes(X)
+        with self._lock:
+            _, found = self._lookup(hashes)
+            new_hashes, first = np.unique(hashes[~found], return_index=True)
+            self.last_computed = len(new_hashes)
+            if len(new_hashes):
+                X_new = X.iloc[np.flatnonzero(~found)[first]]
+                new_values = np.asarray(self._get_explainer(X)(X_new).values)
+                keys = np.concatenate([self.keys, new_hashes])
+                values = new_values if self.values is None else np.concatenate([self.values, new_values])
+                if len(keys) > MAX_ROWS:
+                    keep = np.isin(keys, hashes)
+                    keys, values = keys[keep], values[keep]
+                order = np.argsort(keys, kind="stable")
+                self.keys, self.values = keys[order], values[order]
+                self._save()
+            pos, _ = self._lookup(hashes)
+            return self.values[pos]
+
+    @timed("shap.store")
+    def mean_abs_shap(self, X: pd.DataFrame) -> pd.Series:
+        """Mean |SHAP| per feature, served from the store when ``X`` is unchanged."""
+        data_key = hashlib.sha256(row_hashes(X).tobytes()).hexdigest()
+        if self.summary_key == data_key and self.summary is not None:
+            self.last_computed = 0
+            summary = self.summary
+        else:
+            values = self.shap_values(X)
+            summary = np.abs(values).mean(axis=0)
+            if summary.ndim > 1:
+                # Multi-output models: average the magnitude across outputs
+                summary = summary.mean(axis=-1)
+            with self._lock:
+                self.summary_key, self.summary = data_key, summary
+                self._save()
+        return pd.Series(summary, index=X.columns).sort_values(ascending=False)
+
+
+@st.cache_resource(max_entries=2)
+def get_shap_store(model_path: str, model_version: str, _model) -> ShapStore:
+    # model_version is the registry's sha256 of the loaded artifact, so the store matches the model in memory
+    return ShapStore(_model, model_path, model_version)
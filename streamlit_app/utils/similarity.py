@@ -0,0 +1,218 @@
+# utils/similarity.py
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .loader import CATEGORICAL_COLS, PROJECT_ROOT, SCORE_COLS, dataset_version
+from .telemetry import timed
+
+SIMILARITY_PATH = os.path.join(PROJECT_ROOT, "models", "similarity_index.npz")
+DEFAULT_K = 5
+# One-hot weight in the fallback space: a single differing category costs as much as
+# one standard deviation on one subject (two one-hot columns differ by w each)
+CATEGORY_WEIGHT = np.sqrt(0.5)
+
+
+class SimilarityIndex:
+    """Top-k most similar students: same categorical profile, nearest standardized scores.
+
+    Rows are sorted by profile (gender, race, parent education, lunch, prep),
+    so each profile is one contiguous slice with its own KD-tree over z-scored
+    math/reading/writing. A query only searches the tree of its own profile.
+    When a profile has fewer than ``k`` students, or one of its values was never
+    seen, the remaining neighbours come from a global KD-tree over the scores
+    plus weighted one-hot profile columns, so the closest differing profiles
+    come next. Trees are built lazily per profile from the persisted arrays.
+    """
+
+    def __init__(self, vocab: dict, mean, scale, codes, order, Z, version: str = None):
+        self.vocab = {col: list(cats) for col, cats in vocab.items()}
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.codes = np.asarray(codes, dtype=np.int64)    # profile code per sorted row
+        self.order = np.asarray(order, dtype=np.int64)    # sorted row -> dataset position
+        self.Z = np.asarray(Z, dtype=np.float64)          # standardized scores, sorted
+        self.version = version
+        self.sizes = np.array([len(cats) for cats in self.vocab.values()], dtype=np.int64)
+        self.strides = np.concatenate([np.cumprod(self.sizes[::-1])[::-1][1:], [1]])
+        self._lookup = {col: {cat: i for i, cat in enumerate(cats)} for col, cats in self.vocab.items()}
+        self._trees = {}
+        self._global = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.order)
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, version: str = None) -> "SimilarityIndex":
+        vocab = {col: sorted(df[col].dropna().unique()) for col in CATEGORICAL_COLS}
+        scores = df[SCORE_COLS].to_numpy(dtype=np.float64)
+        mean = scores.mean(axis=0)
+        scale = scores.std(axis=0)
+        scale[scale == 0] = 1.0
+        index = cls(vocab, mean, scale, np.empty(0), np.empty(0), np.empty((0, len(SCORE_COLS))), version)
+        codes = index.profile_codes(df)
+        order = np.argsort(codes, kind="stable")
+        index.codes, index.order = codes[order], order
+        index.Z = (scores[order] - mean) / scale
+        return index
+
+    def _column_codes(self, frame: pd.DataFrame) -> np.ndarray:
+        return np.column_stack([pd.Categorical(frame[col], categories=cats).codes
+                                for col, cats in self.vocab.items()]).astype(np.int64)
+
+    def profile_codes(self, frame: pd.DataFrame) -> np.ndarray:
+        """One integer per row for its categorical profile; -1 when any value is unseen."""
+        col_codes = self._column_codes(frame)
+        codes = col_codes @ self.strides
+        codes[(col_codes < 0).any(axis=1)] = -1
+        return codes
+
+    def _standardize(self, frame: pd.DataFrame) -> np.ndarray:
+        return (frame[SCORE_COLS].to_numpy(dtype=np.float64) - self.mean) / self.scale
+
+    def _profile_tree(self, code: int):
+        tree = self._trees.get(code)
+        if tree is None:
+            from scipy.spatial import cKDTree
+
+            lo, hi = np.searchsorted(self.codes, [code, code + 1])
+            tree = (cKDTree(self.Z[lo:hi]), lo) if hi > lo else (None, lo)
+            with self._lock:
+                self._trees[code] = tree
+        return tree
+
+    def _global_space(self, Z: np.ndarray, col_codes: np.ndarray) -> np.ndarray:
+        onehot = np.zeros((len(Z), int(self.sizes.sum())))
+        offsets = np.concatenate([[0], np.cumsum(self.sizes)[:-1]])
+        rows = np.arange(len(Z))
+        for j, offset in enumerate(offsets):
+            known = col_codes[:, j] >= 0
+            onehot[rows[known], offset + col_codes[known, j]] = CATEGORY_WEIGHT
+        return np.hstack([Z, onehot])
+
+    def _global_tree(self):
+        if self._global is None:
+            from scipy.spatial import cKDTree
+
+            col_codes = (self.codes[:, None] // self.strides) % self.sizes
+            tree = cKDTree(self._global_space(self.Z, col_codes))
+            with self._lock:
+                self._global = tree
+        return self._global
+
+    def query_batch(self, frame: pd.DataFrame, k: int = DEFAULT_K, exact: bool = True):
+        """``(positions, distances)``, each ``len(frame) x k``, nearest first.
+
+        ``positions`` index rows of the dataset the index was built from (-1
+        where the index holds fewer than ``k`` students). With ``exact=False``
+        every neighbour comes from the global space.
+        """
+        n = len(frame)
+        k = min(k, len(self))
+        positions = np.full((n, k), -1, dtype=np.int64)
+        distances = np.full((n, k), np.inf)
+        found = np.zeros(n, dtype=np.int64)
+        Zq = self._standardize(frame)
+        codes = self.profile_codes(frame)
+
+        if exact:
+            for code in np.unique(codes[codes >= 0]):
+                tree, lo = self._profile_tree(int(code))
+                if tree is None:
+                    continue
+                rows = np.flatnonzero(codes == code)
+                kk = min(k, tree.n)
+                d, i = tree.query(Zq[rows], k=kk)
+                d, i = d.reshape(len(rows), kk), i.reshape(len(rows), kk)
+                positions[rows, :kk] = self.order[lo + i]
+                distances[rows, :kk] = d
+                found[rows] = kk
+
+        short = np.flatnonzero(found < k)
+        if len(short):
+            # Top up from the global space, skipping rows already returned from the profile tree
+            tree = self._global_tree()
+            kk = min(len(self), k + int(found[short].max()))
+            d, i = tree.query(self._global_space(Zq[short], self._column_codes(frame.iloc[short])), k=kk)
+            d, i = d.reshape(len(short), kk), i.reshape(len(short), kk)
+            for r, row in enumerate(short):
+                have = set(positions[row, :found[row]].tolist())
+                for dist, idx in zip(d[r], self.order[i[r]]):
+                    if found[row] == k:
+                        break
+                    if idx not in have:
+                        positions[row, found[row]] = idx
+                        distances[row, found[row]] = dist
+                        found[row] += 1
+        return positions, distances
+
+    def query(self, record: dict, k: int = DEFAULT_K, exact: bool = True):
+        """``query_batch`` for one record dict, without building a frame when its profile has ``k`` students."""
+        k = min(k, len(self))
+        if exact:
+            code = 0
+            for (col, lookup), stride in zip(self._lookup.items(), self.strides):
+                c = lookup.get(record.get(col), -1)
+                if c < 0:
+                    break
+                code += c * int(stride)
+            else:
+                tree, lo = self._profile_tree(code)
+                if tree is not None and tree.n >= k:
+                    z = (np.array([record[col] for col in SCORE_COLS], dtype=np.float64) - self.mean) / self.scale
+                    d, i = tree.query(z, k=k)
+                    return self.order[lo + np.atleast_1d(i)], np.atleast_1d(d)
+        positions, distances = self.query_batch(pd.DataFrame([record]), k, exact)
+        return positions[0], distances[0]
+
+    @timed("similarity.neighbors")
+    def neighbors(self, df: pd.DataFrame, record: dict, k: int = DEFAULT_K) -> pd.DataFrame:
+        """The ``k`` most similar rows of ``df`` (the indexed dataset) with their distance."""
+        positions, distances = self.query(record, k)
+        keep = positions >= 0
+        out = df.iloc[positions[keep]].copy()
+        out.insert(0, "distance", np.round(distances[keep], 3))
+        return out
+
+    def save(self, path: str = SIMILARITY_PATH):
+        arrays = {"mean": self.mean, "scale": self.scale, "codes": self.codes, "order": self.order,
+                  "Z": self.Z, "version": np.asarray(self.version or "", dtype=str)}
+        for col, cats in self.vocab.items():
+            arrays[f"vocab:{col}"] = np.asarray(cats, dtype=str)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = SIMILARITY_PATH) -> "SimilarityIndex":
+        with np.load(path, allow_pickle=False) as data:
+            vocab = {col: data[f"vocab:{col}"].tolist() for col in CATEGORICAL_COLS}
+            return cls(vocab, data["mean"], data["scale"], data["codes"], data["order"], data["Z"],
+                       str(data["version"]) or None)
+
+
+@st.cache_resource(max_entries=2)
+def _similarity_index(version: str, _df: pd.DataFrame, path: str) -> SimilarityIndex:
+    if os.path.exists(path):
+        index = SimilarityIndex.load(path)
+        if index.version == version:
+            return index
+    index = SimilarityIndex.build(_df, version)
+    try:
+        index.save(path)
+    except OSError:
+        pass  # read-only deployments rebuild per process instead
+    return index
+
+
+def get_similarity_index(df: pd.DataFrame, version: str = None, path: str = SIMILARITY_PATH) -> SimilarityIndex:
+    """Index over ``df``, loaded from ``path`` when it was built from the same data version.
+
+    Pages pass ``loader.data_version()``; without ``version`` the whole frame is hashed on every call.
+    """
+    return _similarity_index(version or dataset_version(df), df, path)
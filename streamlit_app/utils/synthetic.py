@@ -0,0 +1,80 @@
+# utils/synthetic.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cleaning import PERFORMANCE_BINS, PERFORMANCE_LABELS
+from .loader import CATEGORICAL_COLS, PROJECT_ROOT, SCORE_COLS, load_student_frame, pa
+
+SYNTHETIC_DIR = os.path.join(PROJECT_ROOT, "data", "synthetic")
+# Bump when the sampling changes so cached rosters are regenerated
+SYNTHETIC_VERSION = 2
+CHUNK_ROWS = 1_000_000
+
+
+def synthesize_students(source: pd.DataFrame, n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """``n_rows`` students drawn from the joint distribution of ``source``.
+
+    Smoothed bootstrap: each synthetic student takes the categorical profile
+    and scores of a random source row, and the scores get Gaussian noise with
+    the source score covariance scaled by Scott's factor (a KDE sample). So
+    profile/score relationships and the correlation between subjects carry
+    over without repeating source rows verbatim. Scores are integers in 0-100;
+    ``average_score`` and ``performance`` follow the cleaning rules, except that
+    an average of 0 is labelled "Poor" instead of left empty. Rows
+    are generated in chunks to bound memory at 10M rows. The same source
+    and seed always give the same frame.
+    """
+    cats = {col: pd.Categorical(source[col]) for col in CATEGORICAL_COLS}
+    codes = np.column_stack([cat.codes for cat in cats.values()]).astype(np.int8)
+    scores = source[SCORE_COLS].to_numpy(dtype=np.float64)
+    bandwidth = len(source) ** (-1 / (len(SCORE_COLS) + 4))
+    noise = np.linalg.cholesky(np.cov(scores, rowvar=False) * bandwidth ** 2)
+
+    out_codes = np.empty((n_rows, len(CATEGORICAL_COLS)), dtype=np.int8)
+    out_scores = np.empty((n_rows, len(SCORE_COLS)), dtype=np.int16)
+    chunks = range(0, n_rows, CHUNK_ROWS)
+    for lo, rng in zip(chunks, map(np.random.default_rng, np.random.SeedSequence(seed).spawn(len(chunks)))):
+        hi = min(lo + CHUNK_ROWS, n_rows)
+        rows = rng.integers(0, len(source), size=hi - lo)
+        out_codes[lo:hi] = codes[rows]
+        sampled = scores[rows] + rng.standard_normal((hi - lo, len(SCORE_COLS))) @ noise.T
+        out_scores[lo:hi] = np.clip(np.rint(sampled), 0, 100)
+
+    df = pd.DataFrame({col: pd.Categorical.from_codes(out_codes[:, j], cat.categories)
+                       for j, (col, cat) in enumerate(cats.items())})
+    for j, col in enumerate(SCORE_COLS):
+        df[col] = out_scores[:, j]
+    df["average_score"] = out_scores.mean(axis=1)
+    # Same right-closed bins as pd.cut in the cleaning rules, with the lowest edge included
+    bins = np.clip(np.searchsorted(PERFORMANCE_BINS, df["average_score"].to_numpy(), side="left") - 1,
+                   0, len(PERFORMANCE_LABELS) - 1)
+    df["performance"] = pd.Categorical.from_codes(bins, PERFORMANCE_LABELS)
+    if isinstance(source["performance"].dtype, pd.CategoricalDtype) and \
+            set(source["performance"].cat.categories) == set(PERFORMANCE_LABELS):
+        # Same category order as the loaded data (the CSV path sorts them)
+        df["performance"] = df["performance"].cat.reorder_categories(source["performance"].cat.categories)
+    return df[[col for col in source.columns if col in df.columns]]
+
+
+def synthetic_path(n_rows: int, seed: int = 42, out_dir: str = SYNTHETIC_DIR) -> str:
+    return os.path.join(out_dir, f"students_{n_rows}_s{seed}_v{SYNTHETIC_VERSION}.arrow")
+
+
+def load_synthetic(n_rows: int, seed: int = 42, out_dir: str = SYNTHETIC_DIR) -> pd.DataFrame:
+    """Synthetic roster of ``n_rows`` from the cleaned data, cached as Arrow IPC under ``out_dir``."""
+    path = synthetic_path(n_rows, seed, out_dir)
+    if not os.path.exists(path):
+        df = synthesize_students(load_student_frame(), n_rows, seed)
+        os.makedirs(out_dir, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+        del df, table
+    # Read back even after writing, so a fresh and a cached roster have identical dtypes
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
@@ -0,0 +1,221 @@
+# utils/telemetry.py
+
+import bisect
+import functools
+import os
+import threading
+import time
+
+import streamlit as st
+
+# TELEMETRY=0 turns every timer into a no-op; it can also be toggled at runtime (set_enabled)
+ENABLED = os.environ.get("TELEMETRY", "1") != "0"
+# Optional Prometheus textfile (node_exporter textfile collector), rewritten at most every DUMP_INTERVAL s
+TEXTFILE_PATH = os.environ.get("TELEMETRY_TEXTFILE")
+DUMP_INTERVAL = float(os.environ.get("TELEMETRY_DUMP_INTERVAL", 15))
+
+# Upper bounds in milliseconds; the last bucket is +Inf
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+NO_PAGE = "-"
+METRIC_NAME = "student_dashboard_step_duration_seconds"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (count, sum, min, max and per-bucket counts)."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms < self.min:
+            self.min = ms
+        if ms > self.max:
+            self.max = ms
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation inside the bucket holding the ``q``-th observation."""
+        if not self.count:
+            return float("nan")
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lo = BUCKETS_MS[i - 1] if i else 0.0
+                hi = BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max
+                value = lo + (hi - lo) * (rank - seen) / n
+                return min(max(value, self.min), self.max)
+            seen += n
+        return self.max
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("telemetry", "step", "start")
+
+    def __init__(self, telemetry, step):
+        self.telemetry = telemetry
+        self.step = step
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.telemetry.observe(self.step, (time.perf_counter() - self.start) * 1e3)
+        return False
+
+
+class _PageState(threading.local):
+    # Class-level defaults: a missing thread-local attribute would cost an exception per lookup
+    page = NO_PAGE
+    page_start = None
+
+
+class Telemetry:
+    """In-process latency histograms per ``(step, page)``.
+
+    Steps are timed with ``timer(step)`` or ``@timed(step)``. The page label
+    comes from ``start_page`` on the script thread, so a shared helper such as
+    the encoder is attributed to whichever page called it. Other threads
+    (micro-batch workers, API requests) are recorded under ``"-"``. When
+    disabled, ``timer`` returns a shared no-op and ``timed`` wrappers only
+    check one flag.
+    """
+
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled
+        self.started = time.time()
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = _PageState()
+        self._last_dump = 0.0
+
+    def observe(self, step: str, ms: float, page: str = None):
+        key = (step, page or self._local.page)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(ms)
+
+    def timer(self, step: str):
+        return _Timer(self, step) if self.enabled else _NULL_TIMER
+
+    def timed(self, step: str):
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(step, (time.perf_counter() - start) * 1e3)
+            return wrapper
+        return decorator
+
+    def start_page(self, page: str):
+        """Label this thread's steps with ``page`` and start timing the rerun."""
+        self._local.page = os.path.splitext(os.path.basename(page))[0]
+        self._local.page_start = time.perf_counter()
+
+    def end_page(self):
+        """Record the whole rerun as the ``page.run`` step (pages stopped early are not counted)."""
+        start = self._local.page_start
+        if start is not None and self.enabled:
+            self.observe("page.run", (time.perf_counter() - start) * 1e3)
+        self._local.page_start = None
+        if TEXTFILE_PATH and time.monotonic() - self._last_dump > DUMP_INTERVAL:
+            self._last_dump = time.monotonic()
+            try:
+                self.dump(TEXTFILE_PATH)
+            except OSError:
+                pass
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+        self.started = time.time()
+
+    def histograms(self) -> dict:
+        """Copy of every histogram, keyed by ``(step, page)``."""
+        copies = {}
+        with self._lock:
+            for key, hist in self._histograms.items():
+                copy = copies[key] = Histogram()
+                copy.counts, copy.count, copy.total = list(hist.counts), hist.count, hist.total
+                copy.min, copy.max = hist.min, hist.max
+        return copies
+
+    def summary(self) -> list:
+        """One row per ``(step, page)`` with count and latency percentiles in ms."""
+        rows = []
+        for (step, page), hist in sorted(self.histograms().items()):
+            rows.append({"step": step, "page": page, "count": hist.count,
+                         "mean_ms": hist.total / hist.count, "p50_ms": hist.quantile(0.5),
+                         "p95_ms": hist.quantile(0.95), "p99_ms": hist.quantile(0.99),
+                         "max_ms": hist.max, "total_s": hist.total / 1e3})
+        return rows
+
+    def prometheus(self) -> str:
+        """All histograms in the Prometheus text exposition format (seconds)."""
+        lines = [f"# HELP {METRIC_NAME} Wall time of instrumented dashboard steps.",
+                 f"# TYPE {METRIC_NAME} histogram"]
+        for (step, page), hist in sorted(self.histograms().items()):
+            labels = f'step="{_escape(step)}",page="{_escape(page)}"'
+            cumulative = 0
+            for bound, n in zip(BUCKETS_MS + (None,), hist.counts):
+                cumulative += n
+                le = "+Inf" if bound is None else repr(bound / 1e3)
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{METRIC_NAME}_sum{{{labels}}} {hist.total / 1e3!r}")
+            lines.append(f"{METRIC_NAME}_count{{{labels}}} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_path, path)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# One collector per process, shared by every session and the API workers' threads
+telemetry = Telemetry()
+timer = telemetry.timer
+timed = telemetry.timed
+start_page = telemetry.start_page
+end_page = telemetry.end_page
+
+
+def set_enabled(enabled: bool):
+    telemetry.enabled = enabled
+
+
+def plotly_chart(fig, **kwargs):
+    """``st.plotly_chart`` timed as ``chart.render`` (figure validation + JSON serialization)."""
+    with telemetry.timer("chart.render"):
+        return st.plotly_chart(fig, **kwargs)
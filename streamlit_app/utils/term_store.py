@@ -0,0 +1,269 @@
+# utils/term_store.py
+
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .loader import CATEGORICAL_COLS, PROJECT_ROOT, SCORE_COLS, dataset_version
+
+TERM_STORE_PATH = os.path.join(PROJECT_ROOT, "data", "terms", "student_terms.npz")
+ID_COL = "student_id"
+TERM_COL = "term"
+
+
+def order_terms(labels) -> list:
+    """Term labels oldest first, when the labels themselves say so.
+
+    Accepts numbers, one prefix plus a number ("Term 2" before "Term 10")
+    and dates. Anything else (e.g. "Fall 2023") raises ``ValueError``;
+    pass an explicit order instead of guessing alphabetically.
+    """
+    labels = list(labels)
+    text = pd.Series(labels, dtype=str)
+    numbers = pd.to_numeric(pd.Series(labels), errors="coerce")
+    if numbers.isna().any():
+        parts = text.str.extract(r"^(.*?)(\d+)$")
+        if parts[1].notna().all() and parts[0].nunique() == 1:
+            numbers = parts[1].astype(np.int64)
+        else:
+            numbers = pd.to_datetime(text, errors="coerce", format="mixed")
+    if numbers.isna().any():
+        raise ValueError(f"Cannot tell the order of terms {labels[:5]}; give the term order explicitly")
+    return [labels[i] for i in np.argsort(numbers.to_numpy(), kind="stable")]
+
+
+def _id_array(ids) -> np.ndarray:
+    # Numeric IDs keep their dtype; anything else (e.g. "S1") becomes fixed-width text, which
+    # np.load can read back without pickling
+    ids = np.asarray(ids)
+    return ids if ids.dtype.kind in "iuf" else ids.astype(str)
+
+
+class TermStore:
+    """Per-student score history as a dense students × terms × subjects array.
+
+    Students are kept sorted by ID, so a history lookup is a binary search plus
+    one row slice. Missing (student, term) pairs are NaN. Static attributes
+    (demographics) live in a frame aligned with ``ids``.
+    """
+
+    def __init__(self, ids: np.ndarray, terms, scores: np.ndarray, attributes: pd.DataFrame = None,
+                 subjects=None, simulated: bool = False):
+        self.ids = _id_array(ids)
+        self.terms = list(terms)
+        self.subjects = list(subjects or SCORE_COLS)
+        self.scores = scores
+        self.attributes = attributes if attributes is not None else pd.DataFrame(index=range(len(self.ids)))
+        self.simulated = simulated
+
+    @property
+    def n_students(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_long(cls, df: pd.DataFrame, term_order=None) -> "TermStore":
+        """Build from one row per (student, term). Later duplicates win.
+
+        Terms are ordered by ``term_order`` when given, else by ``order_terms``.
+        """
+        student_codes, ids = pd.factorize(pd.Series(_id_array(df[ID_COL])), sort=True)
+        terms = list(term_order) if term_order is not None else order_terms(df[TERM_COL].unique())
+        term_codes = pd.Categorical(df[TERM_COL], categories=terms).codes
+        if (term_codes < 0).any():
+            raise ValueError("Rows have terms outside term_order")
+
+        scores = np.full((len(ids), len(terms), len(SCORE_COLS)), np.nan, dtype=np.float32)
+        scores[student_codes, term_codes] = df[SCORE_COLS].to_numpy(dtype=np.float32)
+
+        attr_cols = [c for c in CATEGORICAL_COLS if c in df.columns]
+        first = np.full(len(ids), -1, dtype=np.int64)
+        # Last assignment wins, so write rows in reverse to keep each student's first row
+        first[student_codes[::-1]] = np.arange(len(df))[::-1]
+        attributes = df[attr_cols].iloc[first].reset_index(drop=True).astype("category")
+        return cls(np.asarray(ids), terms, scores, attributes)
+
+    @classmethod
+    def simulate(cls, df: pd.DataFrame, n_terms: int = 4, spread: int = 5, seed: int = 42) -> "TermStore":
+        """Demo history: each student's scores plus per-term noise, built as one array."""
+        rng = np.random.default_rng(seed)
+        base = df[SCORE_COLS].to_numpy(dtype=np.float32)
+        noise = rng.integers(-spread, spread, size=(len(df), n_terms, len(SCORE_COLS)), dtype=np.int8)
+        scores = np.clip(base[:, None, :] + noise, 0, 100).astype(np.float32)
+        attributes = df[[c for c in CATEGORICAL_COLS if c in df.columns]].reset_index(drop=True)
+        return cls(np.arange(1, len(df) + 1), [f"Term {t + 1}" for t in range(n_terms)], scores,
+                   attributes, simulated=True)
+
+    def append_term(self, term, ids, scores: np.ndarray) -> "TermStore":
+        """Add a term for known students; students not in ``ids`` get NaN for it."""
+        rows = self.locate(ids)
+        if (rows < 0).any():
+            raise KeyError(f"{int((rows < 0).sum())} student IDs are not in the store")
+        column = np.full((self.n_students, 1, len(self.subjects)), np.nan, dtype=np.float32)
+        column[rows, 0] = scores
+        self.scores = np.concatenate([self.scores, column], axis=1)
+        self.terms.append(term)
+        return self
+
+    def locate(self, ids) -> np.ndarray:
+        """Row index of each ID, or -1 when unknown."""
+        # Text input arrives as str: parse it for numeric stores, never truncate it for text ones
+        ids = np.atleast_1d(np.asarray(ids, dtype=self.ids.dtype if self.ids.dtype.kind in "iuf" else str))
+        rows = np.searchsorted(self.ids, ids)
+        rows = np.minimum(rows, len(self.ids) - 1)
+        return np.where(self.ids[rows] == ids, rows, -1)
+
+    def history(self, student_id) -> pd.DataFrame:
+        row = self.locate(student_id)[0]
+        if row < 0:
+            raise KeyError(student_id)
+        return pd.DataFrame(self.scores[row], index=pd.Index(self.terms, name=TERM_COL), columns=self.subjects)
+
+    def mask(self, **equals) -> np.ndarray:
+        """Boolean student mask from attribute equality, e.g. ``mask(gender="female")``."""
+        keep = np.ones(self.n_students, dtype=bool)
+        for col, value in equals.items():
+            keep &= (self.attributes[col] == value).to_numpy()
+        return keep
+
+    def term_means(self, mask: np.ndarray = None) -> pd.DataFrame:
+        scores = self.scores if mask is None else self.scores[mask]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN terms
+            means = np.nanmean(scores, axis=0)
+        return pd.DataFrame(means, index=pd.Index(self.terms, name=TERM_COL), columns=self.subjects)
+
+    def to_long(self, mask: np.ndarray = None) -> pd.DataFrame:
+        scores = self.scores if mask is None else self.scores[mask]
+        ids = self.ids if mask is None else self.ids[mask]
+        n, t, s = scores.shape
+        long = pd.DataFrame(scores.reshape(n * t, s), columns=self.subjects)
+        long.insert(0, TERM_COL, np.tile(np.asarray(self.terms, dtype=object), n))
+        long.insert(0, ID_COL, np.repeat(ids, t))
+        return long.dropna(subset=self.subjects, how="all").reset_index(drop=True)
+
+    def save(self, path: str = TERM_STORE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = {"ids": self.ids, "terms": np.asarray(self.terms, dtype=str),
+                  "subjects": np.asarray(self.subjects, dtype=str), "scores": self.scores}
+        for col in self.attributes.columns:
+            cat = pd.Categorical(self.attributes[col])
+            arrays[f"attr_codes:{col}"] = cat.codes
+            arrays[f"attr_cats:{col}"] = np.asarray(cat.categories, dtype=str)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = TERM_STORE_PATH) -> "TermStore":
+        with np.load(path, allow_pickle=False) as data:
+            attributes = {}
+            for key in data.files:
+                if key.startswith("attr_codes:"):
+                    col = key.split(":", 1)[1]
+                    attributes[col] = pd.Categorical.from_codes(data[key], data[f"attr_cats:{col}"].tolist())
+            return cls(data["ids"], data["terms"].tolist(), data["scores"], pd.DataFrame(attributes),
+                       subjects=data["subjects"].tolist())
+
+
+class TrendForecast:
+    """Least-squares linear trends for every student and subject at once.
+
+    With term index ``t`` and an observed mask ``m``, the per-(student, subject)
+    fit only needs five sums over terms (n, Σt, Σy, Σt², Σty), so the whole
+    students × terms × subjects array is solved with a few reductions. Group
+    trends pool the same sums per group via ``np.bincount``. Students with fewer
+    than two observed terms fall back to their group's slope.
+    """
+
+    def __init__(self, store: TermStore, group_col: str = None):
+        self.store = store
+        self.group_col = group_col
+        Y = store.scores
+        observed = ~np.isnan(Y)
+        m = observed.astype(np.float64)
+        t = np.arange(Y.shape[1], dtype=np.float64)[None, :, None]
+        y = np.where(observed, Y, 0.0).astype(np.float64)
+
+        sums = np.stack([m.sum(1), (m * t).sum(1), y.sum(1), (m * t * t).sum(1), (y * t).sum(1)])
+        self.n_obs = sums[0].astype(np.int32)
+        slope, intercept = self._solve(sums)
+
+        if group_col is not None:
+            codes = pd.Categorical(store.attributes[group_col]).codes.astype(np.int64)
+            self.groups = pd.Categorical(store.attributes[group_col]).categories.tolist()
+            n_groups, n_subj = len(self.groups), Y.shape[2]
+            flat = (codes[:, None] * n_subj + np.arange(n_subj)).ravel()
+            group_sums = np.stack([np.bincount(flat, weights=s.ravel(), minlength=n_groups * n_subj)
+                                   .reshape(n_groups, n_subj) for s in sums])
+            self.group_slope, self.group_intercept = self._solve(group_sums)
+            fallback_slope = self.group_slope[codes]
+        else:
+            self.groups = ["All"]
+            pooled = sums.sum(axis=1, keepdims=True)
+            self.group_slope, self.group_intercept = self._solve(pooled)
+            fallback_slope = np.broadcast_to(self.group_slope, slope.shape)
+
+        # Under two points a student's slope is undetermined; keep their mean level
+        thin = self.n_obs < 2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_t = sums[1] / sums[0]
+            mean_y = sums[2] / sums[0]
+        self.slope = np.where(thin, fallback_slope, slope)
+        self.intercept = np.where(thin, mean_y - self.slope * np.nan_to_num(mean_t), intercept)
+
+    @staticmethod
+    def _solve(sums):
+        n, st, sy, stt, sty = sums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            denom = n * stt - st * st
+            slope = np.where(denom > 0, (n * sty - st * sy) / denom, 0.0)
+            intercept = (sy - slope * st) / n
+        return slope, intercept
+
+    def forecast(self, steps: int = 1) -> np.ndarray:
+        """Predicted scores ``steps`` terms after the last one (students × subjects)."""
+        t = len(self.store.terms) - 1 + steps
+        return np.clip(self.intercept + self.slope * t, 0, 100)
+
+    def group_forecast(self, steps: int = 1) -> pd.DataFrame:
+        t = len(self.store.terms) - 1 + steps
+        values = np.clip(self.group_intercept + self.group_slope * t, 0, 100)
+        return pd.DataFrame(np.atleast_2d(values), index=self.groups, columns=self.store.subjects)
+
+    def student(self, student_id, steps: int = 1) -> pd.DataFrame:
+        row = self.store.locate(student_id)[0]
+        if row < 0:
+            raise KeyError(student_id)
+        return pd.DataFrame({"slope_per_term": self.slope[row],
+                             "forecast": np.clip(self.intercept[row] + self.slope[row] *
+                                                 (len(self.store.terms) - 1 + steps), 0, 100)},
+                            index=self.store.subjects)
+
+
+@st.cache_resource
+def _load_store(path: str, mtime: float) -> TermStore:
+    return TermStore.load(path)
+
+
+@st.cache_resource
+def _simulated_store(version: str, _df: pd.DataFrame) -> TermStore:
+    return TermStore.simulate(_df)
+
+
+def get_term_store(df: pd.DataFrame = None, path: str = TERM_STORE_PATH) -> TermStore:
+    """The saved history when there is one, otherwise a simulated demo built from ``df``."""
+    if os.path.exists(path):
+        return _load_store(path, os.path.getmtime(path))
+    return _simulated_store(dataset_version(df), df)
+
+
+def get_trend_forecast(store: TermStore, group_col: str = None) -> TrendForecast:
+    """Fit once per store, group column and term count; the store is shared via the cache."""
+    key = (group_col, len(store.terms))
+    cache = store.__dict__.setdefault("_forecasts", {})
+    if key not in cache:
+        cache[key] = TrendForecast(store, group_col)
+    return cache[key]
@@ -0,0 +1,277 @@
+# utils/training.py
+
+import datetime
+import json
+import os
+import platform
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, classification_report, f1_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold, train_test_split
+from sklearn.preprocessing import LabelEncoder
+from sklearn.tree import DecisionTreeClassifier
+
+from .encoder import FeatureEncoder
+from .loader import CATEGORICAL_COLS, SCORE_COLS, dataset_version, load_student_frame
+from .model_registry import MODELS_DIR, ModelRegistry, file_hash
+
+VERSIONS_DIR = os.path.join(MODELS_DIR, "versions")
+AT_RISK_CUTOFF = 60
+SEED = 42
+
+# Same estimator families as the shipped models: the compiled tree kernel and the
+# exact TreeSHAP / linear SHAP paths depend on them
+SEARCH_SPACES = {
+    "performance": (DecisionTreeClassifier, {
+        "criterion": ["gini", "entropy"],
+        "max_depth": [None, 4, 6, 8, 10, 12, 16],
+        "min_samples_leaf": [1, 2, 4, 8, 16],
+        "ccp_alpha": [0.0, 0.001, 0.005],
+    }),
+    "at_risk": (LogisticRegression, {
+        "C": [0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0, 30.0],
+        "class_weight": [None, "balanced"],
+        "max_iter": [1000],
+    }),
+}
+ARTIFACT_NAMES = {
+    "performance": "decision_tree_model.pkl",
+    "label_encoder": "performance_label_encoder.pkl",
+    "at_risk": "at_risk_model.pkl",
+}
+
+
+def feature_schema(df: pd.DataFrame) -> dict:
+    """Scores then ``drop_first`` one-hot columns, the layout ``pd.get_dummies`` gave the notebooks."""
+    vocab = {col: sorted(df[col].dropna().unique()) for col in CATEGORICAL_COLS}
+    names = SCORE_COLS + [f"{col}_{cat}" for col in CATEGORICAL_COLS for cat in vocab[col][1:]]
+    return {"feature_names": names, "vocab": vocab}
+
+
+_worker_data = None
+
+
+def _init_worker(X, y, folds):
+    global _worker_data
+    _worker_data = (X, y, folds)
+
+
+def _score_configs(cls, configs, fold_ids):
+    # Runs inside a worker process; data and folds were sent once by the pool initializer
+    X, y, folds = _worker_data
+    scores = np.empty((len(configs), len(fold_ids)))
+    for i, params in enumerate(configs):
+        for j, k in enumerate(fold_ids):
+            train, test = folds[k]
+            model = cls(**params).fit(X[train], y[train])
+            scores[i, j] = f1_score(y[test], model.predict(X[test]), average="macro")
+    return scores
+
+
+def _search(kind: str, X: pd.DataFrame, y: np.ndarray, n_jobs: int, cv: int, factor: int, seed: int):
+    """Race every configuration fold by fold, keeping the best ``1/factor`` after each fold.
+
+    Weak configurations are dropped after one or two folds, so a 210-point grid
+    costs ~300 fits instead of ``210 * cv``. Each round's fits are spread over
+    a process pool in chunks.
+    """
+    cls, grid = SEARCH_SPACES[kind]
+    configs = [{**params, "random_state": seed} for params in ParameterGrid(grid)]
+    n_splits = min(cv, int(np.bincount(y).min()))
+    folds = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(X, y))
+    X_np = X.to_numpy(dtype=np.float64)
+
+    n_jobs = (os.cpu_count() or 1) if n_jobs in (None, -1) else n_jobs
+    pool = ProcessPoolExecutor(n_jobs, initializer=_init_worker, initargs=(X_np, y, folds)) if n_jobs > 1 else None
+    if pool is None:
+        _init_worker(X_np, y, folds)
+
+    start = time.perf_counter()
+    alive = np.arange(len(configs))
+    scores = np.full((len(configs), n_splits), np.nan)
+    rounds = []
+    try:
+        for k in range(n_splits):
+            batch = [configs[i] for i in alive]
+            if pool is None:
+                fold_scores = _score_configs(cls, batch, [k])[:, 0]
+            else:
+                size = -(-len(batch) // (n_jobs * 4))
+                chunks = [batch[i:i + size] for i in range(0, len(batch), size)]
+                fold_scores = np.concatenate([r[:, 0] for r in pool.map(_score_configs, [cls] * len(chunks),
+                                                                         chunks, [[k]] * len(chunks))])
+            scores[alive, k] = fold_scores
+            rounds.append({"fold": k, "candidates": int(len(alive))})
+            if k < n_splits - 1 and len(alive) > 1:
+                mean = np.nanmean(scores[alive, :k + 1], axis=1)
+                keep = max(1, -(-len(alive) // factor))
+                alive = alive[np.argsort(-mean, kind="stable")[:keep]]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    seconds = time.perf_counter() - start
+
+    mean = scores[alive].mean(axis=1)
+    best = int(alive[np.argmax(mean)])
+    params = {k: v for k, v in configs[best].items() if k != "random_state"}
+    model = cls(**configs[best]).fit(X, y)
+    return model, {
+        "estimator": f"{cls.__module__}.{cls.__name__}",
+        "best_params": params,
+        "best_cv_f1_macro": round(float(mean.max()), 4),
+        "configurations": len(configs),
+        "fits": int(sum(r["candidates"] for r in rounds)),
+        "rounds": rounds,
+        "search_seconds": round(seconds, 3),
+    }
+
+
+def _holdout_metrics(model, X_test, y_test, target_names) -> dict:
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_s = time.perf_counter() - start
+    return {
+        "accuracy": round(float(accuracy_score(y_test, y_pred)), 4),
+        "f1_macro": round(float(f1_score(y_test, y_pred, average="macro")), 4),
+        "predict_ms": round(predict_s * 1e3, 3),
+        "report": classification_report(y_test, y_pred, labels=np.arange(len(target_names)),
+                                        target_names=target_names, output_dict=True, zero_division=0),
+    }
+
+
+def train_all(df: pd.DataFrame = None, n_jobs: int = -1, cv: int = 5, factor: int = 3,
+              test_size: float = 0.2, seed: int = SEED, progress=None):
+    """Fit the label encoder, performance tree and at-risk model from the cleaned data.
+
+    Each model is tuned on a stratified training split and scored on the
+    held-out rest, with the split, CV folds and estimators all seeded.
+    Returns ``(artifacts, metadata)``, where ``artifacts`` maps artifact file
+    names to fitted objects.
+    """
+    timings = {}
+    step = time.perf_counter()
+    df = load_student_frame() if df is None else df
+    timings["load_s"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    schema = feature_schema(df)
+    encoder = FeatureEncoder(schema["feature_names"], schema["vocab"])
+    X_all = encoder.encode_frame(df)
+    timings["encode_s"] = time.perf_counter() - step
+
+    artifacts, models = {}, {}
+
+    # Performance category (rows with average 0 fall outside the pd.cut bins)
+    labelled = df["performance"].notna().to_numpy()
+    label_encoder = LabelEncoder().fit(df.loc[labelled, "performance"].astype(str))
+    y_perf = label_encoder.transform(df.loc[labelled, "performance"].astype(str))
+    # At risk: average below the cutoff, as in the at-risk notebook
+    y_risk = (df["average_score"].to_numpy() < AT_RISK_CUTOFF).astype(np.int64)
+
+    targets = {
+        "performance": (X_all.loc[labelled].reset_index(drop=True), y_perf, list(label_encoder.classes_)),
+        "at_risk": (X_all, y_risk, ["Not At Risk", "At Risk"]),
+    }
+    for kind, (X, y, target_names) in targets.items():
+        if progress is not None:
+            progress(kind)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, stratify=y, test_size=test_size,
+                                                            random_state=seed)
+        model, search = _search(kind, X_train, y_train, n_jobs, cv, factor, seed)
+        models[kind] = {**search, "train_rows": len(X_train), "test_rows": len(X_test),
+                        "holdout": _holdout_metrics(model, X_test, y_test, target_names)}
+        timings[f"{kind}_search_s"] = search["search_seconds"]
+        artifacts[ARTIFACT_NAMES[kind]] = model
+    artifacts[ARTIFACT_NAMES["label_encoder"]] = label_encoder
+
+    metadata = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "data": {"version": dataset_version(df), "rows": len(df), "labelled_rows": int(labelled.sum())},
+        "features": schema,
+        "targets": {"performance": list(label_encoder.classes_),
+                    "at_risk": f"average_score < {AT_RISK_CUTOFF}"},
+        "search": {"cv": cv, "factor": factor, "test_size": test_size, "seed": seed, "n_jobs": n_jobs,
+                   "spaces": {kind: {k: [v if v is None or isinstance(v, (int, float, str)) else str(v)
+                                         for v in values] for k, values in grid.items()}
+                              for kind, (_, grid) in SEARCH_SPACES.items()}},
+        "models": models,
+        "environment": {"python": platform.python_version(), "sklearn": sklearn.__version__,
+                        "numpy": np.__version__, "pandas": pd.__version__, "cpus": os.cpu_count()},
+        "timings": {k: round(v, 3) for k, v in timings.items()},
+    }
+    return artifacts, metadata
+
+
+def write_version(artifacts: dict, metadata: dict, versions_dir: str = VERSIONS_DIR) -> str:
+    """Write artifacts + ``metadata.json`` to ``versions/<timestamp>-<data version>/``; returns the path."""
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    version_dir = os.path.join(versions_dir, f"{stamp}-{metadata['data']['version'][:8]}")
+    tmp_dir = f"{version_dir}.{os.getpid()}.tmp"
+    os.makedirs(tmp_dir)
+    start = time.perf_counter()
+    hashes = {}
+    for name, obj in artifacts.items():
+        path = os.path.join(tmp_dir, name)
+        joblib.dump(obj, path)
+        hashes[name] = file_hash(path)
+    metadata = {**metadata, "version": os.path.basename(version_dir), "artifacts": hashes}
+    metadata["timings"]["write_s"] = round(time.perf_counter() - start, 3)
+    with open(os.path.join(tmp_dir, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=2, default=str)
+        f.write("\n")
+    os.replace(tmp_dir, version_dir)
+    return version_dir
+
+
+def promote(version_dir: str, registry: ModelRegistry = None) -> dict:
+    """Copy a version's artifacts into ``models/`` and record their hashes in the manifest.
+
+    Running apps pick the new files up through the model registry's hot reload.
+    """
+    registry = registry or ModelRegistry()
+    with open(os.path.join(version_dir, "metadata.json")) as f:
+        hashes = json.load(f)["artifacts"]
+    for name in hashes:
+        target = registry.resolve(name)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        shutil.copyfile(os.path.join(version_dir, name), tmp_path)
+        os.replace(tmp_path, target)
+    manifest = registry.write_manifest(list(hashes))
+    mismatched = [name for name, sha in hashes.items() if manifest[name] != sha]
+    if mismatched:
+        raise ValueError(f"Promoted files do not match their recorded hashes: {', '.join(mismatched)}")
+    return hashes
+
+
+if __name__ == "__main__":
+    # python -m utils.training [--promote] [--n-jobs N]  (from streamlit_app/)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Retrain the shipped models from the cleaned data")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="parallel fits (-1: all cores)")
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--factor", type=int, default=3, help="keep the best 1/factor configurations after each fold")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--versions-dir", default=VERSIONS_DIR)
+    parser.add_argument("--promote", action="store_true", help="also install the new version into models/")
+    args = parser.parse_args()
+
+    artifacts, metadata = train_all(n_jobs=args.n_jobs, cv=args.cv, factor=args.factor, seed=args.seed,
+                                    progress=lambda kind: print(f"searching {kind}..."))
+    version_dir = write_version(artifacts, metadata, args.versions_dir)
+    for kind, info in metadata["models"].items():
+        rounds = " -> ".join(str(r["candidates"]) for r in info["rounds"])
+        print(f"{kind:>12}: holdout acc {info['holdout']['accuracy']:.3f}  f1 {info['holdout']['f1_macro']:.3f}"
+              f"  cv f1 {info['best_cv_f1_macro']:.3f}  candidates {rounds}  {info['search_seconds']:.1f}s"
+              f"  {info['best_params']}")
+    print(f"wrote {version_dir}")
+    if args.promote:
+        promote(version_dir)
+        print("promoted to", MODELS_DIR)
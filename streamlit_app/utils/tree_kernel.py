@@ -0,0 +1,191 @@
+# utils/tree_kernel.py
+
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .encoder import FeatureEncoder, get_encoder
+from .model_registry import load_artifact
+
+
+class CompiledTree:
+    """Flattened ``DecisionTreeClassifier`` with a vectorized NumPy traversal.
+
+    ``predict`` takes the encoded feature matrix and skips sklearn's
+    DataFrame/feature-name validation, but still walks the tree in sklearn's
+    Cython ``Tree.apply``: on an encoded matrix that beats the NumPy traversal
+    at every batch size measured (1 to 200k rows). ``predict_raw`` is where the
+    NumPy traversal pays off. Splits on one-hot columns are precompiled into
+    "category code != k" tests, so raw records are scored straight from their
+    categorical codes and scores, without building the one-hot matrix at all.
+    """
+
+    def __init__(self, model, encoder: FeatureEncoder = None):
+        tree = model.tree_
+        self.tree = tree
+        self.classes_ = model.classes_
+        self.feature_names = list(getattr(model, "feature_names_in_", []))
+        self.left = tree.children_left.astype(np.intp)
+        self.right = tree.children_right.astype(np.intp)
+        self.feature = tree.feature.astype(np.intp)
+        self.threshold = tree.threshold.astype(np.float64)
+        self.is_leaf = self.left < 0
+        self.max_depth = tree.max_depth
+
+        # Branch-free layout: leaves loop back to themselves on feature 0, and
+        # children are interleaved so the next node is _children[2 * node + went_left]
+        nodes = np.arange(len(self.left))
+        left = np.where(self.is_leaf, nodes, self.left)
+        right = np.where(self.is_leaf, nodes, self.right)
+        self._children = np.stack([right, left], axis=1).ravel()
+
+        value = tree.value[:, 0, :].astype(np.float64)
+        self.proba = value / value.sum(axis=1, keepdims=True)
+        self.leaf_class = self.proba.argmax(axis=1)
+
+        self.encoder = encoder
+        if encoder is not None:
+            self._compile_raw(encoder)
+
+    def _compile_raw(self, encoder: FeatureEncoder):
+        # Raw layout: one code column per categorical, then the numeric columns
+        self.raw_cats = list(encoder.vocab)
+        self.raw_nums = list(encoder.numeric_idx)
+        raw_col = {}
+        for c, col in enumerate(self.raw_cats):
+            for k, cat in enumerate(encoder.vocab[col]):
+                idx = encoder.lookup[col][cat]
+                if idx >= 0:
+                    raw_col[idx] = (c, k)
+        for j, col in enumerate(self.raw_nums):
+            raw_col[encoder.numeric_idx[col]] = (len(self.raw_cats) + j, None)
+
+        n_nodes = len(self.feature)
+        self.raw_feature = np.zeros(n_nodes, dtype=np.intp)  # leaves read column 0
+        self.raw_is_cat = np.zeros(n_nodes, dtype=bool)
+        self.raw_cat_code = np.full(n_nodes, -2, dtype=np.int64)
+        for node in np.flatnonzero(~self.is_leaf):
+            col, k = raw_col[self.feature[node]]
+            self.raw_feature[node] = col
+            if k is not None:
+                # One-hot x <= 0.5 (left) exactly when the code is not k
+                self.raw_is_cat[node] = True
+                self.raw_cat_code[node] = k
+
+    def _traverse(self, flat, n_cols, feature, goes_left_fn):
+        # One gather + compare per level over the flattened matrix; leaves are fixed points
+        node = np.zeros(len(flat) // n_cols if n_cols else 0, dtype=np.intp)
+        offsets = np.arange(len(node)) * n_cols
+        for _ in range(self.max_depth):
+            values = flat[offsets + feature[node]]
+            node = self._children[2 * node + goes_left_fn(values, node)]
+        return node
+
+    def apply(self, X) -> np.ndarray:
+        X = X.to_numpy() if isinstance(X, pd.DataFrame) else np.atleast_2d(X)
+        # sklearn compares float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self.tree.apply(X)
+
+    def raw_matrix(self, df: pd.DataFrame) -> np.ndarray:
+        R = np.empty((len(df), len(self.raw_cats) + len(self.raw_nums)), dtype=np.float32)
+        for c, col in enumerate(self.raw_cats):
+            values = df[col]
+            cats = self.encoder.vocab[col]
+            if isinstance(values.dtype, pd.CategoricalDtype) and list(values.cat.categories) == cats:
+                R[:, c] = values.cat.codes.to_numpy()
+            else:
+                R[:, c] = pd.Categorical(values, categories=cats).codes
+        for j, col in enumerate(self.raw_nums):
+            R[:, len(self.raw_cats) + j] = df[col].to_numpy()
+        return R
+
+    def apply_raw(self, df: pd.DataFrame) -> np.ndarray:
+        R = self.raw_matrix(df)
+
+        def goes_left(values, node):
+            return np.where(self.raw_is_cat[node], values != self.raw_cat_code[node], values <= self.threshold[node])
+
+        return self._traverse(R.ravel(), R.shape[1], self.raw_feature, goes_left)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.leaf_class[self.apply(X)]]
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.proba[self.apply(X)]
+
+    def predict_raw(self, df: pd.DataFrame) -> np.ndarray:
+        return self.classes_[self.leaf_class[self.apply_raw(df)]]
+
+    def predict_proba_raw(self, df: pd.DataFrame) -> np.ndarray:
+        return self.proba[self.apply_raw(df)]
+
+
+def compile_model(model, encoder: FeatureEncoder = None):
+    """Compile single decision trees; any other estimator is returned unchanged."""
+    return CompiledTree(model, encoder) if hasattr(model, "tree_") else model
+
+
+@st.cache_resource(max_entries=2)
+def _compiled(model_version: str, _model):
+    return compile_model(_model, get_encoder(tuple(_model.feature_names_in_)))
+
+
+def load_compiled_model():
+    # Recompiled only when the registry swaps in a new model version
+    artifact = load_artifact("decision_tree_model.pkl")
+    return _compiled(artifact.sha256, artifact.model)
+
+
+def check_parity(model, compiled: CompiledTree, X: pd.DataFrame, raw: pd.DataFrame = None) -> bool:
+    ok = np.array_equal(compiled.predict(X), model.predict(X))
+    ok &= np.allclose(compiled.predict_proba(X), model.predict_proba(X))
+    if raw is not None:
+        ok &= np.array_equal(compiled.predict_raw(raw), model.predict(X))
+    return bool(ok)
+
+
+def benchmark(model, compiled: CompiledTree, X: pd.DataFrame, raw: pd.DataFrame, repeats: int = 20) -> pd.DataFrame:
+    def best_of(fn):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    X_np = X.to_numpy()
+    rows = []
+    for n in [1, 10, 100, 1_000, len(X)]:
+        n = min(n, len(X))
+        Xn, Xn_np, rn = X.iloc[:n], X_np[:n], raw.iloc[:n]
+        rows.append({
+            "rows": n,
+            "sklearn_predict_ms": best_of(lambda: model.predict(Xn)) * 1e3,
+            "compiled_predict_ms": best_of(lambda: compiled.predict(Xn_np)) * 1e3,
+            "compiled_raw_ms": best_of(lambda: compiled.predict_raw(rn)) * 1e3,
+            "sklearn_raw_ms": best_of(lambda: model.predict(compiled.encoder.encode_frame(rn))) * 1e3,
+        })
+    result = pd.DataFrame(rows).drop_duplicates("rows")
+    result["speedup"] = result["sklearn_predict_ms"] / result["compiled_predict_ms"]
+    return result
+
+
+if __name__ == "__main__":
+    # python -m utils.tree_kernel  (from streamlit_app/) — parity check + microbenchmark
+    import joblib
+
+    from .loader import PROJECT_ROOT, load_student_frame
+    import os
+
+    model = joblib.load(os.path.join(PROJECT_ROOT, "models", "decision_tree_model.pkl"))
+    df = load_student_frame()
+    df = pd.concat([df] * 50, ignore_index=True)
+    encoder = FeatureEncoder.fit(df, model.feature_names_in_)
+    X = encoder.encode_frame(df)
+    compiled = CompiledTree(model, encoder)
+
+    print("parity:", "ok" if check_parity(model, compiled, X, df) else "MISMATCH")
+    print(benchmark(model, compiled, X, df).to_string(index=False, float_format="%.3f"))